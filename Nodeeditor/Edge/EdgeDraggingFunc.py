@@ -100,8 +100,7 @@ class AllEdgeDraggingFunctions:
                     ## Send notifications for the new edge
                     for socket in [self.drag_start_socket, item.socket]:
                         # @TODO: Add possibility (ie when an input edge was replaced) to be silent and don't trigger change
-                        socket.node.onEdgeConnectionChanged(new_edge)
-                        if socket.is_input: socket.node.onInputChanged(socket)
+                        new_edge.scene.notifier.collect(socket.node, new_edge, socket)
 
                     self.grView.grScene.scene.history.storeHistory("Created new edge by dragging", setModified=True)
                     return True
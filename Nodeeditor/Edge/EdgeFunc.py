@@ -3,9 +3,13 @@
 A module containing NodeEditor's class for representing Edge and Edge Type Constants.
 """
 from collections import OrderedDict
-from Nodeeditor.Edge.GraphicalEdge import DrawGraphicalEdge
 from Nodeeditor.SystemProperties.SerializationFunc import Serializable
 from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+try:
+    from Nodeeditor.Edge.GraphicalEdge import DrawGraphicalEdge
+except ImportError:
+    # PyQt5 is not available, only headless Scenes can be used
+    DrawGraphicalEdge = None
 
 
 EDGE_TYPE_DIRECT = 1        #:
@@ -37,7 +41,7 @@ class AllEdgeFunctions(Serializable):
         :Instance Attributes:
 
             - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
-            - **grEdge** - Instance of :class:`~nodeeditor.node_graphics_edge.QDMGraphicsEdge` subclass handling graphical representation in the ``QGraphicsScene``.
+            - **grEdge** - Instance of :class:`~nodeeditor.node_graphics_edge.QDMGraphicsEdge` subclass handling graphical representation in the ``QGraphicsScene``. ``None`` if the `Scene` is headless
         """
         super().__init__()
         self.scene = scene
@@ -45,6 +49,7 @@ class AllEdgeFunctions(Serializable):
         # default init
         self.new_start_socket = None
         self.new_end_socket = None
+        self.grEdge = None
 
         self.start_socket = start_socket
         self.end_socket = end_socket
@@ -75,9 +80,13 @@ class AllEdgeFunctions(Serializable):
         # if we were assigned to some socket before, delete us from the socket
         if self.new_start_socket is not None:
             self.new_start_socket.removeEdge(self)
+            self.scene.evaluator.onEdgeSocketChanged(self.new_start_socket)
 
-        # assign new start socket
+        # assign new start socket, the curve of the Graphics Edge depends on its direction
         self.new_start_socket = value
+        if self.grEdge is not None: self.grEdge.invalidateGeometry()
+        self.scene.history.trackEdgeChange(self)
+        self.scene.evaluator.onEdgeSocketChanged(value)
         # addEdge to the Socket class
         if self.start_socket is not None:
             self.start_socket.addEdge(self)
@@ -98,9 +107,12 @@ class AllEdgeFunctions(Serializable):
         # if we were assigned to some socket before, delete us from the socket
         if self.new_end_socket is not None:
             self.new_end_socket.removeEdge(self)
+            self.scene.evaluator.onEdgeSocketChanged(self.new_end_socket)
 
         # assign new end socket
         self.new_end_socket= value
+        self.scene.history.trackEdgeChange(self)
+        self.scene.evaluator.onEdgeSocketChanged(value)
         # addEdge to the Socket class
         if self.end_socket is not None:
             self.end_socket.addEdge(self)
@@ -121,8 +133,10 @@ class AllEdgeFunctions(Serializable):
     def edge_type(self, value):
         # assign new value
         self.edge_type_chosen = value
+        self.scene.history.trackEdgeChange(self)
 
         # update the grEdge pathCalculator
+        if self.grEdge is None: return
         self.grEdge.createEdgePathCalculator()
 
         if self.start_socket is not None:
@@ -172,8 +186,12 @@ class AllEdgeFunctions(Serializable):
     def createEdgeClassInstance(self):
         """
         Create instance of grEdge class
-        :return: Instance of `grEdge` class representing the Graphics Edge in the grScene
+        :return: Instance of `grEdge` class representing the Graphics Edge in the grScene or ``None`` if the `Scene`
+            is headless
         """
+        if self.scene.isHeadless():
+            self.grEdge = None
+            return None
         self.grEdge = self.getGraphicsEdgeClass()(self)
         self.scene.grScene.addItem(self.grEdge)
         if self.start_socket is not None:
@@ -199,13 +217,14 @@ class AllEdgeFunctions(Serializable):
         :param new_state: ``True`` if you want to select the ``Edge``, ``False`` if you want to deselect the ``Edge``
         :type new_state: ``bool``
         """
-        self.grEdge.doSelect(new_state)
+        if self.grEdge is not None: self.grEdge.doSelect(new_state)
 
     def updatePositions(self):
         """
         Updates the internal `Graphics Edge` positions according to the start and end :class:`~nodeeditor.node_socket.Socket`.
         This should be called if you update ``Edge`` positions.
         """
+        if self.grEdge is None: return
         start_pos = self.start_socket.getSocketPosition()
         start_pos[0] += self.start_socket.node.grNode.pos().x()
         start_pos[1] += self.start_socket.node.grNode.pos().y()
@@ -218,6 +237,7 @@ class AllEdgeFunctions(Serializable):
         else:
             self.grEdge.setDestination(*start_pos)
         self.grEdge.update()
+        self.scene.spatial_index.updateEdge(self)
 
 
     def remove_from_sockets(self):
@@ -250,14 +270,15 @@ class AllEdgeFunctions(Serializable):
 
         # ugly hack, since I noticed that even when you remove grEdge from scene,
         # sometimes it stays there! How dare you Qt!
-        if DEBUG: print(" - hide grEdge")
-        self.grEdge.hide()
+        if self.grEdge is not None:
+            if DEBUG: print(" - hide grEdge")
+            self.grEdge.hide()
 
-        if DEBUG: print(" - remove grEdge", self.grEdge)
-        self.scene.grScene.removeItem(self.grEdge)
-        if DEBUG: print("   grEdge:", self.grEdge)
+            if DEBUG: print(" - remove grEdge", self.grEdge)
+            self.scene.grScene.removeItem(self.grEdge)
+            if DEBUG: print("   grEdge:", self.grEdge)
 
-        self.scene.grScene.update()
+        self.scene.notifier.update()
 
         if DEBUG: print("# Removing Edge", self)
         if DEBUG: print(" - remove edge from all sockets")
@@ -279,9 +300,8 @@ class AllEdgeFunctions(Serializable):
                         # if we requested silence for Socket and it's this one, skip notifications
                         continue
 
-                    # notify Socket's Node
-                    socket.node.onEdgeConnectionChanged(self)
-                    if socket.is_input: socket.node.onInputChanged(socket)
+                    # notify Socket's Node (deferred if we are inside of a scene batch)
+                    self.scene.notifier.collect(socket.node, self, socket)
 
         except Exception as e: dumpException(e)
 
@@ -295,10 +315,16 @@ class AllEdgeFunctions(Serializable):
         ])
 
     def deserialize(self, data:dict, hashmap:dict={}, restore_id:bool=True, *args, **kwargs) -> bool:
-        if restore_id: self.id = data['id']
-        self.start_socket = hashmap[data['start']]
-        self.end_socket = hashmap[data['end']]
-        self.edge_type = data['edge_type']
+        if restore_id: self.scene.reindexEdge(self, data['id'])
+        # reconnect only the sockets which differ and rebuild the path calculator only if the type differs
+        start_socket, end_socket = hashmap[data['start']], hashmap[data['end']]
+        sockets_changed = self.start_socket is not start_socket or self.end_socket is not end_socket
+        if self.start_socket is not start_socket: self.start_socket = start_socket
+        if self.end_socket is not end_socket: self.end_socket = end_socket
+        if self.edge_type != data['edge_type']:
+            self.edge_type = data['edge_type']
+        elif sockets_changed and self.start_socket is not None:
+            self.updatePositions()
 
 
 # Example: using validators for Edge
@@ -6,6 +6,7 @@ it will intersect that edge.
 from PyQt5.QtWidgets import QGraphicsView
 from PyQt5.QtCore import QRectF
 from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+from Nodeeditor.SystemProperties.SceneSpatialIndexFunc import INDEX_EDGES
 
 
 class AllEdgeIntersectFunctions:
@@ -94,6 +95,21 @@ class AllEdgeIntersectFunctions:
         h = node.grNode.height
         return QRectF(x, y, w, h)
 
+    def getIntersectingEdges(self, rect: 'QRectF') -> list:
+        """
+        Returns `Edges` not connected to the dragged `Node` whose shape intersects the rectangle. Candidates come
+        from the spatial index of the `Scene`
+
+        :param rect: `QRectF` for which we want find intersecting `Edges`
+        :type rect: `QRectF`
+        :return: list of :class:`~nodeeditor.node_edge.Edge`
+        :rtype: ``list``
+        """
+        edges = self.grScene.scene.spatial_index.query(INDEX_EDGES, (rect.left(), rect.top(),
+                                                                     rect.right(), rect.bottom()))
+        return [edge for edge in edges if not self.draggedNode.hasConnectedEdge(edge)
+                and edge.grEdge.shape().intersects(rect)]
+
 
     def update(self, scene_pos_x: float, scene_pos_y: float):
         """
@@ -105,13 +121,11 @@ class AllEdgeIntersectFunctions:
         :type scene_pos_y: `float`
         """
         rect = self.hotZoneRect(self.draggedNode)
-        grItems = self.grScene.items(rect)
         for grEdge in self.hoveredList: grEdge.hovered = False
         self.hoveredList = []
-        for grItem in grItems:
-            if hasattr(grItem, 'edge') and not self.draggedNode.hasConnectedEdge(grItem.edge):
-                self.hoveredList.append(grItem)
-                grItem.hovered = True
+        for edge in self.getIntersectingEdges(rect):
+            self.hoveredList.append(edge.grEdge)
+            edge.grEdge.hovered = True
 
     def intersect(self, node_box: 'QRectF') -> 'AllEdgeFunctions':
         """
@@ -123,11 +137,8 @@ class AllEdgeIntersectFunctions:
         :rtype: :class:`~nodeeditor.node_edge.Edge`
         """
         # returns the first edge that intersects with the dropped node, ignores the rest
-        grItems = self.grScene.items(node_box)
-        for grItem in grItems:
-            if hasattr(grItem, 'edge') and not self.draggedNode.hasConnectedEdge(grItem.edge):
-                return grItem.edge
-        return None
+        edges = self.getIntersectingEdges(node_box)
+        return edges[0] if edges else None
 
     def isConnected(self, node: 'Node'):
         """
@@ -113,65 +113,65 @@ class AllEdgeReroutingFunctions:
         """
         self.print("stopRerouting on:", target, "no change" if target==self.start_socket else "")
 
-        if self.start_socket is not None:
-            # reset start socket highlight
-            self.start_socket.grSocket.isHighlighted = False
+        scene = self.grView.grScene.scene
 
-        # collect all affected (node, edge) tuples in the meantime.. if necessary
-        affected_nodes = []
+        # removing the rerouting edges, reconnecting and notifications are stored as a single history stamp
+        with scene.batch("Rerouted edges"):
+            if self.start_socket is not None:
+                # reset start socket highlight
+                self.start_socket.grSocket.isHighlighted = False
 
-        if target is None or target == self.start_socket:
-            # canceling -> no change
-            self.setAffectedEdgesVisible(visibility=True)
+            # collect all affected (node, edge) tuples in the meantime.. if necessary
+            affected_nodes = []
 
-        else:
-            # validate edges before doing anything else
-            valid_edges, invalid_edges = self.getAffectedEdges(), []
-            for edge in self.getAffectedEdges():
-                start_sock = edge.getOtherSocket(self.start_socket)
-                if not edge.validateEdge(start_sock, target):
-                    # not valid edge
-                    self.print("This edge rerouting is not valid!", edge)
-                    invalid_edges.append(edge)
+            if target is None or target == self.start_socket:
+                # canceling -> no change
+                self.setAffectedEdgesVisible(visibility=True)
 
-            # remove the invalidated edges from the list
-            for invalid_edge in invalid_edges:
-                valid_edges.remove(invalid_edge)
+            else:
+                # validate edges before doing anything else
+                valid_edges, invalid_edges = self.getAffectedEdges(), []
+                for edge in self.getAffectedEdges():
+                    start_sock = edge.getOtherSocket(self.start_socket)
+                    if not edge.validateEdge(start_sock, target):
+                        # not valid edge
+                        self.print("This edge rerouting is not valid!", edge)
+                        invalid_edges.append(edge)
 
-            # reconnect to new socket
-            self.print("should reconnect from:", self.start_socket, "-->", target)
+                # remove the invalidated edges from the list
+                for invalid_edge in invalid_edges:
+                    valid_edges.remove(invalid_edge)
 
-            self.setAffectedEdgesVisible(visibility=True)
+                # reconnect to new socket
+                self.print("should reconnect from:", self.start_socket, "-->", target)
 
-            for edge in valid_edges:
-                for node in [edge.start_socket.node, edge.end_socket.node]:
-                    if node not in affected_nodes:
-                        affected_nodes.append((node, edge))
+                self.setAffectedEdgesVisible(visibility=True)
 
-                if target.is_input:
-                    target.removeAllEdges(silent=True)
+                for edge in valid_edges:
+                    for node in [edge.start_socket.node, edge.end_socket.node]:
+                        if node not in affected_nodes:
+                            affected_nodes.append((node, edge))
 
-                if edge.end_socket == self.start_socket:
-                    edge.end_socket = target
-                else:
-                    edge.start_socket = target
+                    if target.is_input:
+                        target.removeAllEdges(silent=True)
 
-                edge.updatePositions()
+                    if edge.end_socket == self.start_socket:
+                        edge.end_socket = target
+                    else:
+                        edge.start_socket = target
 
+                    edge.updatePositions()
 
-        # hide rerouting edges
-        self.clearReroutingEdges()
 
-        # Send notifications for all affected nodes
-        for affected_node, edge in affected_nodes:
-            affected_node.onEdgeConnectionChanged(edge)
-            if edge.start_socket in affected_node.inputs:
-                affected_node.onInputChanged(edge.start_socket)
-            if edge.end_socket in affected_node.inputs:
-                affected_node.onInputChanged(edge.end_socket)
+            # hide rerouting edges
+            self.clearReroutingEdges()
 
-        # store history stamp
-        self.start_socket.node.scene.history.storeHistory("Rerouted edges", setModified=True)
+            # Send notifications for all affected nodes, they are dispatched once when the batch is committed
+            for affected_node, edge in affected_nodes:
+                for socket in (edge.start_socket, edge.end_socket):
+                    if socket in affected_node.inputs:
+                        scene.notifier.collect(affected_node, edge, socket)
+                scene.notifier.collect(affected_node, edge)
 
         # reset variables of this rerouting state
         self.resetRerouting()
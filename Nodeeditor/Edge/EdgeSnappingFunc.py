@@ -4,8 +4,9 @@ A module containing the Edge Snapping functions which are used in :class:`~nodee
 """
 
 
-from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtCore import QPointF
 from Nodeeditor.Socket.GraphicalSocket import DrawGraphicalSocket
+from Nodeeditor.SystemProperties.SceneSpatialIndexFunc import INDEX_SOCKETS
 
 
 class AllEdgeSnappingFunctions():
@@ -28,27 +29,12 @@ class AllEdgeSnappingFunctions():
         :type scenepos: ``QPointF``
         :return: grSocket and Scene postion to nearest socket
         """
-        scanrect = QRectF(
-            scenepos.x() - self.edge_snapping_radius, scenepos.y() - self.edge_snapping_radius,
-            self.edge_snapping_radius * 2, self.edge_snapping_radius * 2
-        )
-        items = self.grScene.items(scanrect)
-        items = list(filter(lambda x: isinstance(x, DrawGraphicalSocket), items))
-
-        if len(items) == 0:
+        socket = self.grScene.scene.spatial_index.getNearest(INDEX_SOCKETS, scenepos.x(), scenepos.y(),
+                                                             self.edge_snapping_radius)
+        if socket is None:
             return None, scenepos
 
-        selected_item = items[0]
-        if len(items) > 1:
-            # calculate the nearest socket
-            nearest = 10000000000
-            for grsock in items:
-                grsock_scenepos = grsock.socket.node.getSocketScenePosition(grsock.socket)
-                qpdist = QPointF(*grsock_scenepos) - scenepos
-                dist = qpdist.x() * qpdist.x() + qpdist.y() * qpdist.y()
-                if dist < nearest:
-                    nearest, selected_item = dist, grsock
-
+        selected_item = socket.grSocket
         selected_item.isHighlighted = True
 
         calcpos = selected_item.socket.node.getSocketScenePosition(selected_item.socket)
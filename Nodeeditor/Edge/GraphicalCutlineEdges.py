@@ -24,9 +24,24 @@ class DrawGraphicalCutLine(QGraphicsItem):
 
         self.setZValue(2)
 
+    def addPoint(self, point: QPointF):
+        """Append the `Scene` point to the Cutting Line
+
+        :param point: new point
+        :type point: ``QPointF``
+        """
+        self.prepareGeometryChange()
+        self.line_points.append(point)
+
+    def clearPoints(self):
+        """Remove all points of the Cutting Line"""
+        self.prepareGeometryChange()
+        self.line_points = []
+
     def boundingRect(self) -> QRectF:
-        """Defining Qt' bounding rectangle"""
-        return self.shape().boundingRect()
+        """Defining Qt' bounding rectangle, including the width of the pen"""
+        width = self.pen.widthF()
+        return self.shape().boundingRect().adjusted(-width, -width, width, width)
 
     def shape(self) -> QPainterPath:
         """Calculate the QPainterPath object from list of line points
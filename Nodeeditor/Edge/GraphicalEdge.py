@@ -3,12 +3,16 @@
 A module containing the Graphics representation of an Edge
 """
 from PyQt5.QtWidgets import QGraphicsPathItem, QWidget, QGraphicsItem
-from PyQt5.QtGui import QColor, QPen, QPainterPath
-from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtGui import QPainterPath, QPainterPathStroker
+from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF
 from PyQt5 import QtCore,QtGui
 import math
 
 from Nodeeditor.Edge.GraphicalEdgeTypes import GraphicsEdgePathCurve, GraphicsEdgePathDirect, GraphicsEdgePathSquare
+from Nodeeditor.SystemProperties.GraphicalStyle import getColor, getPen, getBrush, isDetailed
+
+EDGE_SHAPE_WIDTH = 10.0     #: width of the stroked shape used for hit-testing and the bounding rectangle
+EDGE_ARROW_SIZE = 6.0       #: half width of the arrow drawn in the middle of the edge
 
 
 class DrawGraphicalEdge(QGraphicsPathItem):
@@ -25,6 +29,8 @@ class DrawGraphicalEdge(QGraphicsPathItem):
             - **edge** - reference to :class:`~nodeeditor.node_edge.Edge`
             - **posSource** - ``[x, y]`` source position in the `Scene`
             - **posDestination** - ``[x, y]`` destination position in the `Scene`
+            - **geometry_valid** - ``False`` if the cached path, shape, bounding rectangle and arrow position have
+              to be computed again before the next use
         """
         super().__init__(parent)
 
@@ -41,6 +47,14 @@ class DrawGraphicalEdge(QGraphicsPathItem):
         self.start_pos = [0, 0]
         self.destination_pos = [200, 100]
 
+        # cached geometry, computed on first use after a change
+        self.geometry_valid = False
+        self._path = QPainterPath()
+        self._shape = QPainterPath()
+        self._bounding_rect = QRectF()
+        self._arrow_center = None
+        self._arrow_tangent = None
+
         self.initiateAssets()
         self.grEdgeProperties()
 
@@ -51,37 +65,36 @@ class DrawGraphicalEdge(QGraphicsPathItem):
         self.setZValue(-1)
 
     def initiateAssets(self):
-        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``"""
-        self.color = QColor("Red")
-        self.pen = QPen(self.color)
-        self.pen.setWidthF(3.0)
-
-        self.color_selected = QColor("#00ff00")
-        self.pen_selected = QPen(self.color_selected)
-        self.pen_selected.setWidthF(3.0)
+        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``, shared by all `Edges` of the same style"""
+        self.color = getColor("Red")
+        self.pen = getPen(self.color, 3.0)
 
-        self.color_hovered = QColor("#00ff00")
-        self.pen_hovered = QPen(self.color_hovered)
-        self.pen_hovered.setWidthF(5.0)
+        self.color_selected = getColor("#00ff00")
+        self.pen_selected = getPen(self.color_selected, 3.0)
 
+        self.color_hovered = getColor("#00ff00")
+        self.pen_hovered = getPen(self.color_hovered, 5.0)
 
-        self.pen_dragging = QPen(self.color)
-        self.pen_dragging.setWidthF(3.0)
-        self.pen_dragging.setStyle(Qt.DashLine)
+        self.pen_dragging = getPen(self.color, 3.0, Qt.DashLine)
 
-        size = 6.0
+        size = EDGE_ARROW_SIZE
         self.arrow = QtGui.QPolygonF()
         self.arrow.append(QtCore.QPointF(-size, size))
         self.arrow.append(QtCore.QPointF(0.0, -size * 1.5))
         self.arrow.append(QtCore.QPointF(size, size))
         self.active = False
         self._highlight = False
-        self.color_arrow = QColor("Black")
+        self.color_arrow = getColor("Black")
+        self.brush_arrow_highlighted = getBrush(self.color_arrow.lighter(150))
+        self.brush_arrow_enabled = getBrush(self.color_arrow.darker(200))
+        self.brush_arrow_disabled = getBrush(self.color_arrow.darker(130))
+        self.pen_arrow = getPen(self.color_arrow, 0.6, cap=Qt.RoundCap, join=Qt.MiterJoin)
 
 
     def createEdgePathCalculator(self):
         """Create instance of :class:`~nodeeditor.node_graphics_edge_path.GraphicsEdgePathBase`"""
         self.pathCalculator = self.determineEdgeTypeClass()(self)
+        self.invalidateGeometry()
         return self.pathCalculator
 
     def determineEdgeTypeClass(self):
@@ -104,9 +117,8 @@ class DrawGraphicalEdge(QGraphicsPathItem):
     def changeColor(self, color):
         """Change color of the edge from string hex value '#00ff00'"""
         # print("^Called change color to:", color.red(), color.green(), color.blue(), "on edge:", self.edge)
-        self.color = QColor(color) if type(color) == str else color
-        self.pen = QPen(self.color)
-        self.pen.setWidthF(3.0)
+        self.color = getColor(color)
+        self.pen = getPen(self.color, 3.0)
 
     def setColorFromSockets(self) -> bool:
         """Change color according to connected sockets. Returns ``True`` if color can be determined"""
@@ -155,6 +167,8 @@ class DrawGraphicalEdge(QGraphicsPathItem):
         :param y: y position
         :type y: ``float``
         """
+        if self.start_pos == [x, y]: return
+        self.invalidateGeometry()
         self.start_pos = [x, y]
 
     def setDestination(self, x:float, y:float):
@@ -165,71 +179,121 @@ class DrawGraphicalEdge(QGraphicsPathItem):
         :param y: y position
         :type y: ``float``
         """
+        if self.destination_pos == [x, y]: return
+        self.invalidateGeometry()
         self.destination_pos = [x, y]
 
+    def invalidateGeometry(self):
+        """Drop the cached geometry. Must be called before the path changes, so the ``QGraphicsScene`` can update
+        its index with the old bounding rectangle"""
+        if not self.geometry_valid: return
+        self.prepareGeometryChange()
+        self.geometry_valid = False
+
+    def updateGeometry(self):
+        """Compute the path, the stroked shape, the bounding rectangle and the arrow position if they are not
+        cached"""
+        if self.geometry_valid: return
+        path = self.calcPath()
+        self._path = path if path is not None else QPainterPath()
+
+        stroker = QPainterPathStroker()
+        stroker.setWidth(EDGE_SHAPE_WIDTH)
+        self._shape = stroker.createStroke(self._path)
+        self._bounding_rect = self._shape.boundingRect()
+
+        self._arrow_center = self._arrow_tangent = None
+        if not self._path.isEmpty():
+            self._arrow_center = self._path.pointAtPercent(0.5)
+            loc_pt = self._path.pointAtPercent(0.49)
+            tgt_pt = self._path.pointAtPercent(0.51)
+            self._arrow_tangent = (tgt_pt.x() - loc_pt.x(), tgt_pt.y() - loc_pt.y(),
+                                   math.hypot(tgt_pt.x() - self._arrow_center.x(), tgt_pt.y() - self._arrow_center.y()))
+            # the arrow is wider than the stroke
+            margin = EDGE_ARROW_SIZE * 1.5
+            self._bounding_rect = self._bounding_rect.united(QRectF(
+                self._arrow_center.x() - margin, self._arrow_center.y() - margin, 2 * margin, 2 * margin))
+
+        self.geometry_valid = True
+
+    def path(self) -> QPainterPath:
+        """Returns cached ``QPainterPath`` of this `Edge`
+
+        :return: path of the edge connecting `source` and `destination`
+        :rtype: ``QPainterPath``
+        """
+        self.updateGeometry()
+        return self._path
+
     def boundingRect(self) -> QRectF:
         """Defining Qt' bounding rectangle"""
-        return self.shape().boundingRect()
+        self.updateGeometry()
+        return self._bounding_rect
 
     def shape(self) -> QPainterPath:
-        """Returns ``QPainterPath`` representation of this `Edge`
+        """Returns stroked ``QPainterPath`` of this `Edge` used for hit-testing
 
         :return: path representation
         :rtype: ``QPainterPath``
         """
-        return self.calcPath()
+        self.updateGeometry()
+        return self._shape
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
         """Qt's overridden method to paint this Graphics Edge. Path calculated
-            in :func:`~nodeeditor.node_graphics_edge.QDMGraphicsEdge.calcPath` method"""
-        self.setPath(self.calcPath())
+            in :func:`~nodeeditor.node_graphics_edge.QDMGraphicsEdge.calcPath` method and cached until
+            the source, destination or edge type changes. Zoomed out edges are straight lines without arrows"""
+        if not isDetailed(painter, QStyleOptionGraphicsItem):
+            if self.edge.end_socket is None:
+                painter.setPen(self.pen_dragging)
+            else:
+                painter.setPen(self.pen if not self.isSelected() else self.pen_selected)
+            painter.drawLine(QLineF(*self.start_pos, *self.destination_pos))
+            return
+
+        path = self.path()
 
         painter.setBrush(Qt.NoBrush)
 
         if self.hovered and self.edge.end_socket is not None:
             painter.setPen(self.pen_hovered)
-            painter.drawPath(self.path())
+            painter.drawPath(path)
 
         if self.edge.end_socket is None:
             painter.setPen(self.pen_dragging)
         else:
             painter.setPen(self.pen if not self.isSelected() else self.pen_selected)
 
-        painter.drawPath(self.path())
+        painter.drawPath(path)
 
         # draw arrow
-        if self.start_pos and self.destination_pos:
-            cen_x = self.path().pointAtPercent(0.5).x()
-            cen_y = self.path().pointAtPercent(0.5).y()
-            loc_pt = self.path().pointAtPercent(0.49)
-            tgt_pt = self.path().pointAtPercent(0.51)
-
-            dist = math.hypot(tgt_pt.x() - cen_x, tgt_pt.y() - cen_y)
+        if self._arrow_center is not None:
+            cen_x = self._arrow_center.x()
+            cen_y = self._arrow_center.y()
+            tangent_x, tangent_y, dist = self._arrow_tangent
             if dist < 0.5:
                 painter.restore()
                 return
 
-            self.color.setAlpha(255)
             if self._highlight:
-                painter.setBrush(QtGui.QBrush(self.color_arrow.lighter(150)))
+                painter.setBrush(self.brush_arrow_highlighted)
             elif self.active or self.isEnabled():
-                painter.setBrush(QtGui.QBrush(self.color_arrow.darker(200)))
+                painter.setBrush(self.brush_arrow_enabled)
             else:
-                painter.setBrush(QtGui.QBrush(self.color_arrow.darker(130)))
+                painter.setBrush(self.brush_arrow_disabled)
 
-            pen_width = 0.6
             if dist < 1.0:
-                pen_width *= (1.0 + dist)
-
-            pen = QtGui.QPen(self.color_arrow, pen_width)
-            pen.setCapStyle(QtCore.Qt.RoundCap)
-            pen.setJoinStyle(QtCore.Qt.MiterJoin)
-            painter.setPen(pen)
+                # rare very short edges, don't fill the shared pens with all the widths
+                pen = QtGui.QPen(self.color_arrow, self.pen_arrow.widthF() * (1.0 + dist))
+                pen.setCapStyle(QtCore.Qt.RoundCap)
+                pen.setJoinStyle(QtCore.Qt.MiterJoin)
+                painter.setPen(pen)
+            else:
+                painter.setPen(self.pen_arrow)
 
             transform = QtGui.QTransform()
             transform.translate(cen_x, cen_y)
-            radians = math.atan2(tgt_pt.y() - loc_pt.y(),
-                                 tgt_pt.x() - loc_pt.x())
+            radians = math.atan2(tangent_y, tangent_x)
             degrees = math.degrees(radians) - 270
             transform.rotate(degrees)
             if dist < 1.0:
@@ -239,6 +303,18 @@ class DrawGraphicalEdge(QGraphicsPathItem):
             # QPaintDevice: Cannot destroy paint device that is being painted.
         painter.restore()
 
+    def hitTest(self, x: float, y: float) -> bool:
+        """Is the `Scene` point on the stroked shape of this Graphics Edge?
+
+        :param x: x position
+        :type x: ``float``
+        :param y: y position
+        :type y: ``float``
+        :return: ``True`` if the point hits this `Graphics Edge`
+        :rtype: ``bool``
+        """
+        return self.shape().contains(QPointF(x, y))
+
     def intersectsWith(self, p1:QPointF, p2:QPointF) -> bool:
         """Does this Graphics Edge intersect with the line between point A and point B ?
 
@@ -251,8 +327,7 @@ class DrawGraphicalEdge(QGraphicsPathItem):
         """
         cut_path = QPainterPath(p1)
         cut_path.lineTo(p2)
-        path = self.calcPath()
-        return cut_path.intersects(path)
+        return cut_path.intersects(self.path())
 
     def calcPath(self) -> QPainterPath:
         """Will handle drawing QPainterPath from Point A to B. Internally there exist self.pathCalculator which
@@ -2,9 +2,9 @@
 """
 A module containing Graphics representation of :class:`~nodeeditor.node_node.Node`
 """
-from PyQt5.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem
-from PyQt5.QtGui import QFont, QColor, QPen, QBrush, QPainterPath
+from PyQt5.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem, QGraphicsProxyWidget
 from PyQt5.QtCore import Qt, QRectF
+from Nodeeditor.SystemProperties.GraphicalStyle import getColor, getPen, getBrush, getFont, getNodePaths, isDetailed
 
 
 class DrawGraphicalNode(QGraphicsItem):
@@ -56,6 +56,7 @@ class DrawGraphicalNode(QGraphicsItem):
         """Set up this ``QGraphicsItem``"""
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setFlag(QGraphicsItem.ItemIsMovable)
+        self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
         self.setAcceptHoverEvents(True)
 
         # init title
@@ -75,24 +76,21 @@ class DrawGraphicalNode(QGraphicsItem):
         self.title_vertical_padding = 4
 
     def classAssets(self):
-        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``"""
-        self.title_color = QColor("#FFFFFF")
-        self.title_font = QFont("Cairo", 10)
+        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``, shared by all `Nodes` of the same style"""
+        self.title_color = getColor("#FFFFFF")
+        self.title_font = getFont("Cairo", 10)
 
-        self.color_default = QColor("#ef974d")
-        self.pen_default = QPen(self.color_default)
-        self.pen_default.setWidthF(2.0)
+        self.color_default = getColor("#ef974d")
+        self.pen_default = getPen(self.color_default, 2.0)
 
-        self.color_selected = QColor("#F87217")
-        self.pen_selected = QPen(self.color_selected)
-        self.pen_selected.setWidthF(2.0)
+        self.color_selected = getColor("#F87217")
+        self.pen_selected = getPen(self.color_selected, 2.0)
 
-        self.color_hovered = QColor("#F87217")
-        self.pen_hovered = QPen(self.color_hovered)
-        self.pen_hovered.setWidthF(3.0)
+        self.color_hovered = getColor("#F87217")
+        self.pen_hovered = getPen(self.color_hovered, 3.0)
 
-        self.brush_title = QBrush(QColor("#131922"))
-        self.brush_background = QBrush(QColor("#1A202C"))
+        self.brush_title = getBrush("#131922")
+        self.brush_background = getBrush("#1A202C")
 
     def onSelected(self):
         """Our event handling when the node was selected"""
@@ -108,6 +106,13 @@ class DrawGraphicalNode(QGraphicsItem):
         self._last_selected_state = new_state
         if new_state: self.onSelected()
 
+    def itemChange(self, change, value):
+        """Overridden Qt's method to keep the spatial index of the `Scene` in sync with the position"""
+        # the sockets don't exist yet while the Node is being constructed, it's indexed after that
+        if change == QGraphicsItem.ItemPositionHasChanged and hasattr(self.node, 'outputs'):
+            self.node.scene.spatial_index.updateNode(self.node)
+        return super().itemChange(change, value)
+
     def mouseMoveEvent(self, event):
         """Overridden event to detect that we moved with this `Node`"""
         super().mouseMoveEvent(event)
@@ -125,6 +130,10 @@ class DrawGraphicalNode(QGraphicsItem):
         # handle when grNode moved
         if self._was_moved:
             self._was_moved = False
+            # all selected nodes were moved together with this one
+            self.node.scene.history.trackNodeChange(self.node)
+            for item in self.node.scene.getSelectedItems():
+                if hasattr(item, 'node'): self.node.scene.history.trackNodeChange(item.node)
             self.node.scene.history.storeHistory("Node moved", setModified=True)
 
             self.node.scene.resetLastSelectedStates()
@@ -167,7 +176,7 @@ class DrawGraphicalNode(QGraphicsItem):
 
     def titleProperties(self):
         """Set up the title Graphics representation: font, color, position, etc."""
-        self.title_item = QGraphicsTextItem(self)
+        self.title_item = DrawGraphicalTitle(self)
         self.title_item.node = self.node
         self.title_item.setDefaultTextColor(self.title_color)
         self.title_item.setFont(self.title_font)
@@ -183,44 +192,55 @@ class DrawGraphicalNode(QGraphicsItem):
             self.content.setGeometry(self.edge_padding, self.title_height + self.edge_padding,
                                  self.width - 2 * self.edge_padding, self.height - 2 * self.edge_padding - self.title_height)
 
-        # get the QGraphicsProxyWidget when inserted into the grScene
-        self.grContent = self.node.scene.grScene.addWidget(self.content)
+        # the QGraphicsProxyWidget is inserted into the grScene together with this Node
+        self.grContent = DrawGraphicalContent(self)
+        self.grContent.setWidget(self.content)
         self.grContent.node = self.node
-        self.grContent.setParentItem(self)
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
-        """Painting the rounded rectanglar `Node`"""
+        """Painting the rounded rectanglar `Node`. The paths are built once per size, see
+        :func:`~nodeeditor.GraphicalStyle.getNodePaths`"""
+        if not isDetailed(painter, QStyleOptionGraphicsItem):
+            # flat rectangle when zoomed out
+            painter.setPen(self.pen_selected if self.isSelected() else Qt.NoPen)
+            painter.setBrush(self.brush_background)
+            painter.drawRect(self.boundingRect())
+            return
+
+        path_title, path_content, path_outline = getNodePaths(self.width, self.height, self.title_height,
+                                                              self.edge_roundness)
         # title
-        path_title = QPainterPath()
-        path_title.setFillRule(Qt.WindingFill)
-        path_title.addRoundedRect(0, 0, self.width, self.title_height, self.edge_roundness, self.edge_roundness)
-        path_title.addRect(0, self.title_height - self.edge_roundness, self.edge_roundness, self.edge_roundness)
-        path_title.addRect(self.width - self.edge_roundness, self.title_height - self.edge_roundness, self.edge_roundness, self.edge_roundness)
         painter.setPen(Qt.NoPen)
         painter.setBrush(self.brush_title)
-        painter.drawPath(path_title.simplified())
-
+        painter.drawPath(path_title)
 
         # content
-        path_content = QPainterPath()
-        path_content.setFillRule(Qt.WindingFill)
-        path_content.addRoundedRect(0, self.title_height, self.width, self.height - self.title_height, self.edge_roundness, self.edge_roundness)
-        path_content.addRect(0, self.title_height, self.edge_roundness, self.edge_roundness)
-        path_content.addRect(self.width - self.edge_roundness, self.title_height, self.edge_roundness, self.edge_roundness)
-        painter.setPen(Qt.NoPen)
         painter.setBrush(self.brush_background)
-        painter.drawPath(path_content.simplified())
-
+        painter.drawPath(path_content)
 
         # outline
-        path_outline = QPainterPath()
-        path_outline.addRoundedRect(-1, -1, self.width+2, self.height+2, self.edge_roundness, self.edge_roundness)
         painter.setBrush(Qt.NoBrush)
         if self.hovered:
             painter.setPen(self.pen_hovered)
-            painter.drawPath(path_outline.simplified())
+            painter.drawPath(path_outline)
             painter.setPen(self.pen_default)
-            painter.drawPath(path_outline.simplified())
+            painter.drawPath(path_outline)
         else:
             painter.setPen(self.pen_default if not self.isSelected() else self.pen_selected)
-            painter.drawPath(path_outline.simplified())
\ No newline at end of file
+            painter.drawPath(path_outline)
+
+
+class DrawGraphicalTitle(QGraphicsTextItem):
+    """Title of the `Graphics Node`, not drawn when the `View` painting it is zoomed out"""
+    def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
+        """Painting the text only when it is legible, each `View` decides by its own zoom"""
+        if not isDetailed(painter, QStyleOptionGraphicsItem): return
+        super().paint(painter, QStyleOptionGraphicsItem, widget)
+
+
+class DrawGraphicalContent(QGraphicsProxyWidget):
+    """``QGraphicsProxyWidget`` of the `Node Content`, not drawn when the `View` painting it is zoomed out"""
+    def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
+        """Painting the widgets only when they are legible, each `View` decides by its own zoom"""
+        if not isDetailed(painter, QStyleOptionGraphicsItem): return
+        super().paint(painter, QStyleOptionGraphicsItem, widget)
@@ -3,11 +3,15 @@
 A module containing NodeEditor's class for representing `Node`.
 """
 from collections import OrderedDict
-from Nodeeditor.Node.GraphicalNode import DrawGraphicalNode
-from Nodeeditor.Node.ContentWidgetFunc import AllContentWidgetFunctions
-from Nodeeditor.SystemProperties.SerializationFunc import Serializable
+from Nodeeditor.SystemProperties.SerializationFunc import Serializable, getSerializedDataHash
 from Nodeeditor.Socket.SocketFunc import AllSocketFunctions, LEFT_BOTTOM, LEFT_CENTER, LEFT_TOP, RIGHT_BOTTOM, RIGHT_CENTER, RIGHT_TOP
-from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+from Nodeeditor.SystemProperties.utils_no_qt import dumpException, HeadlessPoint
+try:
+    from Nodeeditor.Node.GraphicalNode import DrawGraphicalNode
+    from Nodeeditor.Node.ContentWidgetFunc import AllContentWidgetFunctions
+except ImportError:
+    # PyQt5 is not available, only headless Scenes can be used
+    DrawGraphicalNode, AllContentWidgetFunctions = None, None
 
 DEBUG = False
 
@@ -19,6 +23,8 @@ class AllNodeFunctions(Serializable):
     GraphicsNode_class = DrawGraphicalNode
     NodeContent_class = AllContentWidgetFunctions
     Socket_class = AllSocketFunctions
+    #: seconds ``async def eval`` may take before the `Node` becomes `Invalid`, ``None`` waits forever
+    eval_timeout = None
 
     def __init__(self, scene: 'Scene', title: str = "Undefined Node", inputs: list = [], outputs: list = []):
         """
@@ -37,6 +43,9 @@ class AllNodeFunctions(Serializable):
             - **content** - Instance of :class:`~nodeeditor.node_graphics_content.QDMGraphicsContent` which is child of ``QWidget`` representing container for all inner widgets inside of the Node. Automatically created in the constructor
             - **inputs** - list containin Input :class:`~nodeeditor.node_socket.Socket` instances
             - **outputs** - list containin Output :class:`~nodeeditor.node_socket.Socket` instances
+            - **headless_pos** - ``[x, y]`` position of the `Node` used while the `Scene` is headless
+            - **headless_content** - serialized content of the `Node` kept while the `Scene` is headless
+            - **content_hash** - cached hash of the serialized content or ``None``, see :func:`getContentHash`
 
         """
         super().__init__()
@@ -47,18 +56,24 @@ class AllNodeFunctions(Serializable):
         self.content = None
         self.grNode = None
 
+        # model-side state used when there are no graphics
+        self.headless_pos = [0.0, 0.0]
+        self.headless_content = {}
+        self.content_hash = None
+
         self.getInnerClasses()
         self.initSettings()
 
         self.title = title
 
         self.scene.addNode(self)
-        self.scene.grScene.addItem(self.grNode)
+        if self.grNode is not None: self.scene.grScene.addItem(self.grNode)
 
         # create socket for inputs and outputs
         self.inputs = []
         self.outputs = []
         self.initSockets(inputs, outputs)
+        self.scene.spatial_index.updateNode(self)
 
         # dirty and evaluation
         self.is_dirty_ = False
@@ -68,7 +83,7 @@ class AllNodeFunctions(Serializable):
         return "<%s:%s %s..%s>" % (self.title, self.__class__.__name__, hex(id(self))[2:5], hex(id(self))[-3:])
 
     def setpos(self, x, y):
-        self.grNode.setPos(x, y)
+        self.setPos(x, y)
 
     @property
     def title(self):
@@ -84,7 +99,10 @@ class AllNodeFunctions(Serializable):
     @title.setter
     def title(self, value):
         self.new_title = value
-        self.grNode.title = self.new_title
+        if self.grNode is not None: self.grNode.title = self.new_title
+        self.scene.history.trackNodeChange(self)
+        # the title chooses the operation of the node
+        self.scene.evaluator.invalidateStructure()
 
     @property
     def pos(self):
@@ -94,6 +112,7 @@ class AllNodeFunctions(Serializable):
         :return: Node position
         :rtype: ``QPointF``
         """
+        if self.grNode is None: return HeadlessPoint(*self.headless_pos)
         return self.grNode.pos()  # QPointF
 
     def setPos(self, x: float, y: float):
@@ -103,10 +122,13 @@ class AllNodeFunctions(Serializable):
         :param x: X `Scene` position
         :param y: Y `Scene` position
         """
-        self.grNode.setPos(x, y)
+        if self.grNode is not None: self.grNode.setPos(x, y)
+        else: self.headless_pos = [x, y]
+        self.scene.history.trackNodeChange(self)
 
     def getInnerClasses(self):
-        """Sets up graphics Node (PyQt) and Content Widget"""
+        """Sets up graphics Node (PyQt) and Content Widget. Nothing is created for a headless `Scene`"""
+        if self.scene.isHeadless(): return
         node_content_class = self.getNodeContentClass()
         graphics_node_class = self.getGraphicsNodeClass()
         if node_content_class is not None: self.content = node_content_class(self)
@@ -119,6 +141,21 @@ class AllNodeFunctions(Serializable):
     def getGraphicsNodeClass(self):
         return self.__class__.GraphicsNode_class
 
+    def createGraphics(self):
+        """Create Graphics Node, Content Widget and Graphics Sockets of a headless `Node`, when graphics are attached
+        to its `Scene`"""
+        if self.grNode is not None: return
+        self.getInnerClasses()
+        if self.grNode is None: return
+
+        self.grNode.setPos(*self.headless_pos)
+        self.scene.grScene.addItem(self.grNode)
+        for socket in (self.inputs + self.outputs): socket.createGraphics()
+        self.scene.spatial_index.updateNode(self)
+
+        if isinstance(self.content, Serializable): self.content.deserialize(self.headless_content, {})
+        self.headless_content = {}
+
     def initSettings(self):
         """Initialize properties and socket information"""
         self.socket_spacing = 22
@@ -156,10 +193,13 @@ class AllNodeFunctions(Serializable):
             if hasattr(self, 'inputs') and hasattr(self, 'outputs'):
                 # remove grSockets from scene
                 for socket in (self.inputs + self.outputs):
-                    self.scene.grScene.removeItem(socket.grSocket)
+                    if socket.grSocket is not None: self.scene.grScene.removeItem(socket.grSocket)
+                    self.scene.removeSocket(socket)
                 self.inputs = []
                 self.outputs = []
 
+        self.scene.history.trackNodeChange(self)
+
         # create new sockets
         counter = 0
         for item in inputs:
@@ -215,11 +255,11 @@ class AllNodeFunctions(Serializable):
         :param new_state: ``True`` if you want to select the `Node`. ``False`` if you want to deselect the `Node`
         :type new_state: ``bool``
         """
-        self.grNode.doSelect(new_state)
+        if self.grNode is not None: self.grNode.doSelect(new_state)
 
     def isSelected(self):
         """Returns ``True`` if current `Node` is selected"""
-        return self.grNode.isSelected()
+        return self.grNode is not None and self.grNode.isSelected()
 
     def hasConnectedEdge(self, edge: 'Edge'):
         """Returns ``True`` if edge is connected to any :class:`~nodeeditor.node_socket.Socket` of this `Node`"""
@@ -279,7 +319,7 @@ class AllNodeFunctions(Serializable):
         :param socket: `Socket` which position we want to know
         :return: (x, y) Socket's scene position
         """
-        node_pos = self.grNode.pos()
+        node_pos = self.pos
         socket_pos = self.getSocketPosition(socket.index, socket.position, socket.count_on_this_node_side)
         return (node_pos.x() + socket_pos[0], node_pos.y() + socket_pos[1])
 
@@ -296,13 +336,15 @@ class AllNodeFunctions(Serializable):
         """
         if DEBUG: print("> Removing Node", self)
         if DEBUG: print(" - remove all edges from sockets")
-        for socket in (self.inputs + self.outputs):
-            # if socket.hasEdge():
-            for edge in socket.edges.copy():
-                if DEBUG: print("    - removing from socket:", socket, "edge:", edge)
-                edge.remove()
+        # notify the connected nodes only once after all edges are removed
+        with self.scene.batch():
+            for socket in (self.inputs + self.outputs):
+                # if socket.hasEdge():
+                for edge in socket.edges.copy():
+                    if DEBUG: print("    - removing from socket:", socket, "edge:", edge)
+                    edge.remove()
         if DEBUG: print(" - remove grNode")
-        self.scene.grScene.removeItem(self.grNode)
+        if self.grNode is not None: self.scene.grScene.removeItem(self.grNode)
         self.grNode = None
         if DEBUG: print(" - remove node from the scene")
         self.scene.removeNode(self)
@@ -346,9 +388,8 @@ class AllNodeFunctions(Serializable):
         :param new_value: ``True`` if children and descendants should be `Dirty`. ``False`` if you want to un-dirty children and descendants
         :type new_value: ``bool``
         """
-        for other_node in self.getChildrenNodes():
+        for other_node in self.scene.evaluator.getDescendantNodes(self):
             other_node.markDirty(new_value)
-            other_node.markDescendantsDirty(new_value)
 
     def isInvalid(self) -> bool:
         """Is this node marked as `Invalid`?
@@ -386,20 +427,18 @@ class AllNodeFunctions(Serializable):
         :param new_value: ``True`` if children and descendants should be `Invalid`. ``False`` if you want to make children and descendants valid
         :type new_value: ``bool``
         """
-        for other_node in self.getChildrenNodes():
+        for other_node in self.scene.evaluator.getDescendantNodes(self):
             other_node.markInvalid(new_value)
-            other_node.markDescendantsInvalid(new_value)
 
     def eval(self, index=0):
-        """Evaluate this `Node`. This is supposed to be overridden. See :ref:`evaluation` for more"""
-        self.markDirty(False)
-        self.markInvalid(False)
-        return 0
+        """Evaluate this `Node` from the last values of its inputs. By default the operation is chosen by the `Node`
+        title, see :class:`~nodeeditor.SceneEvaluationFunc.AllSceneEvaluationFunctions`. This can be overridden,
+        also by ``async def eval`` for `Nodes` waiting on I/O, see :class:`~nodeeditor.SceneAsyncFunc.AllSceneAsyncFunctions`"""
+        return self.scene.evaluator.computeNode(self)
 
     def evalChildren(self):
-        """Evaluate all children of this `Node`"""
-        for node in self.getChildrenNodes():
-            node.eval()
+        """Evaluate all `Dirty` `Nodes` of the `Scene`, so the children of this `Node` get their values"""
+        self.scene.evaluator.evaluate()
 
     # traversing nodes functions
 
@@ -513,16 +552,35 @@ class AllNodeFunctions(Serializable):
 
     # serialization functions
 
+    def serializeContent(self) -> dict:
+        """Return serialized content of this `Node`, ``{}`` if the content is not serializable"""
+        return self.content.serialize() if isinstance(self.content, Serializable) else self.headless_content
+
+    def getContentHash(self) -> int:
+        """Return hash of the serialized content, computed again only after :func:`markContentChanged`"""
+        if self.content_hash is None: self.content_hash = getSerializedDataHash(self.serializeContent())
+        return self.content_hash
+
+    def markContentChanged(self):
+        """
+        Forget the hash of the content and mark this `Node` and its descendants `Dirty`. Content widgets call
+        it when their serialized data change
+        """
+        self.content_hash = None
+        self.markDirty()
+        self.markDescendantsDirty()
+
     def serialize(self) -> OrderedDict:
         inputs, outputs = [], []
         for socket in self.inputs: inputs.append(socket.serialize())
         for socket in self.outputs: outputs.append(socket.serialize())
-        ser_content = self.content.serialize() if isinstance(self.content, Serializable) else {}
+        ser_content = self.serializeContent()
+        pos = self.grNode.scenePos() if self.grNode is not None else self.pos
         return OrderedDict([
             ('id', self.id),
             ('title', self.title),
-            ('pos_x', self.grNode.scenePos().x()),
-            ('pos_y', self.grNode.scenePos().y()),
+            ('pos_x', pos.x()),
+            ('pos_y', pos.y()),
             ('inputs', inputs),
             ('outputs', outputs),
             ('content', ser_content),
@@ -530,11 +588,13 @@ class AllNodeFunctions(Serializable):
 
     def deserialize(self, data: dict, hashmap: dict = {}, restore_id: bool = True, *args, **kwargs) -> bool:
         try:
-            if restore_id: self.id = data['id']
+            if restore_id: self.scene.reindexNode(self, data['id'])
             hashmap[data['id']] = self
 
-            self.setPos(data['pos_x'], data['pos_y'])
-            self.title = data['title']
+            # touch only what differs, setting position or title refreshes the graphics
+            pos = self.pos
+            if pos.x() != data['pos_x'] or pos.y() != data['pos_y']: self.setPos(data['pos_x'], data['pos_y'])
+            if self.title != data['title']: self.title = data['title']
 
             data['inputs'].sort(key=lambda socket: socket['index'] + socket['position'] * 10000)
             data['outputs'].sort(key=lambda socket: socket['index'] + socket['position'] * 10000)
@@ -547,13 +607,12 @@ class AllNodeFunctions(Serializable):
             # possible way to do it is reuse existing sockets...
             # dont create new ones if not necessary
 
+            # reuse existing sockets, looked up by their index
+            inputs_by_index = {socket.index: socket for socket in self.inputs}
+            outputs_by_index = {socket.index: socket for socket in self.outputs}
+
             for socket_data in data['inputs']:
-                found = None
-                for socket in self.inputs:
-                    # print("\t", socket, socket.index, "=?", socket_data['index'])
-                    if socket.index == socket_data['index']:
-                        found = socket
-                        break
+                found = inputs_by_index.get(socket_data['index'])
                 if found is None:
                     # print("deserialization of socket data has not found input socket with index:", socket_data['index'])
                     # print("actual socket data:", socket_data)
@@ -567,12 +626,7 @@ class AllNodeFunctions(Serializable):
                 found.deserialize(socket_data, hashmap, restore_id)
 
             for socket_data in data['outputs']:
-                found = None
-                for socket in self.outputs:
-                    # print("\t", socket, socket.index, "=?", socket_data['index'])
-                    if socket.index == socket_data['index']:
-                        found = socket
-                        break
+                found = outputs_by_index.get(socket_data['index'])
                 if found is None:
                     # print("deserialization of socket data has not found output socket with index:", socket_data['index'])
                     # print("actual socket data:", socket_data)
@@ -590,8 +644,11 @@ class AllNodeFunctions(Serializable):
 
         # also deserialize the content of the node
         # so far the rest was ok, now as last step the content...
+        self.content_hash = None
         if isinstance(self.content, Serializable):
             res = self.content.deserialize(data['content'], hashmap)
             return res
+        # without graphics we just keep the content data, so it can be serialized or attached later
+        if self.grNode is None: self.headless_content = data['content']
 
         return True
@@ -3,8 +3,9 @@
 A module containing Graphics representation of a :class:`~nodeeditor.node_socket.Socket`
 """
 from PyQt5.QtWidgets import QGraphicsItem
-from PyQt5.QtGui import QColor, QBrush, QPen
+from PyQt5.QtGui import QColor
 from PyQt5.QtCore import Qt, QRectF
+from Nodeeditor.SystemProperties.GraphicalStyle import getColor, getPen, getBrush, isDetailed
 
 SOCKET_COLORS = [
     QColor("#F87217"),
@@ -37,6 +38,7 @@ class DrawGraphicalSocket(QGraphicsItem):
         self.isHighlighted = False
 
         self.radius = 6
+        self.outline_width = 0
 
         self.classAssets()
 
@@ -47,36 +49,46 @@ class DrawGraphicalSocket(QGraphicsItem):
     def getSocketColor(self, key):
         """Returns the ``QColor`` for this ``key``"""
         if type(key) == int: return SOCKET_COLORS[key]
-        elif type(key) == str: return QColor(key)
+        elif type(key) == str: return getColor(key)
         return Qt.transparent
 
     def changeSocketType(self):
         """Change the Socket Type"""
         self.color_background = self.getSocketColor(self.socket_type)
-        self.brush_background = QBrush(self.color_background)
+        self.brush_background = getBrush(self.color_background)
         # print("Socket changed to:", self._color_background.getRgbF())
         self.update()
 
     def classAssets(self):
-        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``"""
+        """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``, shared by all `Sockets` of the same style"""
 
         # determine socket color
         self.color_background = self.getSocketColor(self.socket_type)
-        self.brush_background = QBrush(self.color_background)
-
+        self.brush_background = getBrush(self.color_background)
 
-        self.outline_color = QColor("#FF000000")
-        self.outline_pen = QPen(self.outline_color)
+        self.outline_color = getColor("#FF000000")
+        # the outline is part of the bounding rectangle, assets may be initialized again
+        self.prepareGeometryChange()
         self.outline_width = 0
-        self.outline_pen.setWidthF(self.outline_width)
+        self.outline_pen = getPen(self.outline_color, self.outline_width)
+
+        self.color_highlight = getColor("#FF37A6FF")
+        self.pen_highlight = getPen(self.color_highlight, 2.0)
 
-        self.color_highlight = QColor("#FF37A6FF")
-        self.pen_highlight = QPen(self.color_highlight)
-        self.pen_highlight.setWidthF(2.0)
 
+    def setRadius(self, radius: float):
+        """Change the radius of the circle
+
+        :param radius: new radius
+        :type radius: ``float``
+        """
+        self.prepareGeometryChange()
+        self.radius = radius
+        if self.socket.node.grNode is not None: self.socket.node.scene.spatial_index.updateSocket(self.socket)
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
-        """Painting a circle"""
+        """Painting a circle, nothing when zoomed out"""
+        if not isDetailed(painter, QStyleOptionGraphicsItem): return
         painter.setBrush(self.brush_background)
         painter.setPen(self.outline_pen if not self.isHighlighted else self.pen_highlight)
         painter.drawEllipse(-self.radius, -self.radius, 2 * self.radius, 2 * self.radius)
@@ -4,7 +4,11 @@ A module containing NodeEditor's class for representing Socket and Socket Positi
 """
 from collections import OrderedDict
 from Nodeeditor.SystemProperties.SerializationFunc import Serializable
-from Nodeeditor.Socket.GraphicalSocket import DrawGraphicalSocket
+try:
+    from Nodeeditor.Socket.GraphicalSocket import DrawGraphicalSocket
+except ImportError:
+    # PyQt5 is not available, only headless Scenes can be used
+    DrawGraphicalSocket = None
 
 
 LEFT_TOP = 1        #:
@@ -44,7 +48,8 @@ class AllSocketFunctions(Serializable):
 
             - **node** - reference to the :class:`~nodeeditor.node_node.Node` containing this `Socket`
             - **edges** - list of `Edges` connected to this `Socket`
-            - **grSocket** - reference to the :class:`~nodeeditor.node_graphics_socket.QDMGraphicsSocket`
+            - **grSocket** - reference to the :class:`~nodeeditor.node_graphics_socket.QDMGraphicsSocket` or ``None``
+              if the `Scene` is headless
             - **position** - Socket position. See :ref:`socket-position-constants`
             - **index** - Current index of this socket in the position
             - **socket_type** - Constant defining type(color) of this socket
@@ -68,21 +73,30 @@ class AllSocketFunctions(Serializable):
         if DEBUG: print("Socket -- creating with", self.index, self.position, "for nodeeditor", self.node)
 
 
-        self.grSocket = self.__class__.Socket_GR_Class(self)
-
-        self.setSocketPosition()
+        self.grSocket = None
+        self.createGraphics()
 
         self.edges = []
 
+        self.node.scene.addSocket(self)
+
     def __str__(self):
         return "<Socket #%d %s %s..%s>" % (
             self.index, "ME" if self.is_multi_edges else "SE", hex(id(self))[2:5], hex(id(self))[-3:]
         )
 
+    def createGraphics(self):
+        """Create Graphics Socket, if the `Node` has its graphics"""
+        if self.grSocket is not None or self.node.grNode is None: return
+        self.grSocket = self.__class__.Socket_GR_Class(self)
+        self.setSocketPosition()
+
     def delete(self):
         """Delete this `Socket` from graphics scene for sure"""
-        self.grSocket.setParentItem(None)
-        self.node.scene.grScene.removeItem(self.grSocket)
+        if self.grSocket is not None:
+            self.grSocket.setParentItem(None)
+            self.node.scene.grScene.removeItem(self.grSocket)
+        self.node.scene.removeSocket(self)
         del self.grSocket
 
     def changeSocketType(self, new_socket_type: int) -> bool:
@@ -96,14 +110,17 @@ class AllSocketFunctions(Serializable):
         """
         if self.socket_type != new_socket_type:
             self.socket_type = new_socket_type
-            self.grSocket.changeSocketType()
+            if self.grSocket is not None: self.grSocket.changeSocketType()
+            self.node.scene.history.trackNodeChange(self.node)
             return True
         return False
 
     def setSocketPosition(self):
         """Helper function to set `Graphics Socket` position. Exact socket position is calculated
         inside :class:`~nodeeditor.node_node.Node`."""
+        if self.grSocket is None: return
         self.grSocket.setPos(*self.node.getSocketPosition(self.index, self.position, self.count_on_this_node_side))
+        self.node.scene.spatial_index.updateSocket(self)
 
     def getSocketPosition(self):
         """
@@ -194,7 +211,7 @@ class AllSocketFunctions(Serializable):
         ])
 
     def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True) -> bool:
-        if restore_id: self.id = data['id']
+        if restore_id: self.node.scene.reindexSocket(self, data['id'])
         self.is_multi_edges = self.determineMultiEdges(data)
         self.changeSocketType(data['socket_type'])
         hashmap[data['id']] = self
@@ -17,6 +17,8 @@ class DrawGraphicalScene(QGraphicsScene):
     itemSelected = pyqtSignal()
     #: pyqtSignal emitted when items are deselected in the `Scene`
     itemsDeselected = pyqtSignal()
+    #: ``QGraphicsScene.ItemIndexMethod`` used by the scene. ``QGraphicsScene.NoIndex`` turns the item index off
+    item_index_method = QGraphicsScene.BspTreeIndex
 
     def __init__(self, scene: 'Scene', parent: QWidget = None):
         """
@@ -29,17 +31,17 @@ class DrawGraphicalScene(QGraphicsScene):
 
         self.scene = scene
 
-        # There is an issue when reconnecting edges -> mouseMove and trying to delete/remove them
-        # the edges stayed in the scene in Qt, however python side was deleted
-        # this caused a lot of troubles...
-        #
-        # I've spend months to find this sh*t!!
+        # Reconnecting edges -> mouseMove and trying to delete/remove them used to leave the edges in the
+        # scene in Qt, however python side was deleted. The BSP index kept the stale bounding rectangles
+        # of items whose geometry changed without prepareGeometryChange():
         #
         # https://bugreports.qt.io/browse/QTBUG-18021
         # https://bugreports.qt.io/browse/QTBUG-50691
-        # Affected versions: 4.7.1, 4.7.2, 4.8.0, 5.5.1, 5.7.0 - LOL!
+        #
+        # Edges, sockets and the cut line announce their geometry changes now, so the index can be used.
+        # See stressItemIndex() for checking it.
 
-        self.setItemIndexMethod(QGraphicsScene.NoIndex)
+        self.setItemIndexMethod(self.item_index_method)
 
         self.classAssets()
 
@@ -68,6 +70,21 @@ class DrawGraphicalScene(QGraphicsScene):
         """Overriden Qt's dragMoveEvent to enable Qt's Drag Events"""
         pass
 
+    def findStaleItems(self) -> list:
+        """Return graphics items the index of this ``QGraphicsScene`` got wrong: items of removed `Nodes` or
+        `Edges` still in the scene and items not found in their own bounding rectangle
+
+        :return: list of stale ``QGraphicsItem``
+        :rtype: ``list``
+        """
+        nodes, edges = set(self.scene.nodes), set(self.scene.edges)
+        stale = [item for item in self.items() if (hasattr(item, 'edge') and item.edge not in edges) or
+                 (hasattr(item, 'node') and item.node not in nodes)]
+
+        for item in [node.grNode for node in nodes] + [edge.grEdge for edge in edges]:
+            if item is not None and item not in self.items(item.sceneBoundingRect()): stale.append(item)
+        return stale
+
     def setGrScene(self, width: int, height: int):
         """Set `width` and `height` of the `Graphics Scene`"""
         self.setSceneRect(-width // 2, -height // 2, width, height)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the shared drawing assets of the graphics items. ``QColor``, ``QPen``, ``QBrush`` and ``QFont``
+objects are created once per distinct style and shared by all `Nodes`, `Edges` and `Sockets` using it (flyweights),
+instead of every item building its own set. The chrome of the `Nodes` (title, content and outline paths) is built
+and simplified once per size and shared as well.
+
+Items must not modify the shared objects, they ask for a new style instead. :func:`clearStyles` drops the cached
+assets, i.e. when the theme changes.
+
+Below `LOD_DETAIL_MIN` the items are drawn simplified (level of detail): `Nodes` as flat rectangles without titles
+and contents, `Edges` as straight lines without arrows, `Sockets` are skipped. The items decide while painting,
+see :func:`isDetailed`, so every `View` of the `Scene` follows its own transformation.
+"""
+from PyQt5.QtGui import QColor, QPen, QBrush, QFont, QPainterPath
+from PyQt5.QtCore import Qt
+
+DEBUG = False
+
+#: level of detail (scale of the `View`) below which the items are drawn simplified
+LOD_DETAIL_MIN = 0.5
+
+_colors = {}
+_pens = {}
+_brushes = {}
+_fonts = {}
+_node_paths = {}
+
+
+def isDetailed(painter: 'QPainter', option: 'QStyleOptionGraphicsItem') -> bool:
+    """Return ``True`` if the item painted by the painter is big enough to be drawn with all details"""
+    return option.levelOfDetailFromTransform(painter.worldTransform()) >= LOD_DETAIL_MIN
+
+
+def getColorKey(color) -> int:
+    """Return ``rgba`` value identifying the color given by ``QColor``, its name or ``Qt.GlobalColor``"""
+    return (color if isinstance(color, QColor) else QColor(color)).rgba()
+
+
+def getColor(color) -> QColor:
+    """
+    Return the shared ``QColor``
+
+    :param color: ``QColor``, its name like '#ef974d' or ``Qt.GlobalColor``
+    :return: shared ``QColor``
+    :rtype: ``QColor``
+    """
+    key = getColorKey(color)
+    if key not in _colors: _colors[key] = QColor(color)
+    return _colors[key]
+
+
+def getPen(color, width: float = 1.0, style=Qt.SolidLine, cap=Qt.SquareCap, join=Qt.BevelJoin) -> QPen:
+    """
+    Return the shared ``QPen``
+
+    :param color: ``QColor``, its name or ``Qt.GlobalColor``
+    :param width: width of the pen
+    :type width: ``float``
+    :param style: ``Qt.PenStyle``
+    :param cap: ``Qt.PenCapStyle``
+    :param join: ``Qt.PenJoinStyle``
+    :return: shared ``QPen``
+    :rtype: ``QPen``
+    """
+    key = (getColorKey(color), width, style, cap, join)
+    if key not in _pens:
+        pen = QPen(getColor(color))
+        pen.setWidthF(width)
+        pen.setStyle(style)
+        pen.setCapStyle(cap)
+        pen.setJoinStyle(join)
+        _pens[key] = pen
+    return _pens[key]
+
+
+def getBrush(color) -> QBrush:
+    """
+    Return the shared solid ``QBrush``
+
+    :param color: ``QColor``, its name or ``Qt.GlobalColor``
+    :return: shared ``QBrush``
+    :rtype: ``QBrush``
+    """
+    key = getColorKey(color)
+    if key not in _brushes: _brushes[key] = QBrush(getColor(color))
+    return _brushes[key]
+
+
+def getFont(family: str, size: int) -> QFont:
+    """
+    Return the shared ``QFont``
+
+    :param family: font family
+    :type family: ``str``
+    :param size: point size
+    :type size: ``int``
+    :return: shared ``QFont``
+    :rtype: ``QFont``
+    """
+    key = (family, size)
+    if key not in _fonts: _fonts[key] = QFont(family, size)
+    return _fonts[key]
+
+
+def getNodePaths(width: float, height: float, title_height: float, roundness: float) -> tuple:
+    """
+    Return the simplified title, content and outline paths of the `Node` chrome of this size
+
+    :param width: width of the `Node`
+    :type width: ``float``
+    :param height: height of the `Node`
+    :type height: ``float``
+    :param title_height: height of the title
+    :type title_height: ``float``
+    :param roundness: radius of the rounded corners
+    :type roundness: ``float``
+    :return: shared ``QPainterPath`` of the title, of the content and of the outline
+    :rtype: ``tuple``
+    """
+    key = (width, height, title_height, roundness)
+    if key in _node_paths: return _node_paths[key]
+
+    # title
+    path_title = QPainterPath()
+    path_title.setFillRule(Qt.WindingFill)
+    path_title.addRoundedRect(0, 0, width, title_height, roundness, roundness)
+    path_title.addRect(0, title_height - roundness, roundness, roundness)
+    path_title.addRect(width - roundness, title_height - roundness, roundness, roundness)
+
+    # content
+    path_content = QPainterPath()
+    path_content.setFillRule(Qt.WindingFill)
+    path_content.addRoundedRect(0, title_height, width, height - title_height, roundness, roundness)
+    path_content.addRect(0, title_height, roundness, roundness)
+    path_content.addRect(width - roundness, title_height, roundness, roundness)
+
+    # outline
+    path_outline = QPainterPath()
+    path_outline.addRoundedRect(-1, -1, width + 2, height + 2, roundness, roundness)
+
+    _node_paths[key] = (path_title.simplified(), path_content.simplified(), path_outline.simplified())
+    if DEBUG: print("STYLE: node paths for", key)
+    return _node_paths[key]
+
+
+def clearStyles():
+    """Drop all shared assets. Items keep the objects they hold until they ask for them again"""
+    for cache in (_colors, _pens, _brushes, _fonts, _node_paths): cache.clear()
@@ -13,6 +13,7 @@ from Nodeeditor.Edge.EdgeReroutingFunc import AllEdgeReroutingFunctions
 from Nodeeditor.Edge.EdgeIntersectFunc import AllEdgeIntersectFunctions
 from Nodeeditor.Edge.EdgeSnappingFunc import AllEdgeSnappingFunctions
 from Nodeeditor.Edge.GraphicalCutlineEdges import DrawGraphicalCutLine
+from Nodeeditor.SystemProperties.SceneSpatialIndexFunc import INDEX_SOCKETS
 from Nodeeditor.SystemProperties.utils_no_qt import dumpException
 
 MODE_NOOP = 1  #: Mode representing ready state
@@ -330,7 +331,7 @@ class DrawGraphicalView(QGraphicsView):
 
             if self.mode == MODE_EDGE_CUT:
                 self.cutIntersectingEdges()
-                self.cutline.line_points = []
+                self.cutline.clearPoints()
                 self.cutline.update()
                 QApplication.setOverrideCursor(Qt.ArrowCursor)
                 self.mode = MODE_NOOP
@@ -401,7 +402,7 @@ class DrawGraphicalView(QGraphicsView):
                 self.rerouting.updateScenePos(scenepos.x(), scenepos.y())
 
             if self.mode == MODE_EDGE_CUT and self.cutline is not None:
-                self.cutline.line_points.append(scenepos)
+                self.cutline.addPoint(scenepos)
                 self.cutline.update()
 
         except Exception as e:
@@ -454,34 +455,31 @@ class DrawGraphicalView(QGraphicsView):
 
     def cutIntersectingEdges(self):
         """Compare which `Edges` intersect with current `Cut line` and delete them safely"""
-        for ix in range(len(self.cutline.line_points) - 1):
-            p1 = self.cutline.line_points[ix]
-            p2 = self.cutline.line_points[ix + 1]
-
-            # @TODO: we could collect all touched nodes, and notify them once after all edges removed
-            # we could cut 3 edges leading to a single nodeeditor this will notify it 3x
-            # maybe we could use some Notifier class with methods collect() and dispatch()
-            for edge in self.grScene.scene.edges.copy():
-                if edge.grEdge.intersectsWith(p1, p2):
-                    edge.remove()
-        self.grScene.scene.history.storeHistory("Delete cutted edges", setModified=True)
+        # the scene batch collects all touched nodes and notifies them once after all edges are removed
+        with self.grScene.scene.batch("Delete cutted edges"):
+            for ix in range(len(self.cutline.line_points) - 1):
+                p1 = self.cutline.line_points[ix]
+                p2 = self.cutline.line_points[ix + 1]
+
+                for edge in self.grScene.scene.edges.copy():
+                    if edge.grEdge.intersectsWith(p1, p2):
+                        edge.remove()
 
     def setSocketHighlights(self, scenepos: QPointF, highlighted: bool = True, radius: float = 50):
         """Set/disable socket highlights in Scene area defined by `scenepos` and `radius`"""
-        scanrect = QRectF(scenepos.x() - radius, scenepos.y() - radius, radius * 2, radius * 2)
-        items = self.grScene.items(scanrect)
-        items = list(filter(lambda x: isinstance(x, DrawGraphicalSocket), items))
+        sockets = self.grScene.scene.spatial_index.queryPoint(INDEX_SOCKETS, scenepos.x(), scenepos.y(), radius)
+        items = [socket.grSocket for socket in sockets]
         for grSocket in items: grSocket.isHighlighted = highlighted
         return items
 
     def deleteSelected(self):
         """Shortcut for safe deleting every object selected in the `Scene`."""
-        for item in self.grScene.selectedItems():
-            if isinstance(item, DrawGraphicalEdge):
-                item.edge.remove()
-            elif hasattr(item, 'node'):
-                item.node.remove()
-        self.grScene.scene.history.storeHistory("Delete selected", setModified=True)
+        with self.grScene.scene.batch("Delete selected"):
+            for item in self.grScene.selectedItems():
+                if isinstance(item, DrawGraphicalEdge):
+                    item.edge.remove()
+                elif hasattr(item, 'node'):
+                    item.node.remove()
 
     def debug_modifiers(self, event):
         """Helper function get string if we hold Ctrl, Shift or Alt modifier keys"""
@@ -498,9 +496,14 @@ class DrawGraphicalView(QGraphicsView):
         :type event: ``QEvent``
         :return: ``QGraphicsItem`` which the mouse event happened or ``None``
         """
-        pos = event.pos()
-        obj = self.itemAt(pos)
-        return obj
+        scenepos = self.mapToScene(event.pos())
+        item = self.grScene.scene.spatial_index.getItemAt(scenepos.x(), scenepos.y())
+
+        # the widgets of the content are not indexed, Qt finds the one under the mouse
+        grContent = getattr(item, 'grContent', None)
+        if grContent is not None and grContent.isVisible() and grContent.sceneBoundingRect().contains(scenepos):
+            return self.itemAt(event.pos())
+        return item
 
     def distanceBetweenClickAndReleaseIsOff(self, event: QMouseEvent) -> bool:
         """ Measures if we are too far from the last Mouse button click scene position.
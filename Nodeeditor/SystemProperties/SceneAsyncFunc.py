@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the asyncio evaluator of the `Scene`. `Nodes` may override ``eval`` by ``async def eval``
+to wait on I/O (files, sockets, subprocesses) without blocking. All ready `Nodes` are started at once, so
+independent I/O-bound `Nodes` overlap. Every async `Node` runs in its own task with its own timeout
+(`eval_timeout` of the `Node`) and can be cancelled on its own.
+
+In the editor the asyncio loop is stepped by a ``QTimer``, so the UI stays responsive while `Nodes` wait.
+
+Example:
+
+.. code-block:: python
+
+    class FileNode(AllNodeFunctions):
+        eval_timeout = 5.0
+
+        async def eval(self):
+            return await readValue(self.path)
+
+    outputs = scene.async_evaluator.evaluate()          # blocking, i.e. headless
+    scene.async_evaluator.start()                       # non-blocking, loop stepped by QTimer
+    outputs = await scene.async_evaluator.evaluateAsync()   # inside of a running loop
+"""
+import asyncio, inspect
+from collections import deque
+from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+try:
+    from PyQt5.QtCore import QTimer
+except ImportError:
+    # PyQt5 is not available, only the blocking evaluate() can be used
+    QTimer = None
+
+DEBUG = False
+
+#: interval in ms in which the ``QTimer`` runs the ready callbacks of the asyncio loop
+ASYNC_POLL_INTERVAL = 5
+
+
+def isAsyncNode(node: 'Node') -> bool:
+    """Return ``True`` if the `Node` overrides ``eval`` by ``async def eval``"""
+    return inspect.iscoroutinefunction(type(node).eval)
+
+
+def isLoopRunning() -> bool:
+    """Return ``True`` if an asyncio loop is running in this thread, so no other loop can be run until complete"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AllSceneAsyncFunctions():
+    """Class contains all the code for evaluating the `Scene` with async `Nodes` on an asyncio loop"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **loop** - asyncio loop of this `Scene`, created when needed
+        - **task** - task of the running evaluation started by :func:`start` or ``None``
+        - **node_tasks** - ``dict`` of async `Node` -> its running task
+        - **timer** - ``QTimer`` stepping the `loop` on the Qt thread or ``None`` for headless `Scenes`
+        """
+        self.scene = scene
+
+        self.loop = None
+        self.task = None
+        self.node_tasks = {}
+
+        self.timer = None
+
+        # listeners
+        self._evaluation_finished_listeners = []
+
+    def addEvaluationFinishedListener(self, callback: 'function'):
+        """
+        Register callback for `Evaluation Finished` event. The callback gets ``dict`` of the `Output Nodes` values
+
+        :param callback: callback function
+        """
+        self._evaluation_finished_listeners.append(callback)
+
+    def getLoop(self) -> 'asyncio.AbstractEventLoop':
+        """Return the asyncio loop of this `Scene`, create it if needed"""
+        if self.loop is None or self.loop.is_closed(): self.loop = asyncio.new_event_loop()
+        return self.loop
+
+    def isRunning(self) -> bool:
+        """Return ``True`` if the evaluation started by :func:`start` hasn't finished yet"""
+        return self.task is not None and not self.task.done()
+
+    def hasAsyncNodes(self) -> bool:
+        """Return ``True`` if some `Node` of the `Scene` has ``async def eval``"""
+        return any(isAsyncNode(node) for node in self.scene.nodes)
+
+    def evaluate(self) -> dict:
+        """
+        Evaluate the `Dirty` `Nodes` and block until all async `Nodes` are done
+
+        :return: values of the `Output Nodes`
+        :rtype: ``dict``
+        :raises: ``RuntimeError`` if called from a running asyncio loop, use :func:`evaluateAsync` there
+        """
+        # checked before the coroutine is created, so it doesn't leak un-awaited
+        if isLoopRunning():
+            raise RuntimeError("Scene with async nodes can't be evaluated by blocking inside of a running asyncio "
+                               "loop, use 'await scene.async_evaluator.evaluateAsync()'")
+        return self.getLoop().run_until_complete(self.evaluateAsync())
+
+    def start(self) -> bool:
+        """
+        Start evaluating without blocking. In the editor the loop is stepped by ``QTimer``, otherwise
+        :func:`processEvents` has to be called
+
+        :return: ``False`` if an evaluation is already running
+        :rtype: ``bool``
+        """
+        if self.isRunning(): return False
+        self.task = self.getLoop().create_task(self.evaluateAsync())
+        if QTimer is not None and not self.scene.isHeadless(): self.startTimer()
+        return True
+
+    def startTimer(self):
+        """Start ``QTimer`` stepping the asyncio loop on the Qt thread"""
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setInterval(ASYNC_POLL_INTERVAL)
+            self.timer.timeout.connect(self.processEvents)
+        self.timer.start()
+
+    def processEvents(self):
+        """Run the callbacks of the asyncio loop which are ready, without waiting"""
+        loop = self.getLoop()
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        # tasks of async nodes started by the scheduler keep the timer running as well
+        if not self.isRunning() and not self.node_tasks and self.timer is not None: self.timer.stop()
+
+    def cancel(self):
+        """Cancel the running evaluation. `Nodes` which haven't finished stay `Dirty`"""
+        for task in list(self.node_tasks.values()): task.cancel()
+        if self.task is not None: self.task.cancel()
+
+    def cancelNode(self, node: 'Node') -> bool:
+        """
+        Cancel the running ``eval`` of the async `Node`. The `Node` becomes `Invalid` and stays `Dirty`,
+        the rest of the `Scene` is evaluated
+
+        :return: ``False`` if the `Node` is not running
+        :rtype: ``bool``
+        """
+        task = self.node_tasks.get(node)
+        if task is None: return False
+        return task.cancel()
+
+    async def evaluateNode(self, node: 'Node'):
+        """
+        Await ``eval`` of the async `Node` within its `eval_timeout`
+
+        :param node: async :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :return: value of the `Node` or ``None`` if it timed out, got cancelled or failed
+        """
+        try:
+            value = await asyncio.wait_for(node.eval(), getattr(node, 'eval_timeout', None))
+        except asyncio.TimeoutError:
+            if DEBUG: print("ASYNC: %s timed out" % node)
+            node.markDirty(False)
+            node.markInvalid()
+            return None
+        except asyncio.CancelledError:
+            if DEBUG: print("ASYNC: %s cancelled" % node)
+            node.markInvalid()
+            return None
+        except Exception as e:
+            dumpException(e)
+            node.markDirty(False)
+            node.markInvalid()
+            return None
+
+        node.markDirty(False)
+        node.markInvalid(False)
+        return value
+
+    async def evaluateAsync(self) -> dict:
+        """
+        Evaluate the `Dirty` `Nodes` on the running loop. Synchronous `Nodes` are evaluated as soon as their inputs
+        are ready, async `Nodes` are started as tasks and awaited together
+
+        :return: values of the `Output Nodes`
+        :rtype: ``dict``
+        """
+        evaluator = self.scene.evaluator
+        to_evaluate = evaluator.getNodesToEvaluate()
+        structure_version = evaluator.structure_version
+
+        scheduled = set(to_evaluate)
+        pending_counts, dependents = {}, {}
+        for node in to_evaluate:
+            input_nodes = set(input_node for input_node in evaluator.getInputNodes(node) if input_node in scheduled)
+            pending_counts[node] = len(input_nodes)
+            for input_node in input_nodes: dependents.setdefault(input_node, []).append(node)
+
+        # nodes stay dirty until they get their value, so a cancelled evaluation can be started over
+        for node in to_evaluate: node.markDirty()
+        ready_nodes = deque(node for node in to_evaluate if pending_counts[node] == 0)
+
+        def applyValue(node, value):
+            evaluator.values[node] = value
+            for dependent in dependents.get(node, []):
+                pending_counts[dependent] -= 1
+                if pending_counts[dependent] == 0: ready_nodes.append(dependent)
+
+        try:
+            while ready_nodes or self.node_tasks:
+                while ready_nodes:
+                    node = ready_nodes.popleft()
+                    if isAsyncNode(node):
+                        self.node_tasks[node] = asyncio.ensure_future(self.evaluateNode(node))
+                    else:
+                        applyValue(node, node.eval())
+                if not self.node_tasks: break
+
+                done, running = await asyncio.wait(list(self.node_tasks.values()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for node, task in list(self.node_tasks.items()):
+                    if task not in done: continue
+                    del self.node_tasks[node]
+                    applyValue(node, task.result())
+
+                # nodes or edges were changed while waiting, start over with the new structure
+                if structure_version != evaluator.structure_version:
+                    if DEBUG: print("ASYNC: structure changed, restarting")
+                    for task in self.node_tasks.values(): task.cancel()
+                    self.node_tasks = {}
+                    return await self.evaluateAsync()
+        finally:
+            for task in self.node_tasks.values(): task.cancel()
+            self.node_tasks = {}
+
+        evaluator.evaluated_count = len(to_evaluate)
+        evaluator.markCyclicNodes()
+
+        outputs = evaluator.getOutputValues()
+        if DEBUG: print("ASYNC: finished", outputs)
+        for callback in self._evaluation_finished_listeners: callback(outputs)
+        return outputs
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the Scene Batch (transaction) functionality. While a batch is open, node notifications,
+graphics scene updates and history stamps are collected and dispatched once when the outermost batch is committed.
+
+Example:
+
+.. code-block:: python
+
+    with scene.batch("Delete selected"):
+        for edge in edges: edge.remove()
+"""
+from collections import OrderedDict
+from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+
+DEBUG = False
+
+
+class AllSceneBatchFunctions():
+    """Class collecting and dispatching notifications of the structural changes done in a `Scene` batch"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **depth** - number of currently open (nested) batches
+        - **collected_nodes** - ``OrderedDict`` of notified `Nodes` with their last changed `Edge` and input `Socket`
+        - **update_requested** - ``True`` if the graphics scene should be updated on dispatch
+        - **history_desc** - description of the History Stamp to store on dispatch or ``None``
+        - **history_set_modified** - ``True`` if the `Scene` should be marked as modified on dispatch
+        """
+        self.scene = scene
+        self.depth = 0
+        self.resetCollected()
+
+    def resetCollected(self):
+        """Forget everything collected in the current batch"""
+        self.collected_nodes = OrderedDict()
+        self.update_requested = False
+        self.history_desc = None
+        self.history_set_modified = False
+
+    def isActive(self) -> bool:
+        """Return ``True`` if a batch is open"""
+        return self.depth > 0
+
+    def begin(self):
+        """Open a (nested) batch"""
+        self.depth += 1
+
+    def commit(self, desc: str = None, setModified: bool = True):
+        """
+        Close a batch. Closing the outermost batch dispatches all collected notifications
+
+        :param desc: description of the History Stamp stored on dispatch. If ``None``, the last history stamp
+            requested inside the batch is stored, if any
+        :type desc: ``str``
+        :param setModified: if ``True`` and `desc` is provided, marks the `Scene` as modified
+        :type setModified: ``bool``
+        """
+        if desc is not None:
+            self.collectHistory(desc, setModified)
+        self.depth -= 1
+        if self.depth == 0:
+            self.dispatch()
+
+    def collect(self, node: 'Node', edge: 'Edge', socket: 'Socket' = None):
+        """
+        Collect notification for the `Node` that its `Edge` connection has changed. Outside of a batch the `Node`
+        is notified immediately
+
+        :param node: :class:`~nodeeditor.node_node.Node` to notify
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param edge: changed :class:`~nodeeditor.node_edge.Edge`
+        :type edge: :class:`~nodeeditor.EdgeFunc.AllEdgeFunctions`
+        :param socket: input :class:`~nodeeditor.node_socket.Socket` of the `Node` which has changed or ``None``
+        :type socket: :class:`~nodeeditor.SocketFunc.AllSocketFunctions`
+        """
+        if not self.isActive():
+            node.onEdgeConnectionChanged(edge)
+            if socket is not None and socket.is_input: node.onInputChanged(socket)
+            return
+
+        if node not in self.collected_nodes:
+            self.collected_nodes[node] = [edge, None]
+        else:
+            self.collected_nodes[node][0] = edge
+        if socket is not None and socket.is_input and self.collected_nodes[node][1] is None:
+            self.collected_nodes[node][1] = socket
+
+    def update(self):
+        """Update the graphics scene, or only request the update when a batch is open"""
+        if self.isActive():
+            self.update_requested = True
+        elif not self.scene.isHeadless():
+            self.scene.grScene.update()
+
+    def collectHistory(self, desc: str, setModified: bool = False):
+        """
+        Request storing History Stamp when the batch is dispatched
+
+        :param desc: Description of the History Stamp
+        :type desc: ``str``
+        :param setModified: if ``True`` marks the `Scene` as modified
+        :type setModified: ``bool``
+        """
+        self.history_desc = desc
+        self.history_set_modified = self.history_set_modified or setModified
+
+    def dispatch(self):
+        """Notify every collected `Node` once, update the graphics scene once and store a single History Stamp"""
+        collected_nodes = self.collected_nodes
+        update_requested = self.update_requested
+        history_desc, history_set_modified = self.history_desc, self.history_set_modified
+        self.resetCollected()
+
+        if DEBUG: print("Batch: dispatching to %d nodes, history:" % len(collected_nodes), history_desc)
+
+        for node, (edge, socket) in collected_nodes.items():
+            # skip nodes which have been removed during the batch
+            if self.scene.getNodeByID(node.id) is not node: continue
+            try:
+                node.onEdgeConnectionChanged(edge)
+                if socket is not None: node.onInputChanged(socket)
+            except Exception as e: dumpException(e)
+
+        if update_requested and not self.scene.isHeadless():
+            self.scene.grScene.update()
+
+        if history_desc is not None:
+            self.scene.history.storeHistory(history_desc, setModified=history_set_modified)
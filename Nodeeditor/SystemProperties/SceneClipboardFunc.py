@@ -3,7 +3,6 @@
 A module containing all code for working with Clipboard
 """
 from collections import OrderedDict
-from Nodeeditor.Edge.GraphicalEdge import DrawGraphicalEdge
 from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
 
 DEBUG = False
@@ -39,12 +38,12 @@ class AllSceneClipboardFunctions():
         selected_nodes, selected_edges, selected_sockets = [], [], {}
 
         # sort edges and nodes
-        for item in self.scene.grScene.selectedItems():
+        for item in self.scene.getSelectedItems():
             if hasattr(item, 'node'):
                 selected_nodes.append(item.node.serialize())
                 for socket in (item.node.inputs + item.node.outputs):
                     selected_sockets[socket.id] = socket
-            elif isinstance(item, DrawGraphicalEdge):
+            elif hasattr(item, 'edge'):
                 selected_edges.append(item.edge)
 
         # debug
@@ -79,9 +78,9 @@ class AllSceneClipboardFunctions():
 
         # if CUT (aka delete) remove selected items
         if delete:
-            self.scene.getView().deleteSelected()
-            # store our history
-            self.scene.history.storeHistory("Cut out elements from scene", setModified=True)
+            # store our history as a single stamp
+            with self.scene.batch("Cut out elements from scene"):
+                self.scene.getView().deleteSelected()
 
         return data
 
@@ -126,40 +125,38 @@ class AllSceneClipboardFunctions():
         # create each node
         created_nodes = []
 
-        self.scene.setSilentSelectionEvents()
+        with self.scene.batch("Pasted elements in scene"):
+            self.scene.setSilentSelectionEvents()
 
-        self.scene.doDeselectItems()
+            self.scene.doDeselectItems()
 
-        for node_data in data['nodes']:
-            new_node = self.scene.getNodeClassFromData(node_data)(self.scene)
-            new_node.deserialize(node_data, hashmap, restore_id=False, *args, **kwargs)
-            created_nodes.append(new_node)
-
-            # readjust the new nodeeditor's position
+            for node_data in data['nodes']:
+                new_node = self.scene.getNodeClassFromData(node_data)(self.scene)
+                new_node.deserialize(node_data, hashmap, restore_id=False, *args, **kwargs)
+                created_nodes.append(new_node)
 
-            # new node's current position
-            posx, posy = new_node.pos.x(), new_node.pos.y()
-            newx, newy = mousex + posx - minx, mousey + posy - miny
+                # readjust the new nodeeditor's position
 
-            new_node.setPos(newx, newy)
+                # new node's current position
+                posx, posy = new_node.pos.x(), new_node.pos.y()
+                newx, newy = mousex + posx - minx, mousey + posy - miny
 
-            new_node.doSelect()
+                new_node.setPos(newx, newy)
 
-            if DEBUG_PASTING:
-                print("** PASTA SUM:")
-                print("\tMouse pos:", mousex, mousey)
-                print("\tnew node pos:", posx, posy)
-                print("\tFINAL:", newx, newy)
+                new_node.doSelect()
 
-        # create each edge
-        if 'edges' in data:
-            for edge_data in data['edges']:
-                new_edge = AllEdgeFunctions(self.scene)
-                new_edge.deserialize(edge_data, hashmap, restore_id=False, *args, **kwargs)
+                if DEBUG_PASTING:
+                    print("** PASTA SUM:")
+                    print("\tMouse pos:", mousex, mousey)
+                    print("\tnew node pos:", posx, posy)
+                    print("\tFINAL:", newx, newy)
 
-        self.scene.setSilentSelectionEvents(False)
+            # create each edge
+            if 'edges' in data:
+                for edge_data in data['edges']:
+                    new_edge = AllEdgeFunctions(self.scene)
+                    new_edge.deserialize(edge_data, hashmap, restore_id=False, *args, **kwargs)
 
-        # store history
-        self.scene.history.storeHistory("Pasted elements in scene", setModified=True)
+            self.scene.setSilentSelectionEvents(False)
 
         return created_nodes
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the graph compiler of the `Scene`. The `Scene` is reduced to the minimal graph by
+:class:`~nodeeditor.SceneOptimizerFunc.AllSceneOptimizerFunctions` and its steps are lowered into the source of
+a single Python function computing all `Output Nodes` from the `Input Nodes`. The function is compiled once and
+reused until the structure of the `Scene` changes.
+
+With the optional numba backend, graphs made only of arithmetic `Nodes` are compiled by ``numba.njit``. The generated
+kernels are written into `NUMBA_CACHE_DIR` under the hash of their source, so numba caches their machine code
+on disk and an unchanged graph is not compiled again in the next session. The directory is private to the user
+(mode 0700) and the kernel executed is always the generated source, never what is found in the file. If the
+directory is not safe, kernels are compiled in memory without the disk cache.
+
+Example:
+
+.. code-block:: python
+
+    outputs = scene.compiler.evaluate({input_node: 3})
+    scene.compiler.setBackend(COMPILER_BACKEND_NUMBA)
+
+    # generated for Input -> Addition(Input, Input) -> Output
+    def compiled_graph(i0=0):
+        v0 = i0
+        v1 = (v0 + v0)
+        return (v1,)
+"""
+import os, sys, stat, types, cmath, hashlib, tempfile
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, isArray
+from Nodeeditor.SystemProperties.SceneOptimizerFunc import AllSceneOptimizerFunctions, STEP_INPUT, STEP_CONSTANT, \
+    STEP_SELECT
+from Nodeeditor.SystemProperties.SceneMemoryPlannerFunc import AllSceneMemoryPlannerFunctions
+try:
+    import numba
+except ImportError:
+    # numba backend falls back to the Python backend
+    numba = None
+try:
+    import numpy as np
+except ImportError:
+    # without NumPy there are no arrays going through the compiled function
+    np = None
+
+DEBUG = False
+
+COMPILER_BACKEND_PYTHON = "python"      #: generated function is compiled by Python
+COMPILER_BACKEND_NUMBA = "numba"        #: generated function is compiled by ``numba.njit`` when possible
+
+#: directory of the generated numba kernels in the cache of the user, numba keeps their compiled code next to them
+NUMBA_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or
+                               os.path.join(os.path.expanduser("~"), ".cache"), "visualscripting", "numba_kernels")
+
+#: header of the numba kernel files
+NUMBA_KERNEL_HEADER = "from numba import njit\n\n\n@njit(cache=True)\n"
+
+#: Python operators the binary operations are lowered to. They dispatch to NumPy ufuncs for arrays as well
+NODE_OPERATORS = {
+    "Addition": "+",
+    "Subtraction": "-",
+    "Multiplication": "*",
+    "Division": "/",
+}
+
+#: name of the generated function
+COMPILED_FUNCTION_NAME = "compiled_graph"
+
+#: types of the constants which are written into the generated source as literals
+LITERAL_TYPES = (bool, int, float, complex)
+
+
+def getNumbaCacheDir() -> str:
+    """
+    Create `NUMBA_CACHE_DIR` readable and writable only by the user. Numba unpickles its cache from there,
+    so the directory must not be writable by anybody else
+
+    :return: the directory or ``None`` if it is owned by another user or writable by others
+    :rtype: ``str``
+    """
+    try:
+        os.makedirs(NUMBA_CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.stat(NUMBA_CACHE_DIR)
+    except OSError as e:
+        if DEBUG: print("COMPILER: numba cache not available:", e)
+        return None
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        if DEBUG: print("COMPILER: numba cache %s is not private, not used" % NUMBA_CACHE_DIR)
+        return None
+    return NUMBA_CACHE_DIR
+
+
+def isLiteral(value) -> bool:
+    """Return ``True`` if the constant can be written into the generated source, others are passed by name"""
+    return value is None or (type(value) in LITERAL_TYPES and cmath.isfinite(value))
+
+
+class AllSceneCompilerFunctions():
+    """Class contains all the code for compiling the `Scene` into a Python function"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **compiled_function** - generated function or ``None`` if the `Scene` hasn't been compiled yet
+        - **source** - Python source of the generated function
+        - **optimizer** - :class:`~nodeeditor.SceneOptimizerFunc.AllSceneOptimizerFunctions` reducing the `Scene`
+          to the minimal graph before it's compiled
+        - **planner** - :class:`~nodeeditor.SceneMemoryPlannerFunc.AllSceneMemoryPlannerFunctions` freeing
+          the intermediate values after their last consumer
+        - **plan** - list of the optimized steps, see `steps` of the optimizer
+        - **input_nodes** - `Input Nodes` in the order of the arguments of the generated function
+        - **output_nodes** - `Output Nodes` in the order of the returned tuple
+        - **output_steps** - index of the step computing each of the `output_nodes` or ``None``
+        - **structure_version** - `structure_version` of the evaluator the `Scene` has been compiled for
+        - **is_compilable** - ``False`` if some `Node` overrides `eval`, so it has to be evaluated by the evaluator
+        - **compile_count** - number of compilations, useful for checking the invalidation
+        - **backend** - `COMPILER_BACKEND_PYTHON` or `COMPILER_BACKEND_NUMBA`
+        - **kernel_hash** - hash of the source of the numba kernel in use or ``None``
+        - **has_array_constants** - ``True`` if some constant input folded into the compiled function is an array
+        """
+        self.scene = scene
+        self.optimizer = AllSceneOptimizerFunctions(self.scene)
+        self.planner = AllSceneMemoryPlannerFunctions(self)
+
+        self.compiled_function = None
+        self.source = None
+        self.plan = []
+        self.input_nodes = []
+        self.output_nodes = []
+        self.output_steps = []
+        self.structure_version = None
+        self.is_compilable = True
+        self.compile_count = 0
+
+        self.backend = COMPILER_BACKEND_PYTHON
+        self.kernel_hash = None
+        self.has_array_constants = False
+
+    def isCompiled(self) -> bool:
+        """Return ``True`` if the compiled function matches the current structure of the `Scene`"""
+        return self.structure_version is not None and self.structure_version == self.scene.evaluator.structure_version
+
+    def invalidate(self):
+        """Forget the compiled function, it will be compiled again when needed"""
+        self.structure_version = None
+
+    def setBackend(self, backend: str):
+        """
+        Choose the backend compiling the generated function. The `Scene` is compiled again when needed
+
+        :param backend: `COMPILER_BACKEND_PYTHON` or `COMPILER_BACKEND_NUMBA`
+        :type backend: ``str``
+        """
+        self.backend = backend
+        self.invalidate()
+
+    def getCompiledFunction(self) -> 'function':
+        """Return the generated function, compile the `Scene` if its structure has changed
+
+        :return: function taking values of the `input_nodes` and returning tuple of values of the `output_nodes`
+            or ``None`` if the `Scene` is not compilable
+        """
+        if not self.isCompiled(): self.compile()
+        return self.compiled_function
+
+    def buildPlan(self):
+        """Run the optimizer and take over the minimal list of steps it produced"""
+        optimizer = self.optimizer
+        optimizer.optimize()
+        self.plan = optimizer.steps
+        self.input_nodes, self.output_nodes = optimizer.input_nodes, optimizer.output_nodes
+        self.output_steps = optimizer.output_steps
+        self.is_compilable = optimizer.is_compilable
+
+    def generateSource(self, use_slots: bool = True, none_values: bool = True) -> (str, dict):
+        """
+        Generate Python source of the function computing the `Output Nodes` from the `Input Nodes`
+
+        :param use_slots: ``True`` stores the steps in the slots of the planner, so dead intermediates are freed
+            when their slot is overwritten. ``False`` gives every step its own variable, which keeps their types
+            apart for numba
+        :type use_slots: ``bool``
+        :param none_values: ``False`` if no step can be ``None``, so `Output Nodes` pass their first input. Numba
+            would unify the types of the values an `Output Node` selects from, i.e. return int as float
+        :type none_values: ``bool``
+        :return: source code and ``dict`` of the names of the non-scalar constants -> their values
+        :rtype: ``tuple``
+        """
+        variable = self.planner.getSlotName if use_slots else lambda index: "v%d" % index
+        arguments = ["i%d=0" % index for index in range(len(self.input_nodes))]
+        input_arguments = {node: "i%d" % index for index, node in enumerate(self.input_nodes)}
+        lines = ["def %s(%s):" % (COMPILED_FUNCTION_NAME, ", ".join(arguments))]
+
+        constants = {}
+        for index, (kind, payload, input_steps) in enumerate(self.plan):
+            if kind == STEP_INPUT:
+                expression = input_arguments[payload]
+            elif kind == STEP_CONSTANT and isLiteral(payload):
+                expression = repr(payload)
+            elif kind == STEP_CONSTANT:
+                expression = "c%d" % len(constants)
+                constants[expression] = payload
+            elif kind == STEP_SELECT and not none_values:
+                expression = variable(input_steps[0])
+            elif kind == STEP_SELECT:
+                expression = variable(input_steps[-1])
+                for input_index in reversed(input_steps[:-1]):
+                    expression = "(%s if %s is not None else %s)" % (variable(input_index), variable(input_index),
+                                                                    expression)
+            else:
+                expression = "(%s %s %s)" % (variable(input_steps[0]), NODE_OPERATORS[payload], variable(input_steps[1]))
+            lines.append("    %s = %s" % (variable(index), expression))
+
+        outputs = [variable(index) if index is not None else "None" for index in self.output_steps]
+        lines.append("    return (%s)" % "".join(output + ", " for output in outputs).rstrip())
+        return "\n".join(lines) + "\n", constants
+
+    def compile(self) -> 'function':
+        """
+        Compile the current structure of the `Scene`
+
+        :return: generated function or ``None`` if some `Node` overrides `eval`
+        """
+        self.buildPlan()
+        self.compile_count += 1
+        self.structure_version = self.scene.evaluator.structure_version
+
+        if not self.is_compilable:
+            self.compiled_function, self.source = None, None
+            return None
+
+        self.planner.plan()
+        use_numba = self.backend == COMPILER_BACKEND_NUMBA and self.isNumbaCompatible()
+        self.source, constants = self.generateSource(use_slots=not use_numba, none_values=not use_numba)
+        if DEBUG: print("COMPILER: generated\n" + self.source)
+        self.has_array_constants = any(isArray(payload) for kind, payload, input_steps in self.plan
+                                       if kind == STEP_CONSTANT)
+
+        self.kernel_hash = None
+        if use_numba:
+            self.compiled_function = self.compileNumbaKernel(self.source)
+            return self.compiled_function
+
+        namespace = dict(constants)
+        exec(compile(self.source, "<%s>" % COMPILED_FUNCTION_NAME, "exec"), namespace)
+        self.compiled_function = namespace[COMPILED_FUNCTION_NAME]
+        return self.compiled_function
+
+    def isNumbaCompatible(self) -> bool:
+        """Return ``True`` if numba is available, all outputs are computed from valid steps, so the kernel
+        doesn't have to return ``None``, and all constants can be written as literals. Failing operations raise
+        in the kernel, so no step of the kernel is ``None``"""
+        if numba is None: return False
+        if any(index is None for index in self.output_steps): return False
+        return all(isLiteral(payload) and payload is not None
+                   for kind, payload, input_steps in self.plan if kind == STEP_CONSTANT)
+
+    def compileNumbaKernel(self, source: str) -> 'function':
+        """
+        Compile the source as numba kernel. The kernel is written into `NUMBA_CACHE_DIR` named by the hash
+        of the source, so the same graph structure always reuses the machine code cached on disk. The file is only
+        a key of the cache, the generated source is executed
+
+        :param source: generated Python source
+        :type source: ``str``
+        :return: ``numba`` dispatcher of the kernel
+        """
+        kernel_source = NUMBA_KERNEL_HEADER + source
+        self.kernel_hash = hashlib.sha256(kernel_source.encode('utf-8')).hexdigest()
+        module_name = "%s_%s" % (COMPILED_FUNCTION_NAME, self.kernel_hash)
+        if module_name in sys.modules:
+            return getattr(sys.modules[module_name], COMPILED_FUNCTION_NAME)
+
+        directory = getNumbaCacheDir()
+        if directory is None:
+            namespace = {}
+            exec(compile(source, "<%s>" % COMPILED_FUNCTION_NAME, "exec"), namespace)
+            return numba.njit(namespace[COMPILED_FUNCTION_NAME])
+
+        filename = os.path.join(directory, module_name + ".py")
+        if self.readKernelFile(filename) != kernel_source:
+            # written into a new private file first, so a parallel process never sees a half-written kernel
+            file_descriptor, temp_filename = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                file.write(kernel_source)
+            os.replace(temp_filename, filename)
+        if DEBUG: print("COMPILER: numba kernel", filename)
+
+        module = types.ModuleType(module_name)
+        module.__file__ = filename
+        exec(compile(kernel_source, filename, "exec"), module.__dict__)
+        sys.modules[module_name] = module
+        return getattr(module, COMPILED_FUNCTION_NAME)
+
+    def readKernelFile(self, filename: str) -> str:
+        """Return content of the kernel file or ``None`` if it doesn't exist or can't be read"""
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                return file.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def getArguments(self, input_values: dict = None) -> list:
+        """
+        Return arguments of the generated function
+
+        :param input_values: ``dict`` of `Input Node` (or its `id`) -> value. Missing `Input Nodes` get their value
+            from the evaluator
+        :type input_values: ``dict``
+        :rtype: ``list``
+        """
+        evaluator = self.scene.evaluator
+        values = {evaluator.getInputNode(key): value for key, value in (input_values or {}).items()}
+        return [values[node] if node in values else evaluator.input_values.get(node, 0) for node in self.input_nodes]
+
+    def evaluate(self, input_values: dict = None) -> dict:
+        """
+        Compute the `Output Nodes` by the compiled function. If the fused function fails (i.e. division by zero),
+        the `Nodes` are computed one by one, so just the failing branch becomes ``None`` like in the evaluator
+
+        :param input_values: ``dict`` of `Input Node` (or its `id`) -> value
+        :type input_values: ``dict``
+        :return: ``dict`` of `Output Node` `id` -> value
+        :rtype: ``dict``
+        """
+        function = self.getCompiledFunction()
+        if function is None:
+            # nodes with their own eval can be evaluated only by the evaluator
+            for key, value in (input_values or {}).items():
+                self.scene.evaluator.setInputValue(self.scene.evaluator.getInputNode(key), value)
+            return self.scene.evaluator.evaluate()
+
+        arguments = self.getArguments(input_values)
+        has_arrays = self.has_array_constants or any(isArray(argument) for argument in arguments)
+        if self.planner.enabled and has_arrays:
+            # arrays are computed into recycled buffers
+            results = self.planner.run(dict(zip(self.input_nodes, arguments)))
+            return {node.id: value for node, value in zip(self.output_nodes, results)}
+
+        try:
+            if has_arrays:
+                # element-wise division by zero gives inf/nan like in the evaluator
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    results = function(*arguments)
+            else:
+                results = function(*arguments)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            if DEBUG: print("COMPILER: fused function failed, interpreting:", e)
+            results = self.evaluateInterpreted(arguments)
+        return {node.id: value for node, value in zip(self.output_nodes, results)}
+
+    def evaluateInterpreted(self, arguments: list) -> tuple:
+        """
+        Compute the `plan` step by step, failing steps give ``None``
+
+        :param arguments: values of the `input_nodes`
+        :type arguments: ``list``
+        :return: values of the `output_nodes`
+        :rtype: ``tuple``
+        """
+        input_arguments = dict(zip(self.input_nodes, arguments))
+        values = []
+        for kind, payload, input_steps in self.plan:
+            if kind == STEP_INPUT:
+                values.append(input_arguments[payload])
+            elif kind == STEP_CONSTANT:
+                values.append(payload)
+            elif kind == STEP_SELECT:
+                values.append(next((values[index] for index in input_steps if values[index] is not None), None))
+            else:
+                try:
+                    values.append(computeOperation(payload, [values[index] for index in input_steps]))
+                except (ValueError, TypeError, ArithmeticError):
+                    values.append(None)
+
+        return tuple(values[index] if index is not None else None for index in self.output_steps)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the memoization cache of the evaluated `Node` values used by
+:class:`~nodeeditor.SceneEvaluationFunc.AllSceneEvaluationFunctions`. Values are keyed by the `Node` operation,
+the hash of its content and the values of its inputs, so a `Node` whose inputs didn't change is not computed again.
+Values computed from arrays are not cached.
+The least recently used values are evicted when the cache exceeds its entry count or byte budget.
+"""
+import sys
+from collections import OrderedDict
+
+DEBUG = False
+
+#: default maximum number of values kept in the cache
+CACHE_MAX_ENTRIES = 4096
+#: default maximum number of bytes held by the cached values
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def getValueKey(value) -> tuple:
+    """
+    Return hashable key describing the value of an input. Unhashable values (i.e. NumPy arrays) are not keyed,
+    hashing their content costs more than computing the operation and they can be changed in place
+
+    :param value: input value
+    :return: hashable key, including the type name so ``1`` and ``1.0`` are different keys, or ``None``
+    :rtype: ``tuple``
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (type(value).__name__, value)
+
+
+def getValueSize(value) -> int:
+    """Return approximate number of bytes held by the value"""
+    return getattr(value, 'nbytes', None) or sys.getsizeof(value)
+
+
+class AllSceneEvaluationCacheFunctions():
+    """Class representing LRU cache of the evaluated `Node` values bounded by entry count and bytes"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        """
+        :param max_entries: maximum number of cached values
+        :type max_entries: ``int``
+        :param max_bytes: maximum number of bytes held by the cached values
+        :type max_bytes: ``int``
+
+        :Instance Attributes:
+
+        - **max_entries** - maximum number of cached values
+        - **max_bytes** - maximum number of bytes held by the cached values
+        - **entries** - ``OrderedDict`` of key -> ``(value, size)``, the most recently used at the end
+        - **total_bytes** - number of bytes held by the cached values
+        - **hits** - number of successful lookups
+        - **misses** - number of failed lookups
+        - **evictions** - number of evicted values
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        """Remove all cached values and reset the counters"""
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def setLimits(self, max_entries: int = None, max_bytes: int = None):
+        """
+        Change the limits of the cache and evict the values which don't fit anymore
+
+        :param max_entries: maximum number of cached values or ``None`` to keep the current limit
+        :type max_entries: ``int``
+        :param max_bytes: maximum number of bytes held by the cached values or ``None`` to keep the current limit
+        :type max_bytes: ``int``
+        """
+        if max_entries is not None: self.max_entries = max_entries
+        if max_bytes is not None: self.max_bytes = max_bytes
+        self.evictOverBudget()
+
+    def lookup(self, key: tuple) -> (bool, object):
+        """
+        Find the cached value and mark it as the most recently used
+
+        :param key: cache key, see :func:`~nodeeditor.SceneEvaluationFunc.AllSceneEvaluationFunctions.getCacheKey`
+        :type key: ``tuple``
+        :return: ``(True, value)`` if the value is cached, otherwise ``(False, None)``
+        :rtype: ``tuple``
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def store(self, key: tuple, value):
+        """
+        Store the value and evict the least recently used values if the cache is over its limits
+
+        :param key: cache key
+        :type key: ``tuple``
+        :param value: evaluated value
+        """
+        size = getValueSize(value)
+        if key in self.entries: self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+        self.evictOverBudget()
+
+    def evictOverBudget(self):
+        """Evict the least recently used values until the cache fits into its limits"""
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            key, (value, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            if DEBUG: print("CACHE: evicted", key)
+
+    def getStats(self) -> dict:
+        """
+        Return statistics of this cache
+
+        :return: ``dict`` with 'entries', 'bytes', 'hits', 'misses' and 'evictions'
+        :rtype: ``dict``
+        """
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
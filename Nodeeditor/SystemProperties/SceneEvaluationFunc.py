@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the evaluation engine of the `Scene`. `Nodes` are evaluated in a cached topological order,
+each `Dirty` `Node` exactly once per pass. Dirtiness is propagated to descendants iteratively, visited `Nodes`
+are recognized by generation counters, so diamond-shaped graphs and deep chains are traversed in linear time.
+
+Example:
+
+.. code-block:: python
+
+    scene.evaluator.setInputValue(input_node, 3)
+    outputs = scene.evaluator.evaluate()
+
+    # the whole column goes through the graph in one pass
+    outputs = scene.evaluator.evaluateBatch({input_node: [1, 2, 3]})
+"""
+import operator
+try:
+    import numpy as np
+except ImportError:
+    # without NumPy the nodes compute plain Python scalars
+    np = None
+from Nodeeditor.SystemProperties.SceneEvaluationCacheFunc import AllSceneEvaluationCacheFunctions, getValueKey
+
+DEBUG = False
+
+NODE_TITLE_INPUT = "Input"      #: title of the `Node` whose value is provided by :func:`setInputValue`
+NODE_TITLE_OUTPUT = "Output"    #: title of the `Node` which passes the value of its first connected input
+
+#: binary operations of the `Nodes` keyed by the `Node` title, applied to the values of the first two inputs
+NODE_OPERATIONS = {
+    "Addition": operator.add,
+    "Subtraction": operator.sub,
+    "Multiplication": operator.mul,
+    "Division": operator.truediv,
+}
+
+#: vectorized operations used when an input value is a NumPy array, with broadcasting and dtype promotion
+NODE_UFUNCS = {
+    "Addition": np.add,
+    "Subtraction": np.subtract,
+    "Multiplication": np.multiply,
+    "Division": np.true_divide,
+} if np is not None else {}
+
+
+def isArray(value) -> bool:
+    """Return ``True`` if the value is a NumPy array"""
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def getUfuncResultLayout(title: str, first_value, second_value) -> (tuple, 'numpy.dtype'):
+    """
+    Return shape and dtype of the array the vectorized operation gives for the two values, without computing it
+
+    :param title: title of the `Node` choosing the operation, key of `NODE_UFUNCS`
+    :type title: ``str``
+    :return: broadcast shape and dtype of the result, i.e. int / int gives float, float32 array + 2.0 stays float32
+    :rtype: ``tuple``
+    :raises: ``OverflowError`` if a Python int doesn't fit the dtype of the array, like the operation does
+    """
+    # the ufunc runs on empty stand-ins of the arrays, scalars stay as they are, so the promotion of Python
+    # and NumPy scalars is the same as for the values
+    probes = [np.empty((0,), dtype=value.dtype) if isArray(value) and value.ndim > 0 else value
+              for value in (first_value, second_value)]
+    with np.errstate(all='ignore'):
+        dtype = NODE_UFUNCS[title](probes[0], probes[1]).dtype
+    return np.broadcast_shapes(np.shape(first_value), np.shape(second_value)), dtype
+
+
+def computeOperation(title: str, input_values: list, input_value=0):
+    """
+    Compute value of the `Node` with the `title` from the values of its inputs. This function doesn't touch
+    the `Node`, so it can run in a worker thread or process
+
+    :param title: title of the `Node` choosing the operation
+    :type title: ``str``
+    :param input_values: values of the `Nodes` connected to the inputs, ``None`` for the inputs without connection
+    :type input_values: ``list``
+    :param input_value: value of the `Input Node`
+    :return: computed value, ``None`` for the `Nodes` without operation
+    :raises: ``ValueError`` if a required input is missing, ``ArithmeticError`` or ``TypeError`` if
+        the operation fails
+    """
+    if title == NODE_TITLE_INPUT:
+        return input_value
+
+    if title == NODE_TITLE_OUTPUT:
+        connected = [value for value in input_values if value is not None]
+        if len(connected) == 0: raise ValueError("Output has no valid input")
+        return connected[0]
+
+    operation = NODE_OPERATIONS.get(title)
+    if operation is None: return None
+    if len(input_values) < 2 or input_values[0] is None or input_values[1] is None:
+        raise ValueError("%s needs two valid inputs" % title)
+
+    if isArray(input_values[0]) or isArray(input_values[1]):
+        # element-wise division by zero gives inf/nan like NumPy does, the whole column isn't invalid
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return NODE_UFUNCS[title](input_values[0], input_values[1])
+    return operation(input_values[0], input_values[1])
+
+
+class AllSceneEvaluationFunctions():
+    """Class contains all the code for evaluating the `Nodes` of the `Scene`"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **topological_order** - cached list of `Nodes` sorted so every `Node` follows its inputs, or ``None``
+          if the structure of the `Scene` has changed
+        - **cyclic_nodes** - list of `Nodes` which are part of a cycle and can't be evaluated
+        - **structure_version** - number increased whenever `Nodes` or `Edges` are added, removed or reconnected
+        - **visit_generation** - counter of the graph traversals
+        - **visited** - ``dict`` of `Node` -> `visit_generation` in which the `Node` was visited last time
+        - **evaluation_pass** - counter of the evaluation passes
+        - **evaluated** - ``dict`` of `Node` -> `evaluation_pass` in which the `Node` was evaluated last time
+        - **values** - ``dict`` of `Node` -> last evaluated value
+        - **input_values** - ``dict`` of `Input Node` -> value provided by :func:`setInputValue`
+        - **evaluated_count** - number of `Nodes` evaluated in the last pass
+        - **cache** - Instance of :class:`~nodeeditor.SceneEvaluationCacheFunc.AllSceneEvaluationCacheFunctions`
+          memoizing the computed values
+        """
+        self.scene = scene
+
+        self.topological_order = None
+        self.cyclic_nodes = []
+        self.structure_version = 0
+
+        self.visit_generation = 0
+        self.visited = {}
+        self.evaluation_pass = 0
+        self.evaluated = {}
+
+        self.values = {}
+        self.input_values = {}
+        self.evaluated_count = 0
+
+        self.cache = AllSceneEvaluationCacheFunctions()
+
+    def onEdgeSocketChanged(self, socket: 'Socket'):
+        """
+        Event called when an `Edge` got connected to or disconnected from the `Socket`. The cached order is
+        forgotten and the `Node` of an input `Socket` is marked `Dirty`. Its descendants are re-evaluated because
+        their input has been evaluated in the same pass
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` whose connection has changed or ``None``
+        :type socket: :class:`~nodeeditor.SocketFunc.AllSocketFunctions`
+        """
+        self.invalidateStructure()
+        if socket is not None and socket.is_input: socket.node.markDirty()
+
+    def invalidateStructure(self):
+        """Forget the cached topological order. Called when `Nodes` or `Edges` are added, removed or reconnected"""
+        self.topological_order = None
+        self.structure_version += 1
+
+    def forgetNode(self, node: 'Node'):
+        """
+        Drop everything stored for the `Node` which has been removed from the `Scene`
+
+        :param node: removed :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        """
+        self.values.pop(node, None)
+        self.input_values.pop(node, None)
+        self.visited.pop(node, None)
+        self.evaluated.pop(node, None)
+        self.invalidateStructure()
+
+    def getInputNodes(self, node: 'Node') -> list:
+        """
+        Return the `Nodes` connected to the inputs of the `Node`, ``None`` for the inputs without connection
+
+        :param node: :class:`~nodeeditor.node_node.Node` whose inputs we want
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :return: list with one item for each input `Socket`
+        :rtype: ``list``
+        """
+        input_nodes = []
+        for socket in node.inputs:
+            if len(socket.edges) == 0:
+                input_nodes.append(None)
+                continue
+            other_socket = socket.edges[0].getOtherSocket(socket)
+            input_nodes.append(other_socket.node if other_socket is not None else None)
+        return input_nodes
+
+    def getTopologicalOrder(self) -> list:
+        """
+        Return the cached topological order of the `Nodes`. The order is computed again only if the structure
+        of the `Scene` has changed. `Nodes` which are part of a cycle are left out and stored in `cyclic_nodes`
+
+        :return: list of `Nodes`, every `Node` follows all `Nodes` connected to its inputs
+        :rtype: ``list``
+        """
+        if self.topological_order is not None: return self.topological_order
+
+        in_degrees = {node: 0 for node in self.scene.nodes}
+        for node in self.scene.nodes:
+            for child in node.getChildrenNodes():
+                if child in in_degrees: in_degrees[child] += 1
+
+        order = [node for node in self.scene.nodes if in_degrees[node] == 0]
+        index = 0
+        while index < len(order):
+            for child in order[index].getChildrenNodes():
+                if child not in in_degrees: continue
+                in_degrees[child] -= 1
+                if in_degrees[child] == 0: order.append(child)
+            index += 1
+
+        self.cyclic_nodes = [node for node in self.scene.nodes if in_degrees[node] > 0]
+        if DEBUG: print("EVAL: topological order of %d nodes, %d in cycles" % (len(order), len(self.cyclic_nodes)))
+
+        self.topological_order = order
+        return self.topological_order
+
+    def getDescendantNodes(self, node: 'Node') -> list:
+        """
+        Return all `Nodes` reachable from the outputs of the `Node`, each of them exactly once. Not the `Node` itself
+
+        :param node: :class:`~nodeeditor.node_node.Node` to start from
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :return: list of descendant `Nodes`
+        :rtype: ``list``
+        """
+        self.visit_generation += 1
+        generation = self.visit_generation
+        self.visited[node] = generation
+
+        descendants, stack = [], [node]
+        while stack:
+            for child in stack.pop().getChildrenNodes():
+                if self.visited.get(child) == generation: continue
+                self.visited[child] = generation
+                descendants.append(child)
+                stack.append(child)
+        return descendants
+
+    def setInputValue(self, node: 'Node', value):
+        """
+        Provide the value of the `Input Node` and mark it and its descendants `Dirty`
+
+        :param node: `Input` :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param value: new value of the `Node`
+        """
+        self.input_values[node] = value
+        node.markDirty()
+        node.markDescendantsDirty()
+
+    def getValue(self, node: 'Node'):
+        """Return the last evaluated value of the `Node` or ``None``"""
+        return self.values.get(node)
+
+    def getOutputValues(self) -> dict:
+        """
+        Return the last evaluated values of all `Output Nodes`
+
+        :return: ``dict`` of `Node` `id` -> value
+        :rtype: ``dict``
+        """
+        return {node.id: self.values.get(node) for node in self.scene.nodes if node.title == NODE_TITLE_OUTPUT}
+
+    def getNodesToEvaluate(self) -> list:
+        """
+        Start new evaluation pass and return `Dirty` (or not yet evaluated) `Nodes` together with the `Nodes` whose
+        inputs are evaluated in this pass
+
+        :return: `Nodes` to evaluate in the topological order
+        :rtype: ``list``
+        """
+        self.evaluation_pass += 1
+        current_pass = self.evaluation_pass
+
+        to_evaluate = []
+        for node in self.getTopologicalOrder():
+            if not node.isDirty() and node in self.values and \
+                    not any(self.evaluated.get(input_node) == current_pass for input_node in self.getInputNodes(node)):
+                continue
+            self.evaluated[node] = current_pass
+            to_evaluate.append(node)
+        return to_evaluate
+
+    def getNodeInputValues(self, node: 'Node') -> list:
+        """
+        Return the last values of the `Nodes` connected to the inputs of the `Node`
+
+        :param node: :class:`~nodeeditor.node_node.Node` whose input values we want
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :return: list with one value for each input `Socket`, ``None`` for the inputs without connection
+        :rtype: ``list``
+        """
+        return [self.values.get(input_node) if input_node is not None else None
+                for input_node in self.getInputNodes(node)]
+
+    def getCacheKey(self, node: 'Node', input_values: list) -> tuple:
+        """
+        Return the key of the `Node` value in the cache, made of its operation, hash of its content
+        and its input values. Arrays are not memoized, hashing their content costs more than the operation
+
+        :param node: :class:`~nodeeditor.node_node.Node` to compute
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param input_values: values of the inputs, see :func:`getNodeInputValues`
+        :type input_values: ``list``
+        :return: hashable key or ``None`` if the value must not be cached
+        :rtype: ``tuple``
+        """
+        input_value = self.input_values.get(node, 0) if node.title == NODE_TITLE_INPUT else None
+        value_keys = tuple(getValueKey(value) for value in input_values) + (getValueKey(input_value),)
+        if None in value_keys: return None
+        return node.__class__.__name__, node.title, node.getContentHash(), value_keys
+
+    def markCyclicNodes(self):
+        """Mark the `Nodes` which are part of a cycle `Invalid`, they can't be evaluated"""
+        for node in self.cyclic_nodes:
+            self.values[node] = None
+            node.markInvalid()
+
+    def evaluate(self) -> dict:
+        """
+        Evaluate all `Dirty` (or not yet evaluated) `Nodes` and the `Nodes` whose inputs have been evaluated in this
+        pass. `Nodes` are visited in the topological order, so each of them is evaluated at most once
+
+        :return: values of the `Output Nodes`, see :func:`getOutputValues`
+        :rtype: ``dict``
+        """
+        # async nodes can be awaited only on the asyncio loop
+        if self.scene.async_evaluator.hasAsyncNodes(): return self.scene.async_evaluator.evaluate()
+
+        to_evaluate = self.getNodesToEvaluate()
+        for node in to_evaluate:
+            self.values[node] = node.eval()
+        self.evaluated_count = len(to_evaluate)
+        self.markCyclicNodes()
+
+        if DEBUG: print("EVAL: evaluated %d nodes" % self.evaluated_count)
+        return self.getOutputValues()
+
+    def getInputNode(self, key) -> 'Node':
+        """
+        Return the `Input Node` for the key used in the input dictionaries
+
+        :param key: `Input` :class:`~nodeeditor.node_node.Node` or its `id`
+        :return: :class:`~nodeeditor.node_node.Node` or ``None`` if there is no `Node` with this `id`
+        """
+        return self.scene.getNodeByID(key) if isinstance(key, int) else key
+
+    def evaluateBatch(self, input_columns: dict) -> dict:
+        """
+        Evaluate the graph over N input rows in one pass. Each `Input Node` gets the whole column as a NumPy
+        array, so the arithmetic `Nodes` run vectorized. Without NumPy the rows are evaluated one by one.
+        The previous values of the `Input Nodes` are restored afterwards
+
+        :param input_columns: ``dict`` of `Input Node` (or its `id`) -> sequence of N values
+        :type input_columns: ``dict``
+        :return: ``dict`` of `Output Node` `id` -> N values (NumPy array or ``list`` without NumPy)
+        :rtype: ``dict``
+        """
+        columns = {self.getInputNode(key): column for key, column in input_columns.items()}
+        previous_values = {node: self.input_values.get(node, 0) for node in columns}
+        num_rows = max([len(column) for column in columns.values()] or [0])
+
+        try:
+            if np is not None:
+                for node, column in columns.items(): self.setInputValue(node, np.asarray(column))
+                outputs = self.evaluate()
+                # outputs not depending on any input are broadcast to the number of rows
+                return {node_id: np.broadcast_to(value, (num_rows,) + np.shape(value)[1:])
+                        if value is not None else None for node_id, value in outputs.items()}
+
+            outputs = {}
+            for row in range(num_rows):
+                for node, column in columns.items(): self.setInputValue(node, column[row])
+                for node_id, value in self.evaluate().items(): outputs.setdefault(node_id, []).append(value)
+            return outputs
+
+        finally:
+            for node, value in previous_values.items(): self.setInputValue(node, value)
+
+    def computeNode(self, node: 'Node'):
+        """
+        Compute the value of the `Node` from the values of its inputs, according to its title. The `Node` becomes
+        `Invalid` if an input is missing or invalid or if the operation fails (i.e. division by zero)
+
+        :param node: :class:`~nodeeditor.node_node.Node` to compute
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :return: computed value or ``None`` if the `Node` is `Invalid`
+        """
+        node.markDirty(False)
+        node.markInvalid(False)
+
+        # unchanged upstream values short-circuit the computation, only valid values are cached
+        input_values = self.getNodeInputValues(node)
+        key = self.getCacheKey(node, input_values)
+        if key is not None:
+            found, value = self.cache.lookup(key)
+            if found: return value
+
+        try:
+            value = computeOperation(node.title, input_values, self.input_values.get(node, 0))
+        except (ValueError, TypeError, ArithmeticError) as e:
+            if DEBUG: print("EVAL: %s is invalid:" % node, e)
+            node.markInvalid()
+            return None
+
+        if key is not None: self.cache.store(key, value)
+        return value
@@ -4,13 +4,25 @@ A module containing the representation of the NodeEditor's Scene
 """
 import os, sys, json
 from collections import OrderedDict
+from contextlib import contextmanager
 from Nodeeditor.SystemProperties.utils_no_qt import dumpException
 from Nodeeditor.SystemProperties.SerializationFunc import Serializable
-from Nodeeditor.SystemProperties.GraphicalScene import DrawGraphicalScene
 from Nodeeditor.Node.NodeFunc import AllNodeFunctions
 from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
 from Nodeeditor.SystemProperties.SceneHistoryFunc import AllSceneHistoryFunctions
 from Nodeeditor.SystemProperties.SceneClipboardFunc import AllSceneClipboardFunctions
+from Nodeeditor.SystemProperties.SceneBatchFunc import AllSceneBatchFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import AllSceneEvaluationFunctions
+from Nodeeditor.SystemProperties.SceneSchedulerFunc import AllSceneSchedulerFunctions
+from Nodeeditor.SystemProperties.SceneCompilerFunc import AllSceneCompilerFunctions
+from Nodeeditor.SystemProperties.SceneStreamFunc import AllSceneStreamFunctions
+from Nodeeditor.SystemProperties.SceneAsyncFunc import AllSceneAsyncFunctions
+from Nodeeditor.SystemProperties.SceneSpatialIndexFunc import AllSceneSpatialIndexFunctions
+try:
+    from Nodeeditor.SystemProperties.GraphicalScene import DrawGraphicalScene
+except ImportError:
+    # PyQt5 is not available, only headless Scenes can be used
+    DrawGraphicalScene = None
 
 DEBUG_REMOVE_WARNINGS = False
 
@@ -18,23 +30,99 @@ DEBUG_REMOVE_WARNINGS = False
 class InvalidFile(Exception): pass
 
 
+class SceneItemList():
+    """
+    List-like container of the `Nodes` or `Edges` of the `Scene`. Items are kept in the order they were added in an
+    insertion-ordered ``dict``, so membership tests and removal don't scan the whole list
+    """
+
+    def __init__(self, items: 'iterable' = ()):
+        self.items = dict.fromkeys(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __getitem__(self, index: int):
+        if index == 0 and self.items: return next(iter(self.items))
+        if index == -1 and self.items: return next(reversed(self.items))
+        return list(self.items)[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return "<SceneItemList %s>" % list(self.items)
+
+    def append(self, item):
+        """Add the item at the end"""
+        self.items[item] = None
+
+    def remove(self, item):
+        """Remove the item, raises ``ValueError`` like ``list.remove`` if it's not there"""
+        if self.items.pop(item, self) is self: raise ValueError("%s is not in the list" % item)
+
+    def copy(self) -> list:
+        """Return ``list`` of the items"""
+        return list(self.items)
+
+
 class AllSceneFunctions(Serializable):
     """Class representing NodeEditor's `Scene`"""
 
-    def __init__(self):
+    def __init__(self, headless: bool = False):
         """
+        :param headless: if ``True`` no graphics (``QGraphicsScene``, Graphics Items, Content Widgets) are created,
+            so the `Scene` can be loaded, validated and evaluated without a ``QApplication``
+        :type headless: ``bool``
+
         :Instance Attributes:
 
-            - **nodes** - list of `Nodes` in this `Scene`
-            - **edges** - list of `Edges` in this `Scene`
+            - **nodes** - :class:`SceneItemList` of `Nodes` in this `Scene`
+            - **edges** - :class:`SceneItemList` of `Edges` in this `Scene`
+            - **nodes_by_id** - ``dict`` registry of `Nodes` keyed by their `id`
+            - **edges_by_id** - ``dict`` registry of `Edges` keyed by their `id`
+            - **sockets_by_id** - ``dict`` registry of `Sockets` keyed by their `id`
+            - **shadowed_nodes**, **shadowed_edges**, **shadowed_sockets** - ``dict`` of `id` -> list of items
+              whose `id` is registered to another live item. Ids are ``id()`` of the objects, so a new item can get
+              the `id` restored into a live one. They take the entry over when it's released
             - **history** - Instance of :class:`~nodeeditor.node_scene_history.SceneHistory`
             - **clipboard** - Instance of :class:`~nodeeditor.node_scene_clipboard.SceneClipboard`
+            - **notifier** - Instance of :class:`~nodeeditor.SceneBatchFunc.AllSceneBatchFunctions` collecting
+              notifications inside of :func:`batch`
+            - **evaluator** - Instance of :class:`~nodeeditor.SceneEvaluationFunc.AllSceneEvaluationFunctions`
+              evaluating the `Nodes` of this `Scene`
+            - **scheduler** - Instance of :class:`~nodeeditor.SceneSchedulerFunc.AllSceneSchedulerFunctions`
+              evaluating independent `Nodes` of this `Scene` concurrently
+            - **compiler** - Instance of :class:`~nodeeditor.SceneCompilerFunc.AllSceneCompilerFunctions`
+              compiling this `Scene` into a single Python function
+            - **streamer** - Instance of :class:`~nodeeditor.SceneStreamFunc.AllSceneStreamFunctions`
+              evaluating this `Scene` over streams of records
+            - **async_evaluator** - Instance of :class:`~nodeeditor.SceneAsyncFunc.AllSceneAsyncFunctions`
+              evaluating `Nodes` with ``async def eval`` concurrently on an asyncio loop
+            - **spatial_index** - Instance of :class:`~nodeeditor.SceneSpatialIndexFunc.AllSceneSpatialIndexFunctions`
+              finding the `Nodes`, `Sockets` and `Edges` in an area of this `Scene`
+            - **grScene** - Instance of :class:`~nodeeditor.GraphicalScene.DrawGraphicalScene` or ``None`` if the
+              `Scene` is headless
             - **scene_width** - width of this `Scene` in pixels
             - **scene_height** - height of this `Scene` in pixels
         """
         super().__init__()
-        self.nodes = []
-        self.edges = []
+        self.nodes = SceneItemList()
+        self.edges = SceneItemList()
+
+        # id-keyed registries kept in sync by add/remove functions, so we don't need to scan the lists
+        self.nodes_by_id = {}
+        self.edges_by_id = {}
+        self.sockets_by_id = {}
+        self.shadowed_nodes = {}
+        self.shadowed_edges = {}
+        self.shadowed_sockets = {}
 
         # current filename assigned to this scene
         self.filename = None
@@ -56,12 +144,17 @@ class AllSceneFunctions(Serializable):
         # here we can store callback for retrieving the class for Nodes
         self.node_class_selector = None
 
-        self.createScene()
+        self.grScene = None
+        self.spatial_index = AllSceneSpatialIndexFunctions(self)
+        if not headless: self.createScene()
         self.history = AllSceneHistoryFunctions(self)
         self.clipboard = AllSceneClipboardFunctions(self)
-
-        self.grScene.itemSelected.connect(self.onItemSelected)
-        self.grScene.itemsDeselected.connect(self.onItemsDeselected)
+        self.notifier = AllSceneBatchFunctions(self)
+        self.evaluator = AllSceneEvaluationFunctions(self)
+        self.scheduler = AllSceneSchedulerFunctions(self)
+        self.compiler = AllSceneCompilerFunctions(self)
+        self.streamer = AllSceneStreamFunctions(self)
+        self.async_evaluator = AllSceneAsyncFunctions(self)
 
     @property
     def has_been_modified(self):
@@ -90,6 +183,24 @@ class AllSceneFunctions(Serializable):
         self.grScene = DrawGraphicalScene(self)
         self.grScene.setGrScene(self.scene_width, self.scene_height)
 
+        self.grScene.itemSelected.connect(self.onItemSelected)
+        self.grScene.itemsDeselected.connect(self.onItemsDeselected)
+
+    def isHeadless(self) -> bool:
+        """Return ``True`` if this `Scene` has no graphics attached
+
+        :rtype: ``bool``
+        """
+        return self.grScene is None
+
+    def attachGraphics(self):
+        """Create Graphics Scene and graphics of all `Nodes` and `Edges` of a headless `Scene`, i.e. when a graph
+        loaded headless should be shown in the editor"""
+        if not self.isHeadless(): return
+        self.createScene()
+        for node in self.nodes: node.createGraphics()
+        for edge in self.edges: edge.createEdgeClassInstance()
+
     def getNodeByID(self, node_id: int):
         """
         Find node in the scene according to provided `node_id`
@@ -98,10 +209,46 @@ class AllSceneFunctions(Serializable):
         :type node_id: ``int``
         :return: Found ``Node`` or ``None``
         """
-        for node in self.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self.nodes_by_id.get(node_id)
+
+    def getEdgeByID(self, edge_id: int):
+        """
+        Find edge in the scene according to provided `edge_id`
+
+        :param edge_id: ID of the edge we are looking for
+        :type edge_id: ``int``
+        :return: Found ``Edge`` or ``None``
+        """
+        return self.edges_by_id.get(edge_id)
+
+    def getSocketByID(self, socket_id: int):
+        """
+        Find socket in the scene according to provided `socket_id`
+
+        :param socket_id: ID of the socket we are looking for
+        :type socket_id: ``int``
+        :return: Found ``Socket`` or ``None``
+        """
+        return self.sockets_by_id.get(socket_id)
+
+    @contextmanager
+    def batch(self, desc: str = None, setModified: bool = True):
+        """
+        Context manager grouping structural changes of this `Scene`. Batches can be nested. When the outermost
+        batch is committed, every affected `Node` is notified once, the graphics scene is updated once and
+        a single History Stamp is stored
+
+        :param desc: description of the History Stamp stored on commit. If ``None``, the last History Stamp
+            requested inside the batch is stored, if any
+        :type desc: ``str``
+        :param setModified: if ``True`` and `desc` is provided, marks this `Scene` as modified
+        :type setModified: ``bool``
+        """
+        self.notifier.begin()
+        try:
+            yield self
+        finally:
+            self.notifier.commit(desc, setModified)
 
     def setSilentSelectionEvents(self, value: bool = True):
         """Calling this can suppress onItemSelected events to be triggered. This is useful when working with clipboard"""
@@ -124,7 +271,7 @@ class AllSceneFunctions(Serializable):
                 # therefore first run all callbacks...
                 for callback in self._item_selected_listeners: callback()
                 # and store history as a last step always
-                self.history.storeHistory("Selection Changed")
+                self.history.storeSelectionHistory("Selection Changed")
 
     def onItemsDeselected(self, silent: bool = False):
         """
@@ -145,7 +292,7 @@ class AllSceneFunctions(Serializable):
         if current_selected_items == []:
             self._last_selected_items = []
             if not silent:
-                self.history.storeHistory("Deselected Everything")
+                self.history.storeSelectionHistory("Deselected Everything")
                 for callback in self._items_deselected_listeners: callback()
 
     def isModified(self) -> bool:
@@ -160,9 +307,10 @@ class AllSceneFunctions(Serializable):
         """
         Returns currently selected Graphics Items
 
-        :return: list of ``QGraphicsItems``
+        :return: list of ``QGraphicsItems``, empty list if the `Scene` is headless
         :rtype: list[QGraphicsItem]
         """
+        if self.isHeadless(): return []
         return self.grScene.selectedItems()
 
     def doDeselectItems(self, silent: bool = False) -> None:
@@ -221,6 +369,7 @@ class AllSceneFunctions(Serializable):
     # custom flag to detect node or edge has been selected....
     def resetLastSelectedStates(self):
         """Resets internal `selected flags` in all `Nodes` and `Edges` in the `Scene`"""
+        if self.isHeadless(): return
         for node in self.nodes:
             node.grNode._last_selected_state = False
         for edge in self.edges:
@@ -251,6 +400,9 @@ class AllSceneFunctions(Serializable):
         :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
         """
         self.nodes.append(node)
+        self.doRegister(self.nodes_by_id, self.shadowed_nodes, node)
+        self.history.trackNodeChange(node)
+        self.evaluator.invalidateStructure()
 
     def addEdge(self, edge: AllEdgeFunctions):
         """Add :class:`~nodeeditor.node_edge.Edge` to this `Scene`
@@ -259,6 +411,16 @@ class AllSceneFunctions(Serializable):
         :return: :class:`~nodeeditor.node_edge.Edge`
         """
         self.edges.append(edge)
+        self.doRegister(self.edges_by_id, self.shadowed_edges, edge)
+        self.history.trackEdgeChange(edge)
+
+    def addSocket(self, socket: 'AllSocketFunctions'):
+        """Register :class:`~nodeeditor.node_socket.Socket` in this `Scene` socket registry
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` to be registered
+        :type socket: :class:`~nodeeditor.SocketFunc.AllSocketFunctions`
+        """
+        self.doRegister(self.sockets_by_id, self.shadowed_sockets, socket)
 
     def removeNode(self, node: AllNodeFunctions):
         """Remove :class:`~nodeeditor.node_node.Node` from this `Scene`
@@ -268,6 +430,12 @@ class AllSceneFunctions(Serializable):
         """
         if node in self.nodes:
             self.nodes.remove(node)
+            self.doUnregister(self.nodes_by_id, self.shadowed_nodes, node)
+            self.history.trackNodeChange(node)
+            self.evaluator.forgetNode(node)
+            self.spatial_index.removeNode(node)
+            for socket in (node.inputs + node.outputs):
+                self.removeSocket(socket)
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeNode", "wanna remove nodeeditor", node,
                                             "from self.nodes but it's not in the list!")
@@ -280,10 +448,101 @@ class AllSceneFunctions(Serializable):
         """
         if edge in self.edges:
             self.edges.remove(edge)
+            self.doUnregister(self.edges_by_id, self.shadowed_edges, edge)
+            self.history.trackEdgeChange(edge)
+            self.spatial_index.removeEdge(edge)
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeEdge", "wanna remove edge", edge,
                                             "from self.edges but it's not in the list!")
 
+    def removeSocket(self, socket: 'AllSocketFunctions'):
+        """Unregister :class:`~nodeeditor.node_socket.Socket` from this `Scene` socket registry
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` to be unregistered
+        :type socket: :class:`~nodeeditor.SocketFunc.AllSocketFunctions`
+        """
+        self.doUnregister(self.sockets_by_id, self.shadowed_sockets, socket)
+        self.spatial_index.removeSocket(socket)
+
+    def reindexNode(self, node: AllNodeFunctions, new_id: int):
+        """Change `id` of the :class:`~nodeeditor.node_node.Node` and keep the node registry in sync
+
+        :param node: :class:`~nodeeditor.node_node.Node` which gets the new `id`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param new_id: new `id` of the node
+        :type new_id: ``int``
+        """
+        self.history.trackNodeChange(node)
+        self.doReindex(self.nodes_by_id, self.shadowed_nodes, node, new_id)
+        self.history.trackNodeChange(node)
+
+    def reindexEdge(self, edge: AllEdgeFunctions, new_id: int):
+        """Change `id` of the :class:`~nodeeditor.node_edge.Edge` and keep the edge registry in sync
+
+        :param edge: :class:`~nodeeditor.node_edge.Edge` which gets the new `id`
+        :type edge: :class:`~nodeeditor.EdgeFunc.AllEdgeFunctions`
+        :param new_id: new `id` of the edge
+        :type new_id: ``int``
+        """
+        self.history.trackEdgeChange(edge)
+        self.doReindex(self.edges_by_id, self.shadowed_edges, edge, new_id)
+        self.history.trackEdgeChange(edge)
+
+    def reindexSocket(self, socket: 'AllSocketFunctions', new_id: int):
+        """Change `id` of the :class:`~nodeeditor.node_socket.Socket` and keep the socket registry in sync
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` which gets the new `id`
+        :type socket: :class:`~nodeeditor.SocketFunc.AllSocketFunctions`
+        :param new_id: new `id` of the socket
+        :type new_id: ``int``
+        """
+        self.doReindex(self.sockets_by_id, self.shadowed_sockets, socket, new_id)
+        self.history.trackNodeChange(socket.node)
+
+    def doReindex(self, registry: dict, shadowed: dict, item: 'Serializable', new_id: int):
+        """Helper function moving `item` in the `registry` from its current `id` to the `new_id`"""
+        self.doUnregister(registry, shadowed, item)
+        item.id = new_id
+        self.doRegister(registry, shadowed, item)
+
+    def doRegister(self, registry: dict, shadowed: dict, item: 'Serializable'):
+        """
+        Helper function putting `item` into the `registry`. An entry of another live item is never overwritten,
+        the `item` waits in `shadowed` until the entry is released
+
+        :param registry: ``dict`` of `id` -> item
+        :type registry: ``dict``
+        :param shadowed: ``dict`` of `id` -> list of items waiting for the entry of the `registry`
+        :type shadowed: ``dict``
+        :param item: added `Node`, `Edge` or `Socket`
+        """
+        registered = registry.setdefault(item.id, item)
+        if registered is item: return
+        if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::doRegister", "id", item.id, "of", item,
+                                        "is already used by", registered)
+        shadowed.setdefault(item.id, []).append(item)
+
+    def doUnregister(self, registry: dict, shadowed: dict, item: 'Serializable'):
+        """
+        Helper function removing `item` from the `registry`. If the `item` held the entry, the first item
+        shadowed by it takes the entry over, entries of other items with the same `id` are kept
+
+        :param registry: ``dict`` of `id` -> item
+        :type registry: ``dict``
+        :param shadowed: ``dict`` of `id` -> list of items waiting for the entry of the `registry`
+        :type shadowed: ``dict``
+        :param item: removed `Node`, `Edge` or `Socket`
+        """
+        waiting = shadowed.get(item.id)
+        if registry.get(item.id) is item:
+            if waiting:
+                registry[item.id] = waiting.pop(0)
+            else:
+                del registry[item.id]
+        elif waiting and item in waiting:
+            waiting.remove(item)
+        if waiting is not None and not waiting: del shadowed[item.id]
+
     def clear(self):
         """Remove all `Nodes` from this `Scene`. This causes also to remove all `Edges`"""
         while len(self.nodes) > 0:
@@ -357,6 +616,24 @@ class AllSceneFunctions(Serializable):
         """
         return AllNodeFunctions if self.node_class_selector is None else self.node_class_selector(data)
 
+    def isItemUnchanged(self, item: 'Serializable', data: dict) -> bool:
+        """
+        Compare the serialized live `Node` or `Edge` with its serialized data. The data are compared directly,
+        equal hashes of different data would leave the `item` in its changed state
+
+        :param item: existing `Node` or `Edge` in this `Scene`
+        :type item: :class:`~nodeeditor.SerializationFunc.Serializable`
+        :param data: serialized data which should be restored into the `item`
+        :type data: ``dict``
+        :return: ``True`` if the `item` already matches the `data` and doesn't need to be deserialized
+        :rtype: ``bool``
+        """
+        try:
+            return item.serialize() == data
+        except Exception as e:
+            dumpException(e)
+            return False
+
     def serialize(self) -> OrderedDict:
         nodes, edges = [], []
         for node in self.nodes: nodes.append(node.serialize())
@@ -370,6 +647,11 @@ class AllSceneFunctions(Serializable):
         ])
 
     def deserialize(self, data: dict, hashmap: dict = {}, restore_id: bool = True, *args, **kwargs) -> bool:
+        with self.batch():
+            return self.doDeserialize(data, restore_id, *args, **kwargs)
+
+    def doDeserialize(self, data: dict, restore_id: bool = True, *args, **kwargs) -> bool:
+        """Helper function deserializing the `Scene` content inside of a batch"""
         hashmap = {}
 
         if restore_id: self.id = data['id']
@@ -377,19 +659,16 @@ class AllSceneFunctions(Serializable):
         # -- deserialize NODES
 
         ## Instead of recreating all the nodes, reuse existing ones...
-        # get list of all current nodes:
-        all_nodes = self.nodes.copy()
+        # get registry of all current nodes, nodes shadowed by a node with the same id are not reused:
+        all_nodes = dict(self.nodes_by_id)
+        duplicate_nodes = [node for nodes in self.shadowed_nodes.values() for node in nodes]
 
         # go through deserialized nodes:
         for node_data in data['nodes']:
             # can we find this node in the scene?
-            found = False
-            for node in all_nodes:
-                if node.id == node_data['id']:
-                    found = node
-                    break
+            found = all_nodes.pop(node_data['id'], None)
 
-            if not found:
+            if found is None:
                 try:
                     new_node = self.getNodeClassFromData(node_data)(self)
                     new_node.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
@@ -397,47 +676,44 @@ class AllSceneFunctions(Serializable):
                     # print("New node for", node_data['title'])
                 except:
                     dumpException()
+            elif self.isItemUnchanged(found, node_data):
+                # nothing differs, just make the node and its sockets available for the edges
+                hashmap[found.id] = found
+                for socket in found.inputs + found.outputs: hashmap[socket.id] = socket
             else:
                 try:
                     found.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
                     found.onDeserialized(node_data)
-                    all_nodes.remove(found)
                     # print("Reused", node_data['title'])
                 except:
                     dumpException()
 
         # remove nodes which are left in the scene and were NOT in the serialized data!
         # that means they were not in the graph before...
-        while all_nodes != []:
-            node = all_nodes.pop()
+        for node in list(all_nodes.values()) + duplicate_nodes:
             node.remove()
 
         # -- deserialize EDGES
 
         ## Instead of recreating all the edges, reuse existing ones...
-        # get list of all current edges:
-        all_edges = self.edges.copy()
+        # get registry of all current edges, edges shadowed by an edge with the same id are not reused:
+        all_edges = dict(self.edges_by_id)
+        duplicate_edges = [edge for edges in self.shadowed_edges.values() for edge in edges]
 
         # go through deserialized edges:
         for edge_data in data['edges']:
-            # can we find this node in the scene?
-            found = False
-            for edge in all_edges:
-                if edge.id == edge_data['id']:
-                    found = edge
-                    break
+            # can we find this edge in the scene?
+            found = all_edges.pop(edge_data['id'], None)
 
-            if not found:
+            if found is None:
                 new_edge = AllEdgeFunctions(self).deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
                 # print("New edge for", edge_data)
-            else:
+            elif not self.isItemUnchanged(found, edge_data):
                 found.deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
-                all_edges.remove(found)
 
-        # remove nodes which are left in the scene and were NOT in the serialized data!
+        # remove edges which are left in the scene and were NOT in the serialized data!
         # that means they were not in the graph before...
-        while all_edges != []:
-            edge = all_edges.pop()
+        for edge in list(all_edges.values()) + duplicate_edges:
             edge.remove()
 
         return True
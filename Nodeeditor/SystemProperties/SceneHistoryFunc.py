@@ -1,8 +1,19 @@
 # -*- coding: utf-8 -*-
 """
 A module containing all code for working with History (Undo/Redo)
+
+History stamps don't contain snapshots of the whole `Scene`. Each stamp stores only the changes (deltas) of the
+`Nodes` and `Edges` which have been touched since the previous stamp as ``[before, after]`` pairs of their
+serialized data. Undo applies the `before` side of the deltas, redo applies the `after` side.
+
+Selection changes are stored as cheap selection-only stamps, containing just ids of the selected items and
+a reference to the previous structural stamp.
 """
 from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+from Nodeeditor.SystemProperties.SceneHistoryStackFunc import AllSceneHistoryStackFunctions
+
+HISTORY_STAMP_STRUCTURE = 1   #: History Stamp containing changes of the `Nodes` and `Edges`
+HISTORY_STAMP_SELECTION = 2   #: History Stamp containing only the selection
 
 DEBUG = False
 DEBUG_SELECTION = False
@@ -20,13 +31,33 @@ class AllSceneHistoryFunctions():
 
         - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
         - **history_limit** - number of history steps that can be stored
+        - **history_stack** - Instance of :class:`~nodeeditor.SceneHistoryStackFunc.AllSceneHistoryStackFunctions`
+          storing History Stamps within its byte budget
+        - **node_states** - last stored serialized data of each `Node` keyed by `id`
+        - **edge_states** - last stored serialized data of each `Edge` keyed by `id`
+        - **changed_node_ids** - ids of `Nodes` changed since the last History Stamp
+        - **changed_edge_ids** - ids of `Edges` changed since the last History Stamp
+        - **history_serial** - serial number of the last created History Stamp
         """
         self.scene = scene
 
+        self.history_stack = AllSceneHistoryStackFunctions()
         self.clear()
         self.history_limit = 32
 
         self.undo_selection_has_changed = False
+        self.history_serial = 0
+
+        # last known state of the scene items, deltas are computed against it
+        self.node_states = {}
+        self.edge_states = {}
+
+        # items touched since the last history stamp
+        self.changed_node_ids = set()
+        self.changed_edge_ids = set()
+
+        # custom flag used to suppress tracking of the changes we are doing while restoring history
+        self.is_restoring = False
 
         # listeners
         self._history_modified_listeners = []
@@ -35,7 +66,7 @@ class AllSceneHistoryFunctions():
 
     def clear(self):
         """Reset the history stack"""
-        self.history_stack = []
+        self.history_stack.clear()
         self.history_current_step = -1
 
     def storeInitialHistoryStamp(self):
@@ -66,6 +97,59 @@ class AllSceneHistoryFunctions():
         """
         self._history_restored_listeners.append(callback)
 
+    def setHistoryBudget(self, byte_budget: int):
+        """
+        Set how many bytes can be held by the History Stamps in the `History Stack`.
+        The budget is applied when the next History Stamp is stored
+
+        :param byte_budget: memory budget in bytes
+        :type byte_budget: ``int``
+        """
+        self.history_stack.byte_budget = byte_budget
+
+    def getHistoryStats(self) -> dict:
+        """
+        Return statistics of the `History Stack`
+
+        :return: ``dict`` with 'stamps', 'raw_bytes' and 'compressed_bytes'
+        :rtype: ``dict``
+        """
+        return self.history_stack.getStats()
+
+    def trackNodeChange(self, node: 'Node'):
+        """
+        Remember that this `Node` has changed, so the next History Stamp will contain its delta.
+        Nodes with serializable content should call this when their content has changed
+
+        :param node: changed :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        """
+        if not self.is_restoring: self.changed_node_ids.add(node.id)
+
+    def trackEdgeChange(self, edge: 'Edge'):
+        """
+        Remember that this `Edge` has changed, so the next History Stamp will contain its delta
+
+        :param edge: changed :class:`~nodeeditor.node_edge.Edge`
+        :type edge: :class:`~nodeeditor.EdgeFunc.AllEdgeFunctions`
+        """
+        if not self.is_restoring: self.changed_edge_ids.add(edge.id)
+
+    def resetStates(self):
+        """Serialize current state of all `Nodes` and `Edges`. Next deltas will be computed against this state"""
+        self.node_states = {node.id: node.serialize() for node in self.scene.nodes}
+        self.edge_states = {edge.id: edge.serialize() for edge in self.scene.edges if self.isEdgeStorable(edge)}
+        self.changed_node_ids = set()
+        self.changed_edge_ids = set()
+
+    def hasPendingChanges(self) -> bool:
+        """Return ``True`` if any `Node` or `Edge` has changed since the last History Stamp"""
+        return len(self.changed_node_ids) > 0 or len(self.changed_edge_ids) > 0
+
+    def isEdgeStorable(self, edge: 'Edge') -> bool:
+        """Return ``False`` for transient edges (i.e. dragging or rerouting edges) which don't have both sockets"""
+        return edge.start_socket is not None and edge.end_socket is not None
+
     def canUndo(self) -> bool:
         """Return ``True`` if Undo is available for current `History Stack`
 
@@ -87,7 +171,7 @@ class AllSceneHistoryFunctions():
 
         if self.canUndo():
             self.history_current_step -= 1
-            self.restoreHistory()
+            self.restoreHistory(self.history_stack[self.history_current_step + 1], undo=True)
             self.scene.has_been_modified = True
 
     def redo(self):
@@ -95,13 +179,18 @@ class AllSceneHistoryFunctions():
         if DEBUG: print("REDO")
         if self.canRedo():
             self.history_current_step += 1
-            self.restoreHistory()
+            self.restoreHistory(self.history_stack[self.history_current_step])
             self.scene.has_been_modified = True
 
-    def restoreHistory(self):
+    def restoreHistory(self, delta_stamp: dict = None, undo: bool = False):
         """
         Restore `History Stamp` from `History stack`.
 
+        :param delta_stamp: History Stamp whose changes lead to the current step. ``None`` restores selection only
+        :type delta_stamp: ``dict``
+        :param undo: ``True`` if the changes of `delta_stamp` should be reverted
+        :type undo: ``bool``
+
         Triggers:
 
         - `History Modified` event
@@ -110,7 +199,7 @@ class AllSceneHistoryFunctions():
         if DEBUG: print("Restoring history",
                         ".... current_step: @%d" % self.history_current_step,
                         "(%d)" % len(self.history_stack))
-        self.restoreHistoryStamp(self.history_stack[self.history_current_step])
+        self.restoreHistoryStamp(self.history_stack[self.history_current_step], delta_stamp, undo)
         for callback in self._history_modified_listeners: callback()
         for callback in self._history_restored_listeners: callback()
 
@@ -128,25 +217,65 @@ class AllSceneHistoryFunctions():
         - `History Modified`
         - `History Stored`
         """
+        # inside of a scene batch only a single stamp is stored when the batch is committed
+        if self.scene.notifier.isActive():
+            self.scene.notifier.collectHistory(desc, setModified)
+            return
+
         if setModified:
             self.scene.has_been_modified = True
 
+        # the first stamp is the base of the history, everything later is a delta against it
+        if len(self.history_stack) == 0:
+            self.resetStates()
+
+        self.doStoreHistoryStamp(desc, self.createHistoryStamp)
+
+    def storeSelectionHistory(self, desc: str):
+        """
+        Store selection-only History Stamp into History Stack. Falls back to a full History Stamp if
+        there are changes of `Nodes` or `Edges` which have not been stored yet
+
+        :param desc: Description of current History Stamp
+        :type desc: ``str``
+
+        Triggers:
+
+        - `History Modified`
+        - `History Stored`
+        """
+        if self.scene.notifier.isActive() or len(self.history_stack) == 0 or self.hasPendingChanges():
+            self.storeHistory(desc)
+            return
+
+        self.doStoreHistoryStamp(desc, self.createSelectionHistoryStamp)
+
+    def doStoreHistoryStamp(self, desc: str, create_stamp: 'function'):
+        """
+        Helper function trimming the History Stack and storing the History Stamp created by `create_stamp`
+
+        :param desc: Description of current History Stamp
+        :type desc: ``str``
+        :param create_stamp: function creating History Stamp from its description
+        :type create_stamp: ``function``
+        """
         if DEBUG: print("Storing history", '"%s"' % desc,
                         ".... current_step: @%d" % self.history_current_step,
                         "(%d)" % len(self.history_stack))
 
         # if the pointer (history_current_step) is not at the end of history_stack
         if self.history_current_step + 1 < len(self.history_stack):
-            self.history_stack = self.history_stack[0:self.history_current_step + 1]
+            self.history_stack.truncate(self.history_current_step + 1)
 
         # history is outside of the limits
         if self.history_current_step + 1 >= self.history_limit:
-            self.history_stack = self.history_stack[1:]
+            self.history_stack.popFront()
             self.history_current_step -= 1
 
-        hs = self.createHistoryStamp(desc)
+        hs = create_stamp(desc)
 
-        self.history_stack.append(hs)
+        # history is outside of the byte budget
+        self.history_current_step -= self.history_stack.append(hs)
         self.history_current_step += 1
         if DEBUG: print("  -- setting step to:", self.history_current_step)
 
@@ -164,7 +293,7 @@ class AllSceneHistoryFunctions():
             'nodes': [],
             'edges': [],
         }
-        for item in self.scene.grScene.selectedItems():
+        for item in self.scene.getSelectedItems():
             if hasattr(item, 'node'):
                 sel_obj['nodes'].append(item.node.id)
             elif hasattr(item, 'edge'):
@@ -173,26 +302,88 @@ class AllSceneHistoryFunctions():
 
     def createHistoryStamp(self, desc: str) -> dict:
         """
-        Create History Stamp. Internally serialize whole scene and the current selection
+        Create History Stamp. Internally serialize only changed items and the current selection
+
+        :param desc: Descriptive label for the History Stamp
+        :return: History stamp containing changes of the `Scene` since the last stamp and current selection
+        :rtype: ``dict``
+        """
+        self.history_serial += 1
+        history_stamp = {
+            'desc': desc,
+            'kind': HISTORY_STAMP_STRUCTURE,
+            'serial': self.history_serial,
+            'structure': self.history_serial,
+            'nodes': self.collectChanges(self.changed_node_ids, self.node_states, self.scene.getNodeByID),
+            'edges': self.collectChanges(self.changed_edge_ids, self.edge_states, self.getStorableEdgeByID),
+            'selection': self.captureCurrentSelection(),
+        }
+
+        return history_stamp
+
+    def createSelectionHistoryStamp(self, desc: str) -> dict:
+        """
+        Create selection-only History Stamp. Nothing is serialized, the stamp refers to the previous structural stamp.
+        Falls back to a full History Stamp if there is no previous stamp left (i.e. `history_limit` is 1)
 
         :param desc: Descriptive label for the History Stamp
-        :return: History stamp serializing state of `Scene` and current selection
+        :return: History stamp containing current selection
         :rtype: ``dict``
         """
+        if len(self.history_stack) == 0: return self.createHistoryStamp(desc)
+
+        self.history_serial += 1
         history_stamp = {
             'desc': desc,
-            'snapshot': self.scene.serialize(),
+            'kind': HISTORY_STAMP_SELECTION,
+            'serial': self.history_serial,
+            'structure': self.history_stack[len(self.history_stack) - 1]['structure'],
             'selection': self.captureCurrentSelection(),
         }
 
         return history_stamp
 
-    def restoreHistoryStamp(self, history_stamp: dict):
+    def getStorableEdgeByID(self, edge_id: int) -> 'Edge':
+        """Return `Edge` with `edge_id` if it exists in the `Scene` and is not transient, otherwise ``None``"""
+        edge = self.scene.getEdgeByID(edge_id)
+        return edge if edge is not None and self.isEdgeStorable(edge) else None
+
+    def collectChanges(self, changed_ids: set, states: dict, get_item: 'function') -> list:
+        """
+        Compare changed items with their last known state and update the state
+
+        :param changed_ids: ids of changed items. This set is emptied
+        :type changed_ids: ``set``
+        :param states: last known serialized items keyed by `id`
+        :type states: ``dict``
+        :param get_item: function returning live item by its `id` or ``None`` if the item doesn't exist anymore
+        :type get_item: ``function``
+        :return: list of ``[before, after]`` serialized data, ``None`` meaning the item doesn't exist
+        :rtype: ``list``
+        """
+        changes = []
+        for item_id in changed_ids:
+            item = get_item(item_id)
+            after = item.serialize() if item is not None else None
+            before = states.get(item_id)
+            if before == after: continue
+
+            changes.append([before, after])
+            if after is None: del states[item_id]
+            else: states[item_id] = after
+        changed_ids.clear()
+        return changes
+
+    def restoreHistoryStamp(self, history_stamp: dict, delta_stamp: dict = None, undo: bool = False):
         """
         Restore History Stamp to current `Scene` with selection of items included
 
         :param history_stamp: History Stamp to restore
         :type history_stamp: ``dict``
+        :param delta_stamp: History Stamp whose changes are applied to get to the `history_stamp`
+        :type delta_stamp: ``dict``
+        :param undo: ``True`` if the changes of `delta_stamp` should be reverted
+        :type undo: ``bool``
         """
         if DEBUG: print("RHS: ", history_stamp['desc'])
 
@@ -201,27 +392,23 @@ class AllSceneHistoryFunctions():
             previous_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes before restore:", previous_selection['nodes'])
 
-            self.scene.deserialize(history_stamp['snapshot'])
+            # selection-only stamps don't change the scene, we just touch the selection flags
+            if delta_stamp is not None and delta_stamp['kind'] == HISTORY_STAMP_STRUCTURE:
+                self.applyChanges(delta_stamp, undo)
 
             # restore selection
 
-            # first clear all selection on edges
-            for edge in self.scene.edges: edge.grEdge.setSelected(False)
+            # first clear all current selection
+            for item in self.scene.getSelectedItems(): item.setSelected(False)
             # now restore selected edges from history_stamp
             for edge_id in history_stamp['selection']['edges']:
-                for edge in self.scene.edges:
-                    if edge.id == edge_id:
-                        edge.grEdge.setSelected(True)
-                        break
+                edge = self.scene.getEdgeByID(edge_id)
+                if edge is not None and edge.grEdge is not None: edge.grEdge.setSelected(True)
 
-            # first clear all selection on nodes
-            for node in self.scene.nodes: node.grNode.setSelected(False)
             # now restore selected nodes from history_stamp
             for node_id in history_stamp['selection']['nodes']:
-                for node in self.scene.nodes:
-                    if node.id == node_id:
-                        node.grNode.setSelected(True)
-                        break
+                node = self.scene.getNodeByID(node_id)
+                if node is not None and node.grNode is not None: node.grNode.setSelected(True)
 
             current_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes after restore:", current_selection['nodes'])
@@ -237,3 +424,70 @@ class AllSceneHistoryFunctions():
 
         except Exception as e:
             dumpException(e)
+
+    def applyChanges(self, delta_stamp: dict, undo: bool = False):
+        """
+        Apply changes stored in the History Stamp to the `Scene`
+
+        :param delta_stamp: History Stamp containing ``[before, after]`` changes of `Nodes` and `Edges`
+        :type delta_stamp: ``dict``
+        :param undo: ``True`` restores `before` state of the items, ``False`` restores `after` state
+        :type undo: ``bool``
+        """
+        target = 0 if undo else 1
+        node_changes = [((change[0] or change[1])['id'], change[target]) for change in delta_stamp['nodes']]
+        edge_changes = [((change[0] or change[1])['id'], change[target]) for change in delta_stamp['edges']]
+
+        self.is_restoring = True
+        try:
+            with self.scene.batch():
+                self.doApplyChanges(node_changes, edge_changes)
+        finally:
+            self.is_restoring = False
+
+    def doApplyChanges(self, node_changes: list, edge_changes: list):
+        """
+        Helper function applying changes to the `Scene`
+
+        :param node_changes: list of ``(id, data)`` where ``None`` data means the `Node` should be removed
+        :type node_changes: ``list``
+        :param edge_changes: list of ``(id, data)`` where ``None`` data means the `Edge` should be removed
+        :type edge_changes: ``list``
+        """
+        # remove edges first, so they don't hold the sockets of the removed nodes
+        for edge_id, edge_data in edge_changes:
+            if edge_data is None:
+                edge = self.scene.getEdgeByID(edge_id)
+                if edge is not None: edge.remove()
+                self.edge_states.pop(edge_id, None)
+
+        hashmap = {}
+        for node_id, node_data in node_changes:
+            if node_data is None:
+                node = self.scene.getNodeByID(node_id)
+                if node is not None: node.remove()
+                self.node_states.pop(node_id, None)
+                continue
+
+            try:
+                node = self.scene.getNodeByID(node_data['id'])
+                if node is None:
+                    node = self.scene.getNodeClassFromData(node_data)(self.scene)
+                node.deserialize(node_data, hashmap, restore_id=True)
+                node.onDeserialized(node_data)
+                self.node_states[node_data['id']] = node_data
+            except Exception as e:
+                dumpException(e)
+
+        for edge_id, edge_data in edge_changes:
+            if edge_data is None: continue
+
+            # sockets of untouched nodes are not in the hashmap yet
+            for socket_id in (edge_data['start'], edge_data['end']):
+                if socket_id not in hashmap: hashmap[socket_id] = self.scene.getSocketByID(socket_id)
+
+            edge = self.scene.getEdgeByID(edge_data['id'])
+            if edge is None:
+                edge = self.scene.getEdgeClass()(self.scene)
+            edge.deserialize(edge_data, hashmap, restore_id=True)
+            self.edge_states[edge_data['id']] = edge_data
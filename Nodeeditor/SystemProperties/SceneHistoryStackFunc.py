@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the memory-budgeted storage of History Stamps used by
+:class:`~nodeeditor.SceneHistoryFunc.AllSceneHistoryFunctions`
+"""
+import json, zlib
+
+DEBUG = False
+
+#: default memory budget of the history stack in bytes
+HISTORY_BYTE_BUDGET = 64 * 1024 * 1024
+#: number of the most recent History Stamps which are kept uncompressed
+HISTORY_UNCOMPRESSED_STAMPS = 4
+
+
+class AllSceneHistoryStackFunctions():
+    """
+    Class representing list-like stack of History Stamps. The size of each stamp is tracked, older stamps are
+    compressed and the oldest stamps are evicted when the stack doesn't fit into its byte budget
+    """
+
+    def __init__(self, byte_budget: int = HISTORY_BYTE_BUDGET, uncompressed_stamps: int = HISTORY_UNCOMPRESSED_STAMPS):
+        """
+        :param byte_budget: maximum number of bytes held by the stored History Stamps
+        :type byte_budget: ``int``
+        :param uncompressed_stamps: number of the most recent History Stamps kept uncompressed
+        :type uncompressed_stamps: ``int``
+
+        :Instance Attributes:
+
+        - **byte_budget** - maximum number of bytes held by the stored History Stamps
+        - **uncompressed_stamps** - number of the most recent History Stamps kept uncompressed
+        - **stamps** - list of stored History Stamps, either ``dict`` or zlib compressed JSON ``bytes``
+        - **raw_sizes** - list of sizes of the History Stamps encoded as JSON
+        - **stored_sizes** - list of sizes of the History Stamps as they are stored
+        """
+        self.byte_budget = byte_budget
+        self.uncompressed_stamps = uncompressed_stamps
+
+        self.clear()
+
+    def __len__(self):
+        return len(self.stamps)
+
+    def __getitem__(self, index: int) -> dict:
+        stamp = self.stamps[index]
+        if isinstance(stamp, bytes):
+            return json.loads(zlib.decompress(stamp).decode('utf-8'))
+        return stamp
+
+    def __iter__(self):
+        for index in range(len(self.stamps)):
+            yield self[index]
+
+    def clear(self):
+        """Remove all History Stamps"""
+        self.stamps = []
+        self.raw_sizes = []
+        self.stored_sizes = []
+
+    def append(self, history_stamp: dict) -> int:
+        """
+        Store new History Stamp at the end of the stack. Compress older stamps and evict the oldest
+        ones if the stack doesn't fit into the byte budget
+
+        :param history_stamp: History Stamp to store
+        :type history_stamp: ``dict``
+        :return: number of History Stamps evicted from the beginning of the stack
+        :rtype: ``int``
+        """
+        size = len(json.dumps(history_stamp).encode('utf-8'))
+        self.stamps.append(history_stamp)
+        self.raw_sizes.append(size)
+        self.stored_sizes.append(size)
+
+        self.compressOlderStamps()
+        return self.evictOverBudget()
+
+    def truncate(self, length: int):
+        """
+        Drop all History Stamps after the first `length` ones
+
+        :param length: number of History Stamps to keep
+        :type length: ``int``
+        """
+        del self.stamps[length:]
+        del self.raw_sizes[length:]
+        del self.stored_sizes[length:]
+
+    def popFront(self):
+        """Drop the oldest History Stamp"""
+        del self.stamps[0]
+        del self.raw_sizes[0]
+        del self.stored_sizes[0]
+
+    def compressOlderStamps(self):
+        """Compress History Stamps which are not among the `uncompressed_stamps` most recent ones"""
+        for index in range(len(self.stamps) - self.uncompressed_stamps - 1, -1, -1):
+            if isinstance(self.stamps[index], bytes):
+                # everything before is compressed already
+                break
+            self.stamps[index] = zlib.compress(json.dumps(self.stamps[index]).encode('utf-8'))
+            self.stored_sizes[index] = len(self.stamps[index])
+
+    def evictOverBudget(self) -> int:
+        """
+        Evict the oldest History Stamps until the stack fits into its byte budget. The newest stamp is always kept
+
+        :return: number of evicted History Stamps
+        :rtype: ``int``
+        """
+        evicted = 0
+        total_size = sum(self.stored_sizes)
+        while total_size > self.byte_budget and len(self.stamps) > 1:
+            total_size -= self.stored_sizes[0]
+            self.popFront()
+            evicted += 1
+        if DEBUG and evicted: print("HistoryStack: evicted %d stamps, %d bytes left" % (evicted, total_size))
+        return evicted
+
+    def getStats(self) -> dict:
+        """
+        Return statistics of this History Stack
+
+        :return: ``dict`` with 'stamps' - number of stored stamps, 'raw_bytes' - size of the stamps encoded as JSON
+            and 'compressed_bytes' - size of the stamps as they are stored
+        :rtype: ``dict``
+        """
+        return {
+            'stamps': len(self.stamps),
+            'raw_bytes': sum(self.raw_sizes),
+            'compressed_bytes': sum(self.stored_sizes),
+        }
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the liveness-based memory planner of
+:class:`~nodeeditor.SceneCompilerFunc.AllSceneCompilerFunctions`. From the topological order of the optimized steps
+and the number of their consumers the planner knows after which step every intermediate value is read for the last
+time. The values are kept in a few reusable slots instead of one variable per `Node`, so an intermediate is freed
+as soon as its last consumer has read it.
+
+When arrays go through the graph, the vectorized operations write into buffers taken from a pool. A dead
+intermediate returns its buffer to the pool, where the next step (or the next pass) reuses it instead of
+allocating a new one. Values of the `Output Nodes` are never recycled, they belong to the caller. Neither are the
+values selected by an `Output Node`, which may be passed on after their step dies.
+
+Example:
+
+.. code-block:: python
+
+    scene.compiler.evaluate({input_node: frame})
+    scene.compiler.planner.getStats()       # {'peak_bytes': ..., 'naive_bytes': ..., 'reused': ..., ...}
+    scene.compiler.planner.estimate([frame])    # peak estimate without evaluating
+"""
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, getUfuncResultLayout, isArray, \
+    NODE_UFUNCS
+from Nodeeditor.SystemProperties.SceneOptimizerFunc import STEP_INPUT, STEP_CONSTANT, STEP_OPERATION, STEP_SELECT
+try:
+    import numpy as np
+except ImportError:
+    # without NumPy there are no buffers to recycle, slots are still planned
+    np = None
+
+DEBUG = False
+
+
+def getValueBytes(value) -> int:
+    """Return number of bytes held by the array value, scalars are not counted"""
+    return value.nbytes if isArray(value) else 0
+
+
+class AllSceneMemoryPlannerFunctions():
+    """Class contains all the code for planning the lifetime of the intermediate values of the compiled `Scene`"""
+
+    def __init__(self, compiler: 'AllSceneCompilerFunctions'):
+        """
+        :param compiler: Reference to the compiler owning this planner
+        :type compiler: :class:`~nodeeditor.SceneCompilerFunc.AllSceneCompilerFunctions`
+
+        :Instance Attributes:
+
+        - **compiler** - reference to the :class:`~nodeeditor.SceneCompilerFunc.AllSceneCompilerFunctions`
+        - **enabled** - ``False`` evaluates arrays by the compiled function without recycling the buffers
+        - **slots** - slot of every step of the `plan` of the compiler
+        - **num_slots** - number of slots the plan needs
+        - **releases** - ``dict`` of step index -> steps whose value is read for the last time by this step
+        - **buffers** - pool of free arrays, ``dict`` of ``(shape, dtype)`` -> list of arrays, kept across passes
+        - **stats** - ``dict`` with 'steps', 'slots', 'peak_bytes', 'naive_bytes', 'allocated' and 'reused'
+          of the last pass
+        """
+        self.compiler = compiler
+        self.enabled = True
+
+        self.slots = []
+        self.num_slots = 0
+        self.releases = {}
+
+        self.buffers = {}
+        self.stats = {}
+
+    def plan(self):
+        """Compute the last consumer of every step and assign the steps to slots by a linear scan"""
+        steps, output_steps = self.compiler.plan, self.compiler.output_steps
+
+        # outputs are read after the last step, values nobody reads die right away
+        last_uses = {}
+        for index, (kind, payload, input_steps) in enumerate(steps):
+            if kind in (STEP_OPERATION, STEP_SELECT):
+                for input_index in input_steps: last_uses[input_index] = index
+        for index in output_steps:
+            if index is not None: last_uses[index] = len(steps)
+
+        self.slots, self.num_slots, self.releases = [], 0, {}
+        free_slots = []
+        for index, (kind, payload, input_steps) in enumerate(steps):
+            dying = sorted(set(input_index for input_index in (input_steps or []) if last_uses[input_index] == index))
+            if dying: self.releases[index] = dying
+            # a slot freed by the inputs can take the result, the inputs are read before the slot is written
+            free_slots += [self.slots[input_index] for input_index in dying]
+
+            if free_slots:
+                self.slots.append(free_slots.pop())
+            else:
+                self.slots.append(self.num_slots)
+                self.num_slots += 1
+
+            if index not in last_uses:
+                self.releases.setdefault(index, []).append(index)
+                free_slots.append(self.slots[index])
+
+        self.buffers = {}
+        self.stats = {'steps': len(steps), 'slots': self.num_slots}
+        if DEBUG: print("PLANNER: %d steps in %d slots" % (len(steps), self.num_slots))
+
+    def getStats(self) -> dict:
+        """
+        Return the memory statistics of the last pass
+
+        :return: ``dict`` with 'steps', 'slots', 'peak_bytes' (arrays alive at once), 'naive_bytes' (arrays kept
+            until the end of the pass without planning), 'allocated' and 'reused' buffers
+        :rtype: ``dict``
+        """
+        return dict(self.stats)
+
+    def getSlotName(self, index: int) -> str:
+        """Return variable name of the step in the generated source"""
+        return "s%d" % self.slots[index]
+
+    def acquireBuffer(self, shape: tuple, dtype) -> 'numpy.ndarray':
+        """Return free buffer of the shape and dtype from the pool, allocate new one if there is none"""
+        free_buffers = self.buffers.get((shape, dtype.str))
+        if free_buffers:
+            self.stats['reused'] += 1
+            return free_buffers.pop()
+        self.stats['allocated'] += 1
+        return np.empty(shape, dtype=dtype)
+
+    def releaseBuffer(self, buffer: 'numpy.ndarray'):
+        """Return the buffer of a dead intermediate into the pool"""
+        self.buffers.setdefault((buffer.shape, buffer.dtype.str), []).append(buffer)
+
+    def computeStep(self, title: str, input_values: list, pooled: bool) -> ('value', bool):
+        """
+        Compute the operation. Array results are written into a pooled buffer if `pooled` is ``True``
+
+        :return: computed value (``None`` if it fails) and ``True`` if the value is a pooled buffer
+        :rtype: ``tuple``
+        """
+        first_value, second_value = input_values
+        if pooled and title in NODE_UFUNCS and first_value is not None and second_value is not None and \
+                (isArray(first_value) or isArray(second_value)):
+            try:
+                shape, dtype = getUfuncResultLayout(title, first_value, second_value)
+            except (ValueError, TypeError, ArithmeticError):
+                # shapes don't broadcast or a Python int overflows the dtype, the operation fails the same way
+                return None, False
+            buffer = self.acquireBuffer(shape, dtype)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                NODE_UFUNCS[title](first_value, second_value, out=buffer)
+            return buffer, True
+
+        try:
+            return computeOperation(title, input_values), False
+        except (ValueError, TypeError, ArithmeticError):
+            return None, False
+
+    def run(self, input_arguments: dict) -> tuple:
+        """
+        Evaluate the `plan` of the compiler slot by slot. Dead intermediates are dropped right after their last
+        consumer, their buffers are recycled
+
+        :param input_arguments: ``dict`` of `Input Node` -> value
+        :type input_arguments: ``dict``
+        :return: values of the `output_nodes` of the compiler
+        :rtype: ``tuple``
+        """
+        steps, output_steps = self.compiler.plan, self.compiler.output_steps
+        # selected values are passed on, their buffers must not go back to the pool
+        unpooled = set(index for index in output_steps if index is not None)
+        for kind, payload, input_steps in steps:
+            if kind == STEP_SELECT: unpooled.update(input_steps)
+        self.stats.update({'peak_bytes': 0, 'naive_bytes': 0, 'allocated': 0, 'reused': 0})
+
+        values = [None] * self.num_slots
+        pooled = set()
+        live_bytes = 0
+        for index, (kind, payload, input_steps) in enumerate(steps):
+            if kind == STEP_INPUT:
+                value = input_arguments[payload]
+            elif kind == STEP_CONSTANT:
+                value = payload
+            elif kind == STEP_SELECT:
+                value = next((values[self.slots[input_index]] for input_index in input_steps
+                              if values[self.slots[input_index]] is not None), None)
+            else:
+                input_values = [values[self.slots[input_index]] for input_index in input_steps]
+                # buffers of dying inputs go back first, so the result can be computed in place
+                for input_index in self.releases.get(index, []):
+                    if input_index in pooled: self.releaseBuffer(values[self.slots[input_index]])
+                value, is_pooled = self.computeStep(payload, input_values, index not in unpooled)
+                if is_pooled: pooled.add(index)
+                del input_values
+
+            for released_index in self.releases.get(index, []):
+                if released_index == index: continue
+                live_bytes -= getValueBytes(values[self.slots[released_index]])
+                values[self.slots[released_index]] = None
+
+            # a selected value shares the memory of its input, it's counted twice while both steps are alive
+            values[self.slots[index]] = value
+            live_bytes += getValueBytes(value)
+            if kind != STEP_SELECT: self.stats['naive_bytes'] += getValueBytes(value)
+            self.stats['peak_bytes'] = max(self.stats['peak_bytes'], live_bytes)
+
+            if index in self.releases and index in self.releases[index]:
+                # nobody reads this value
+                if index in pooled: self.releaseBuffer(value)
+                live_bytes -= getValueBytes(value)
+                values[self.slots[index]] = None
+
+        return tuple(values[self.slots[index]] if index is not None else None for index in output_steps)
+
+    def estimate(self, arguments: list) -> dict:
+        """
+        Estimate the memory of the arrays computed by the `plan` from the shapes and dtypes of the arguments,
+        without evaluating it
+
+        :param arguments: values (or arrays of the same shape and dtype) of the `input_nodes` of the compiler
+        :type arguments: ``list``
+        :return: ``dict`` with 'peak_bytes' (intermediates alive at once) and 'naive_bytes' (all intermediates)
+        :rtype: ``dict``
+        """
+        input_arguments = dict(zip(self.compiler.input_nodes, arguments))
+        # scalars are kept, arrays are replaced by zero-strided stand-ins of their layout without holding memory
+        samples, live, peak_bytes, naive_bytes = {}, {}, 0, 0
+        for index, (kind, payload, input_steps) in enumerate(self.compiler.plan):
+            if kind == STEP_INPUT:
+                sample = input_arguments.get(payload, 0)
+            elif kind == STEP_CONSTANT:
+                sample = payload
+            elif kind == STEP_SELECT:
+                sample = next((samples[input_index] for input_index in input_steps
+                               if samples[input_index] is not None), None)
+            else:
+                sample = self.estimateStep(payload, [samples[input_index] for input_index in input_steps])
+            samples[index] = np.broadcast_to(np.zeros((), sample.dtype), sample.shape) if isArray(sample) else sample
+
+            size = getValueBytes(sample)
+            if kind != STEP_SELECT: naive_bytes += size
+
+            for released_index in self.releases.get(index, []):
+                if released_index != index: live.pop(released_index, None)
+            live[index] = size
+            peak_bytes = max(peak_bytes, sum(live.values()))
+            if index in self.releases.get(index, []): del live[index]
+
+        return {'peak_bytes': peak_bytes, 'naive_bytes': naive_bytes}
+
+    def estimateStep(self, title: str, samples: list):
+        """Return stand-in of the value of the operation on the stand-ins of its inputs, ``None`` if it fails"""
+        if title in NODE_UFUNCS and any(isArray(sample) for sample in samples) and \
+                all(sample is not None for sample in samples):
+            try:
+                shape, dtype = getUfuncResultLayout(title, samples[0], samples[1])
+            except (ValueError, TypeError, ArithmeticError):
+                return None
+            return np.broadcast_to(np.zeros((), dtype), shape)
+        try:
+            # scalars are cheap to compute
+            return computeOperation(title, samples)
+        except (ValueError, TypeError, ArithmeticError):
+            return None
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the optimization pass run by :class:`~nodeeditor.SceneCompilerFunc.AllSceneCompilerFunctions`
+before the code generation. The `Nodes` and `Edges` of the `Scene` are lowered into a minimal list of steps:
+
+- dead `Nodes` which don't reach any `Output Node` are dropped
+- subgraphs fed only by constant `Input Nodes` are computed once (constant folding)
+- structurally identical operations on the same steps are merged (common-subexpression elimination)
+
+`Output Nodes` are lowered into a selection of the first of their inputs which is not ``None`` when the graph runs,
+like :func:`~nodeeditor.SceneEvaluationFunc.computeOperation` does, so all their inputs stay live.
+"""
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, NODE_OPERATIONS, NODE_TITLE_INPUT, \
+    NODE_TITLE_OUTPUT
+
+DEBUG = False
+
+STEP_INPUT = 1          #: step reading the argument of an `Input Node`
+STEP_CONSTANT = 2       #: step holding a constant value, ``None`` for statically invalid `Nodes`
+STEP_OPERATION = 3      #: step applying the binary operation to the values of two other steps
+STEP_SELECT = 4         #: step passing the value of the first of its input steps which is not ``None``
+
+
+class AllSceneOptimizerFunctions():
+    """Class contains all the code for optimizing the `Scene` before it's compiled"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **constant_inputs** - ``dict`` of `Input Node` -> value which is folded into the compiled graph
+        - **steps** - list of ``(kind, payload, input steps)``, payload is the `Input Node`, the constant value
+          or the `Node` title of the operation or of the `Output Node`
+        - **input_nodes** - live `Input Nodes` which are not constant, in the order of their steps
+        - **output_nodes** - all `Output Nodes`
+        - **output_steps** - index of the step computing each of the `output_nodes` or ``None``
+        - **is_compilable** - ``False`` if a live `Node` overrides `eval`
+        - **stats** - ``dict`` with 'nodes', 'eliminated', 'folded', 'merged' and 'steps' of the last pass
+        """
+        self.scene = scene
+
+        self.constant_inputs = {}
+
+        self.steps = []
+        self.input_nodes = []
+        self.output_nodes = []
+        self.output_steps = []
+        self.is_compilable = True
+        self.stats = {}
+
+        self.step_keys = {}
+
+    def setConstantInput(self, node: 'Node', value):
+        """
+        Treat the `Input Node` as a constant, so the subgraph fed only by constants is computed during compilation
+
+        :param node: `Input` :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param value: constant value
+        """
+        if node.title != NODE_TITLE_INPUT:
+            raise ValueError("Only Input nodes can be constant, got '%s'" % node.title)
+        self.constant_inputs[node] = value
+        self.scene.compiler.invalidate()
+
+    def removeConstantInput(self, node: 'Node'):
+        """Make the `Input Node` an argument of the compiled function again"""
+        if node in self.constant_inputs:
+            del self.constant_inputs[node]
+            self.scene.compiler.invalidate()
+
+    def getLiveNodes(self) -> set:
+        """
+        Return the `Nodes` reachable backwards from any `Output Node`
+
+        :rtype: ``set``
+        """
+        evaluator = self.scene.evaluator
+        live = set()
+        stack = [node for node in self.scene.nodes if node.title == NODE_TITLE_OUTPUT]
+        while stack:
+            node = stack.pop()
+            if node in live: continue
+            live.add(node)
+            stack += [input_node for input_node in evaluator.getInputNodes(node) if input_node is not None]
+        return live
+
+    def addStep(self, kind: int, payload, input_steps: list = None) -> int:
+        """
+        Append the step unless the same step exists already
+
+        :return: index of the step
+        :rtype: ``int``
+        """
+        if kind == STEP_CONSTANT:
+            self.steps.append((kind, payload, None))
+            return len(self.steps) - 1
+
+        key = (kind, payload if kind in (STEP_OPERATION, STEP_SELECT) else id(payload), tuple(input_steps or ()))
+        if key in self.step_keys:
+            self.stats['merged'] += 1
+            return self.step_keys[key]
+
+        self.steps.append((kind, payload, input_steps))
+        self.step_keys[key] = len(self.steps) - 1
+        return len(self.steps) - 1
+
+    def isConstantStep(self, index: int) -> bool:
+        """Return ``True`` if the step holds a constant value"""
+        return self.steps[index][0] == STEP_CONSTANT
+
+    def isInvalidStep(self, index: int) -> bool:
+        """Return ``True`` if the step is statically invalid"""
+        return self.steps[index][0] == STEP_CONSTANT and self.steps[index][1] is None
+
+    def lowerOperation(self, title: str, input_steps: list) -> int:
+        """
+        Add the step of a binary operation. Operations on constants are folded
+
+        :param title: title of the `Node`
+        :type title: ``str``
+        :param input_steps: steps feeding the inputs of the `Node`, ``None`` for the inputs without connection
+        :type input_steps: ``list``
+        :return: index of the step
+        :rtype: ``int``
+        """
+        if len(input_steps) < 2 or input_steps[0] is None or input_steps[1] is None or \
+                self.isInvalidStep(input_steps[0]) or self.isInvalidStep(input_steps[1]):
+            return self.addStep(STEP_CONSTANT, None)
+
+        input_steps = input_steps[:2]
+        if self.isConstantStep(input_steps[0]) and self.isConstantStep(input_steps[1]):
+            self.stats['folded'] += 1
+            try:
+                value = computeOperation(title, [self.steps[index][1] for index in input_steps])
+            except (ValueError, TypeError, ArithmeticError):
+                value = None
+            return self.addStep(STEP_CONSTANT, value)
+
+        # inputs are never swapped, ``a + b`` and ``b + a`` differ for strings, lists and tuples
+        return self.addStep(STEP_OPERATION, title, input_steps)
+
+    def lowerOutput(self, input_steps: list) -> int:
+        """
+        Add the step of an `Output Node`, which passes its first input that is not ``None`` when the graph runs.
+        Statically invalid inputs are skipped, inputs after a valid constant can never be selected
+
+        :param input_steps: steps feeding the inputs of the `Node`, ``None`` for the inputs without connection
+        :type input_steps: ``list``
+        :return: index of the step
+        :rtype: ``int``
+        """
+        candidates = []
+        for index in input_steps:
+            if index is None or self.isInvalidStep(index): continue
+            candidates.append(index)
+            if self.isConstantStep(index): break
+
+        if not candidates: return self.addStep(STEP_CONSTANT, None)
+        if len(candidates) == 1: return candidates[0]
+        return self.addStep(STEP_SELECT, NODE_TITLE_OUTPUT, candidates)
+
+    def optimize(self):
+        """Lower the live `Nodes` of the `Scene` into the minimal list of steps"""
+        evaluator = self.scene.evaluator
+        order = evaluator.getTopologicalOrder()
+        live = self.getLiveNodes()
+
+        # forget the removed nodes
+        if self.constant_inputs:
+            nodes = set(self.scene.nodes)
+            self.constant_inputs = {node: value for node, value in self.constant_inputs.items() if node in nodes}
+
+        self.steps, self.step_keys = [], {}
+        self.input_nodes, self.output_nodes, self.output_steps = [], [], []
+        self.is_compilable = True
+        self.stats = {'nodes': len(self.scene.nodes), 'eliminated': len(self.scene.nodes) - len(live),
+                      'folded': 0, 'merged': 0, 'steps': 0}
+
+        node_steps = {}
+        for node in order:
+            if node not in live: continue
+            if type(node).eval is not AllNodeFunctions.eval: self.is_compilable = False
+            input_steps = [node_steps.get(input_node) for input_node in evaluator.getInputNodes(node)]
+
+            if node.title == NODE_TITLE_INPUT:
+                if node in self.constant_inputs:
+                    node_steps[node] = self.addStep(STEP_CONSTANT, self.constant_inputs[node])
+                else:
+                    self.input_nodes.append(node)
+                    node_steps[node] = self.addStep(STEP_INPUT, node)
+            elif node.title == NODE_TITLE_OUTPUT:
+                node_steps[node] = self.lowerOutput(input_steps)
+                self.output_nodes.append(node)
+            elif node.title in NODE_OPERATIONS:
+                node_steps[node] = self.lowerOperation(node.title, input_steps)
+            else:
+                node_steps[node] = self.addStep(STEP_CONSTANT, None)
+
+        # outputs in cycles can't be computed, but they are still returned
+        self.output_nodes += [node for node in evaluator.cyclic_nodes if node.title == NODE_TITLE_OUTPUT]
+        self.output_steps = [node_steps.get(node) for node in self.output_nodes]
+
+        self.removeUnusedSteps()
+        self.stats['steps'] = len(self.steps)
+        if DEBUG: print("OPTIMIZER:", self.stats)
+
+    def removeUnusedSteps(self):
+        """Drop the steps which are not needed by any output, i.e. constants consumed by folding"""
+        used = set()
+        stack = [index for index in self.output_steps if index is not None]
+        while stack:
+            index = stack.pop()
+            if index in used: continue
+            used.add(index)
+            stack += self.steps[index][2] if self.steps[index][0] in (STEP_OPERATION, STEP_SELECT) else []
+
+        # keep the live inputs, they are arguments of the compiled function
+        used |= set(index for index, step in enumerate(self.steps) if step[0] == STEP_INPUT)
+
+        new_indices = {}
+        steps = []
+        for index, (kind, payload, input_steps) in enumerate(self.steps):
+            if index not in used: continue
+            new_indices[index] = len(steps)
+            if kind in (STEP_OPERATION, STEP_SELECT):
+                input_steps = [new_indices[input_index] for input_index in input_steps]
+            steps.append((kind, payload, input_steps))
+
+        self.steps = steps
+        self.output_steps = [new_indices.get(index) if index is not None else None for index in self.output_steps]
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the parallel evaluation scheduler of the `Scene`. `Nodes` whose inputs are all evaluated are
+put into a ready queue and computed concurrently on a thread or process pool. Results are collected in
+a thread-safe queue and applied to the `Nodes` only on the thread owning the `Scene` - in the editor a ``QTimer``
+drains the queue, so the UI stays responsive while the graph evaluates. `Nodes` with ``async def eval`` run
+as tasks on the loop of :class:`~nodeeditor.SceneAsyncFunc.AllSceneAsyncFunctions` and deliver their values
+through the same queue.
+
+Example:
+
+.. code-block:: python
+
+    scene.scheduler.setExecutor(max_workers=4, use_processes=True)
+    outputs = scene.scheduler.evaluate()        # blocking, i.e. headless
+    scene.scheduler.start()                     # non-blocking, results applied by QTimer
+"""
+import queue, asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from Nodeeditor.SystemProperties.utils_no_qt import dumpException
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, NODE_OPERATIONS
+from Nodeeditor.SystemProperties.SceneAsyncFunc import isAsyncNode, isLoopRunning
+from Nodeeditor.SystemProperties.SceneSharedMemoryFunc import AllSceneSharedMemoryFunctions, SharedArrayHandle, \
+    computeSharedOperation, isSharedMemoryAvailable
+try:
+    from PyQt5.QtCore import QTimer
+except ImportError:
+    # PyQt5 is not available, results are applied by wait()
+    QTimer = None
+
+DEBUG = False
+
+#: interval in ms in which the ``QTimer`` applies finished results on the Qt thread
+SCHEDULER_POLL_INTERVAL = 5
+
+
+class AllSceneSchedulerFunctions():
+    """Class contains all the code for evaluating independent `Nodes` of the `Scene` concurrently"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **executor** - ``concurrent.futures`` executor computing the `Nodes` or ``None`` until it's needed
+        - **is_running** - ``True`` while an evaluation is in progress
+        - **structure_version** - `structure_version` of the evaluator when the evaluation started
+        - **pending_counts** - ``dict`` of `Node` -> number of its input `Nodes` which are not evaluated yet
+        - **dependents** - ``dict`` of `Node` -> list of `Nodes` waiting for its value
+        - **ready_nodes** - ``deque`` of `Nodes` whose inputs are all evaluated
+        - **results** - thread-safe ``queue.Queue`` of finished ``(node, cache key, value, exception)``
+        - **in_flight** - number of `Nodes` submitted to the executor or the asyncio loop and not applied yet
+        - **async_tasks** - ``dict`` of async `Node` -> its task on the loop of the async evaluator
+        - **transport** - :class:`~nodeeditor.SceneSharedMemoryFunc.AllSceneSharedMemoryFunctions` passing large
+          arrays to the process pool in shared memory, ``None`` for thread pools
+        - **consumer_counts** - ``dict`` of `Node` -> number of `Nodes` consuming its value in this pass
+        - **timer** - ``QTimer`` applying the results on the Qt thread or ``None`` for headless `Scenes`
+        """
+        self.scene = scene
+
+        self.executor = None
+        self.is_running = False
+        self.structure_version = None
+
+        self.pending_counts = {}
+        self.dependents = {}
+        self.ready_nodes = deque()
+        self.results = queue.Queue()
+        self.in_flight = 0
+        self.async_tasks = {}
+
+        self.transport = None
+        self.consumer_counts = {}
+
+        self.timer = None
+
+        # listeners
+        self._evaluation_finished_listeners = []
+
+    def addEvaluationFinishedListener(self, callback: 'function'):
+        """
+        Register callback for `Evaluation Finished` event. The callback gets ``dict`` of the `Output Nodes` values
+
+        :param callback: callback function
+        """
+        self._evaluation_finished_listeners.append(callback)
+
+    def setExecutor(self, max_workers: int = None, use_processes: bool = False, shared_memory: bool = True):
+        """
+        Create the pool computing the `Nodes`. The previous pool is shut down
+
+        :param max_workers: number of workers, ``None`` lets ``concurrent.futures`` decide
+        :type max_workers: ``int``
+        :param use_processes: ``True`` for ``ProcessPoolExecutor``, ``False`` for ``ThreadPoolExecutor``
+        :type use_processes: ``bool``
+        :param shared_memory: ``True`` passes large arrays to the processes in shared memory instead of pickling
+        :type shared_memory: ``bool``
+        """
+        self.shutdown()
+        # the transport has to exist before the processes are started, they share its resource tracker
+        if use_processes and shared_memory and isSharedMemoryAvailable():
+            self.transport = AllSceneSharedMemoryFunctions()
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=max_workers)
+
+    def shutdown(self):
+        """Cancel running evaluation and shut the pool down"""
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self.transport is not None:
+            self.transport.clear()
+            self.transport = None
+
+    def isOffloaded(self, node: 'Node') -> bool:
+        """Return ``True`` if the `Node` is computed on the pool. `Nodes` with overridden `eval` and trivial
+        `Input`/`Output` `Nodes` are evaluated directly on the thread owning the `Scene`"""
+        return node.title in NODE_OPERATIONS and type(node).eval is AllNodeFunctions.eval
+
+    def start(self) -> bool:
+        """
+        Start evaluating the `Dirty` `Nodes` without blocking. In the editor the results are applied by ``QTimer``,
+        otherwise :func:`wait` or :func:`processResults` has to be called
+
+        :return: ``False`` if an evaluation is already running
+        :rtype: ``bool``
+        """
+        if self.is_running: return False
+        if self.executor is None: self.setExecutor()
+
+        evaluator = self.scene.evaluator
+        to_evaluate = evaluator.getNodesToEvaluate()
+        self.structure_version = evaluator.structure_version
+
+        # dependency counts are built from the socket/edge structure of the nodes evaluated in this pass
+        scheduled = set(to_evaluate)
+        self.pending_counts, self.dependents = {}, {}
+        for node in to_evaluate:
+            input_nodes = set(input_node for input_node in evaluator.getInputNodes(node) if input_node in scheduled)
+            self.pending_counts[node] = len(input_nodes)
+            for input_node in input_nodes: self.dependents.setdefault(input_node, []).append(node)
+
+        # shared blocks live until all consumers of this pass are done, values of the nodes which are not
+        # evaluated again are consumed as well
+        self.consumer_counts = {}
+        for node in to_evaluate:
+            for input_node in set(evaluator.getInputNodes(node)):
+                if input_node is not None: self.consumer_counts[input_node] = self.consumer_counts.get(input_node, 0) + 1
+        if self.transport is not None: self.transport.unlinkAll()
+
+        # nodes stay dirty until their result is applied, so a cancelled evaluation can be started over
+        for node in to_evaluate: node.markDirty()
+
+        self.ready_nodes = deque(node for node in to_evaluate if self.pending_counts[node] == 0)
+        self.results = queue.Queue()
+        self.in_flight = 0
+        evaluator.evaluated_count = len(to_evaluate)
+        self.is_running = True
+        if DEBUG: print("SCHEDULER: starting evaluation of %d nodes" % len(to_evaluate))
+
+        self.submitReadyNodes()
+        if not self.isActive():
+            self.finish()
+        elif QTimer is not None and not self.scene.isHeadless():
+            self.startTimer()
+        return True
+
+    def startTimer(self):
+        """Start ``QTimer`` applying the results on the Qt thread"""
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setInterval(SCHEDULER_POLL_INTERVAL)
+            self.timer.timeout.connect(self.processResults)
+        self.timer.start()
+
+    def isActive(self) -> bool:
+        """Return ``True`` if some `Nodes` are ready, submitted or waiting for their inputs"""
+        return len(self.ready_nodes) > 0 or self.in_flight > 0
+
+    def submitReadyNodes(self):
+        """Submit the ready `Nodes` to the pool, cheap `Nodes` are evaluated right away"""
+        evaluator = self.scene.evaluator
+        while self.ready_nodes:
+            node = self.ready_nodes.popleft()
+            if isAsyncNode(node):
+                self.submitAsyncNode(node)
+                continue
+            if not self.isOffloaded(node):
+                self.applyResult(node, node.eval(), None, computed=True)
+                continue
+
+            input_values = evaluator.getNodeInputValues(node)
+            if self.transport is not None:
+                input_values = [self.transport.getArgument(input_node, value, self.consumer_counts.get(input_node, 0))
+                                if input_node is not None else value
+                                for input_node, value in zip(evaluator.getInputNodes(node), input_values)]
+
+            # don't bother the pool with values which are cached already, arrays and shared arrays are not cached
+            key = None
+            if not any(isinstance(value, SharedArrayHandle) for value in input_values):
+                key = evaluator.getCacheKey(node, input_values)
+            if key is not None:
+                found, value = evaluator.cache.lookup(key)
+                if found:
+                    self.applyResult(node, value)
+                    continue
+
+            self.in_flight += 1
+            if self.transport is not None:
+                future = self.executor.submit(computeSharedOperation, node.title, input_values,
+                                              evaluator.input_values.get(node, 0), self.transport.min_bytes)
+            else:
+                future = self.executor.submit(computeOperation, node.title, input_values, evaluator.input_values.get(node, 0))
+            # results of a cancelled evaluation go to its own, already dropped queue
+            future.add_done_callback(lambda future, node=node, key=key, results=self.results: self.onFutureDone(
+                future, node, key, results))
+
+    def submitAsyncNode(self, node: 'Node'):
+        """Start ``eval`` of the async `Node` as a task on the loop of the async evaluator, without waiting"""
+        async_evaluator = self.scene.async_evaluator
+        task = async_evaluator.getLoop().create_task(async_evaluator.evaluateNode(node))
+        # the task can be cancelled by cancelNode of the async evaluator
+        async_evaluator.node_tasks[node] = task
+        self.async_tasks[node] = task
+        self.in_flight += 1
+        task.add_done_callback(lambda task, node=node, results=self.results: self.onTaskDone(task, node, results))
+        if QTimer is not None and not self.scene.isHeadless(): async_evaluator.startTimer()
+
+    def onTaskDone(self, task: 'asyncio.Task', node: 'Node', results: 'queue.Queue'):
+        """
+        Put the value of the async `Node` into the queue. Called on the asyncio loop
+
+        :param task: finished task of :func:`~nodeeditor.SceneAsyncFunc.AllSceneAsyncFunctions.evaluateNode`
+        :param node: evaluated async :class:`~nodeeditor.node_node.Node`
+        :param results: queue of the evaluation which submitted the `Node`
+        """
+        if self.async_tasks.get(node) is task: del self.async_tasks[node]
+        node_tasks = self.scene.async_evaluator.node_tasks
+        if node_tasks.get(node) is task: del node_tasks[node]
+        # evaluateNode sets the flags of the node and returns None if it fails or is cancelled
+        results.put((node, None, None if task.cancelled() else task.result(), None))
+
+    def onFutureDone(self, future: 'Future', node: 'Node', key: tuple, results: 'queue.Queue'):
+        """
+        Put the result of the pool into the queue. Called on the thread of the pool
+
+        :param future: finished future
+        :param node: computed :class:`~nodeeditor.node_node.Node`
+        :param key: cache key of the value or ``None``
+        :param results: queue of the evaluation which submitted the `Node`
+        """
+        if future.exception() is not None:
+            results.put((node, key, None, future.exception()))
+            return
+        value = future.result()
+        if results is not self.results and isinstance(value, SharedArrayHandle):
+            # nobody will receive the block of a cancelled evaluation
+            self.transport.discard(value)
+            return
+        results.put((node, key, value, None))
+
+    def processResults(self, block: bool = False):
+        """
+        Apply the finished results and submit the `Nodes` which became ready. Must be called on the thread owning
+        the `Scene`
+
+        :param block: ``True`` waits for at least one result
+        :type block: ``bool``
+        """
+        if not self.is_running: return
+
+        # nodes or edges were added, removed or reconnected meanwhile, start over with the new structure
+        if self.structure_version != self.scene.evaluator.structure_version:
+            if DEBUG: print("SCHEDULER: structure changed, restarting")
+            self.cancel()
+            self.start()
+            return
+
+        try:
+            while True:
+                node, key, value, exception = self.results.get(block=block)
+                block = False
+                self.in_flight -= 1
+                shared = isinstance(value, SharedArrayHandle)
+                # the handle dies with its block, the cache keeps the mapped array which stays valid in this process
+                if shared: value = self.transport.receive(node, value, self.consumer_counts.get(node, 0))
+                if exception is None and key is not None: self.scene.evaluator.cache.store(key, value)
+                self.applyResult(node, value, exception, computed=isAsyncNode(node), shared=shared)
+        except queue.Empty:
+            pass
+
+        self.submitReadyNodes()
+        if not self.isActive(): self.finish()
+
+    def applyResult(self, node: 'Node', value, exception: Exception = None, computed: bool = False,
+                    shared: bool = False):
+        """
+        Store the value of the `Node` and release its dependents
+
+        :param node: evaluated :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param value: computed value
+        :param exception: exception raised by the computation or ``None``
+        :type exception: ``Exception``
+        :param computed: ``True`` if the value comes from `Node.eval` which did set the flags already
+        :type computed: ``bool``
+        :param shared: ``True`` if the value is mapped onto a shared memory block received from the pool
+        :type shared: ``bool``
+        """
+        if not computed:
+            node.markDirty(False)
+            node.markInvalid(exception is not None)
+            if exception is not None and not isinstance(exception, (ValueError, TypeError, ArithmeticError)):
+                dumpException(exception)
+        self.scene.evaluator.values[node] = value if exception is None else None
+
+        if self.transport is not None:
+            # the block of the previous value isn't needed anymore, inputs have one consumer less
+            if not shared: self.transport.forget(node)
+            for input_node in set(self.scene.evaluator.getInputNodes(node)):
+                if input_node is not None: self.transport.release(input_node)
+
+        for dependent in self.dependents.get(node, []):
+            self.pending_counts[dependent] -= 1
+            if self.pending_counts[dependent] == 0: self.ready_nodes.append(dependent)
+
+    def wait(self) -> dict:
+        """
+        Block until the running evaluation finishes, applying the results on the calling thread
+
+        :return: values of the `Output Nodes`
+        :rtype: ``dict``
+        :raises: ``RuntimeError`` if async `Nodes` are running and an asyncio loop is running in this thread,
+            use :func:`start` there
+        """
+        if self.async_tasks and isLoopRunning():
+            raise RuntimeError("Scene with async nodes can't be evaluated by blocking inside of a running asyncio "
+                               "loop, use start() and let the loop apply the results")
+        loop = self.scene.async_evaluator.getLoop()
+
+        while self.is_running:
+            if not self.async_tasks:
+                self.processResults(block=True)
+                continue
+            # async nodes make progress only while the loop runs, results of the pool are checked meanwhile
+            loop.run_until_complete(asyncio.wait(list(self.async_tasks.values()),
+                                                 timeout=SCHEDULER_POLL_INTERVAL / 1000,
+                                                 return_when=asyncio.FIRST_COMPLETED))
+            self.processResults()
+        return self.scene.evaluator.getOutputValues()
+
+    def evaluate(self) -> dict:
+        """
+        Evaluate the `Dirty` `Nodes` on the pool and block until all of them are done
+
+        :return: values of the `Output Nodes`
+        :rtype: ``dict``
+        """
+        self.start()
+        return self.wait()
+
+    def cancel(self):
+        """Stop the running evaluation. `Nodes` which haven't been applied stay `Dirty`"""
+        if self.timer is not None: self.timer.stop()
+        self.is_running = False
+        self.ready_nodes.clear()
+        self.in_flight = 0
+        for task in list(self.async_tasks.values()): task.cancel()
+        self.async_tasks = {}
+        # results of the submitted nodes are dropped with the old queue
+        self.results = queue.Queue()
+
+    def finish(self):
+        """Finish the evaluation and trigger `Evaluation Finished` event"""
+        if self.timer is not None: self.timer.stop()
+        self.is_running = False
+        self.scene.evaluator.markCyclicNodes()
+
+        outputs = self.scene.evaluator.getOutputValues()
+        if DEBUG: print("SCHEDULER: finished", outputs)
+        for callback in self._evaluation_finished_listeners: callback(outputs)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the shared-memory transport of large arrays between the process pool of
+:class:`~nodeeditor.SceneSchedulerFunc.AllSceneSchedulerFunctions` and the `Scene`. Arrays (NumPy values, OpenCV
+images) bigger than `SHARED_MEMORY_MIN_BYTES` are not pickled on every hop: workers get a small
+:class:`SharedArrayHandle`, map the block and write their result straight into a new block. The lifetime of every
+block is reference-counted by the `Nodes` consuming it in the running pass, the block is unlinked as soon as
+the last consumer is done.
+"""
+from multiprocessing import shared_memory, resource_tracker
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, getUfuncResultLayout, NODE_UFUNCS
+try:
+    import numpy as np
+except ImportError:
+    # without NumPy there are no arrays to share
+    np = None
+
+DEBUG = False
+
+#: arrays with less bytes are pickled, mapping shared memory doesn't pay off for them
+SHARED_MEMORY_MIN_BYTES = 1024 * 1024
+
+#: ``SharedMemory`` blocks which couldn't be closed yet, because arrays mapped onto them are still in use. Kept
+#: across transports, the values may outlive the pool which computed them
+_retired_blocks = []
+
+
+class SharedArrayHandle():
+    """Picklable reference to an array stored in a shared memory block"""
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        """
+        :param name: name of the ``SharedMemory`` block
+        :type name: ``str``
+        :param shape: shape of the array
+        :type shape: ``tuple``
+        :param dtype: ``dtype.str`` of the array
+        :type dtype: ``str``
+        """
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __repr__(self):
+        return "<SharedArrayHandle %s %s %s>" % (self.name, self.shape, self.dtype)
+
+
+class SharedBlock(shared_memory.SharedMemory):
+    """``SharedMemory`` which may be garbage collected while arrays mapped onto it are in use, i.e. at exit.
+    The arrays keep the mapping alive, so the failing close is not reported"""
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+
+def isSharedMemoryAvailable() -> bool:
+    """Return ``True`` if NumPy is available, so arrays can be mapped onto shared memory"""
+    return np is not None
+
+
+def isSharable(value, min_bytes: int = SHARED_MEMORY_MIN_BYTES) -> bool:
+    """Return ``True`` if the value is an array big enough to travel in shared memory"""
+    return np is not None and isinstance(value, np.ndarray) and value.nbytes >= min_bytes
+
+
+def mapSharedArray(block: 'SharedMemory', shape: tuple, dtype) -> 'numpy.ndarray':
+    """
+    Return the array mapped onto the block. The array (and every view of it) holds an export of the block,
+    so ``block.close()`` raises ``BufferError`` instead of unmapping the memory under it
+    """
+    dtype = np.dtype(dtype)
+    return np.frombuffer(block.buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def createSharedArray(shape: tuple, dtype) -> ('SharedMemory', 'numpy.ndarray'):
+    """Create new shared memory block and the array mapped onto it"""
+    dtype = np.dtype(dtype)
+    block = SharedBlock(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return block, mapSharedArray(block, shape, dtype)
+
+
+def attachSharedArray(handle: SharedArrayHandle) -> ('SharedMemory', 'numpy.ndarray'):
+    """Map the existing shared memory block of the handle, the array is not copied"""
+    block = SharedBlock(name=handle.name)
+    return block, mapSharedArray(block, handle.shape, handle.dtype)
+
+
+def closeRetiredBlocks():
+    """Close the retired blocks whose arrays have been released"""
+    blocks, _retired_blocks[:] = list(_retired_blocks), []
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # the value is still referenced somewhere, try again later
+            _retired_blocks.append(block)
+
+
+def computeSharedOperation(title: str, input_values: list, input_value=0, min_bytes: int = SHARED_MEMORY_MIN_BYTES):
+    """
+    Worker side of :func:`~nodeeditor.SceneEvaluationFunc.computeOperation`. Inputs given by
+    :class:`SharedArrayHandle` are mapped without copying, large results are written by the ufunc directly into
+    a new shared memory block, which is then owned by the `Scene`
+
+    :param title: title of the `Node` choosing the operation
+    :type title: ``str``
+    :param input_values: values or :class:`SharedArrayHandle` of the inputs
+    :type input_values: ``list``
+    :param input_value: value of the `Input Node`
+    :param min_bytes: results with less bytes are returned as they are
+    :type min_bytes: ``int``
+    :return: computed value or :class:`SharedArrayHandle` of it
+    """
+    blocks, values, result = [], [], None
+    try:
+        for value in input_values:
+            if isinstance(value, SharedArrayHandle):
+                block, value = attachSharedArray(value)
+                blocks.append(block)
+            values.append(value)
+
+        ufunc = NODE_UFUNCS.get(title)
+        if ufunc is None or len(values) < 2 or values[0] is None or values[1] is None or \
+                not (isinstance(values[0], np.ndarray) or isinstance(values[1], np.ndarray)):
+            result = computeOperation(title, values, input_value)
+            # don't return view of the mapped input, it's gone after the blocks are closed
+            return np.array(result) if isinstance(result, np.ndarray) and not result.flags.owndata else result
+
+        shape, dtype = getUfuncResultLayout(title, values[0], values[1])
+        with np.errstate(all='ignore'):
+            if int(np.prod(shape)) * dtype.itemsize < min_bytes: return ufunc(values[0], values[1])
+
+            block, out = createSharedArray(shape, dtype)
+            ufunc(values[0], values[1], out=out)
+        del out
+        block.close()
+        return SharedArrayHandle(block.name, shape, dtype.str)
+
+    finally:
+        # mapped arrays have to be released before their blocks are closed
+        value = result = None
+        del values[:]
+        for block in blocks: block.close()
+
+
+class AllSceneSharedMemoryFunctions():
+    """Class owning the shared memory blocks holding the large values of the `Nodes`"""
+
+    def __init__(self, min_bytes: int = SHARED_MEMORY_MIN_BYTES):
+        """
+        :param min_bytes: arrays with less bytes are pickled
+        :type min_bytes: ``int``
+
+        :Instance Attributes:
+
+        - **min_bytes** - arrays with less bytes are pickled
+        - **handles** - ``dict`` of `Node` -> :class:`SharedArrayHandle` of its current value
+        - **blocks** - ``dict`` of block name -> ``SharedMemory`` mapped in this process
+        - **refcounts** - ``dict`` of block name -> number of consumers which haven't finished yet. Blocks
+          which are not in here are unlinked already
+        """
+        self.min_bytes = min_bytes
+
+        self.handles = {}
+        self.blocks = {}
+        self.refcounts = {}
+
+        # workers must report their blocks to the tracker of this process, not to their own one
+        resource_tracker.ensure_running()
+
+    def getArgument(self, node: 'Node', value, consumers: int):
+        """
+        Return what is sent to the worker for the value of the `Node`: the handle of its block or the value itself.
+        Large values which are not shared yet (i.e. of `Input Nodes`) are copied into a new block once
+
+        :param node: `Node` whose value is sent
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param value: current value of the `Node`
+        :param consumers: number of `Nodes` consuming the value in this pass
+        :type consumers: ``int``
+        :return: :class:`SharedArrayHandle` or the value
+        """
+        handle = self.handles.get(node)
+        if handle is not None and handle.name in self.refcounts: return handle
+        if not isSharable(value, self.min_bytes): return value
+
+        self.forget(node)
+        block, array = createSharedArray(value.shape, value.dtype)
+        array[...] = value
+        return self.adopt(node, block, array, consumers)
+
+    def receive(self, node: 'Node', handle: SharedArrayHandle, consumers: int) -> 'numpy.ndarray':
+        """
+        Take ownership of the block written by a worker
+
+        :param node: `Node` which computed the value
+        :type node: :class:`~nodeeditor.NodeFunc.AllNodeFunctions`
+        :param handle: handle returned by the worker
+        :type handle: :class:`SharedArrayHandle`
+        :param consumers: number of `Nodes` consuming the value in this pass
+        :type consumers: ``int``
+        :return: array mapped onto the block, used as the value of the `Node`
+        """
+        self.forget(node)
+        block, array = attachSharedArray(handle)
+        self.adopt(node, block, array, consumers)
+        return array
+
+    def adopt(self, node: 'Node', block: 'SharedMemory', array: 'numpy.ndarray', consumers: int) -> SharedArrayHandle:
+        """Register the block as the value of the `Node`, it stays linked until `consumers` release it"""
+        handle = SharedArrayHandle(block.name, array.shape, array.dtype.str)
+        self.handles[node] = handle
+        self.blocks[block.name] = block
+        self.refcounts[block.name] = consumers
+        if consumers <= 0: self.unlink(block.name)
+        if DEBUG: print("SHM: %s holds %s for %d consumers" % (node, handle, consumers))
+        return handle
+
+    def release(self, node: 'Node'):
+        """One consumer of the value of the `Node` is done, unlink the block after the last one"""
+        handle = self.handles.get(node)
+        if handle is None or handle.name not in self.refcounts: return
+        self.refcounts[handle.name] -= 1
+        if self.refcounts[handle.name] <= 0: self.unlink(handle.name)
+
+    def unlink(self, name: str):
+        """Remove the block name, so no other process can map it. This process keeps its mapping"""
+        self.refcounts.pop(name, None)
+        try:
+            self.blocks[name].unlink()
+        except FileNotFoundError:
+            pass
+
+    def discard(self, handle: SharedArrayHandle):
+        """Unlink the block of a result which will never be received, i.e. of a cancelled evaluation"""
+        try:
+            block = shared_memory.SharedMemory(name=handle.name)
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def unlinkAll(self):
+        """Unlink the blocks whose consumers will never finish, i.e. after a cancelled evaluation"""
+        for name in list(self.refcounts): self.unlink(name)
+
+    def forget(self, node: 'Node'):
+        """Drop the block of the previous value of the `Node`"""
+        handle = self.handles.pop(node, None)
+        if handle is None: return
+        if handle.name in self.refcounts: self.unlink(handle.name)
+        _retired_blocks.append(self.blocks.pop(handle.name))
+        closeRetiredBlocks()
+
+    def clear(self):
+        """Unlink and close all blocks"""
+        for node in list(self.handles): self.forget(node)
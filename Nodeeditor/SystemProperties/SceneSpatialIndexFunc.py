@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the spatial index of the `Scene`. Rectangles of the `Nodes`, points of the `Sockets` and bounding
+boxes of the `Edges` are kept in a uniform grid of square cells, so the queries of the `Graphics View` (socket
+highlights and snapping, edges under a dragged `Node`, item under the mouse) only visit the cells around the
+queried area instead of scanning every item of the ``QGraphicsScene``.
+
+The index is updated incrementally: a moved `Node` updates its own rectangle and the points of its `Sockets`,
+an `Edge` updates its box when its `Graphics Edge` gets new positions, removed items leave the index. Headless
+`Scenes` have no geometry, their index stays empty.
+
+Rectangles are ``(x1, y1, x2, y2)`` tuples in `Scene` coordinates.
+"""
+DEBUG = False
+
+INDEX_NODES = 'nodes'       #: layer of the `Node` rectangles
+INDEX_SOCKETS = 'sockets'   #: layer of the `Socket` points
+INDEX_EDGES = 'edges'       #: layer of the `Edge` bounding boxes
+
+#: size of a grid cell in `Scene` pixels, about a `Node` so most items fall into a few cells
+SPATIAL_INDEX_CELL_SIZE = 128
+#: items covering more cells (i.e. very long `Edges`) are kept in a list checked by every query
+SPATIAL_INDEX_MAX_CELLS = 256
+
+
+def rectsIntersect(first: tuple, second: tuple) -> bool:
+    """Return ``True`` if the two ``(x1, y1, x2, y2)`` rectangles overlap or touch"""
+    return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+class AllSceneSpatialIndexFunctions():
+    """Class contains all the code for the uniform grid index of the `Nodes`, `Sockets` and `Edges` of the `Scene`"""
+
+    def __init__(self, scene: 'Scene', cell_size: float = SPATIAL_INDEX_CELL_SIZE):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+        :param cell_size: size of a grid cell in `Scene` pixels
+        :type cell_size: ``float``
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **cell_size** - size of a grid cell in `Scene` pixels
+        - **cells** - ``dict`` of layer -> ``dict`` of ``(column, row)`` -> ``set`` of items in the cell
+        - **large_items** - ``dict`` of layer -> ``set`` of items covering more than `SPATIAL_INDEX_MAX_CELLS` cells
+        - **rects** - ``dict`` of layer -> ``dict`` of item -> ``(rect, cell range)``
+        - **order** - ``dict`` of item -> insertion number, later items are stacked on top
+        """
+        self.scene = scene
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        """Remove all items from the index"""
+        self.cells = {INDEX_NODES: {}, INDEX_SOCKETS: {}, INDEX_EDGES: {}}
+        self.large_items = {INDEX_NODES: set(), INDEX_SOCKETS: set(), INDEX_EDGES: set()}
+        self.rects = {INDEX_NODES: {}, INDEX_SOCKETS: {}, INDEX_EDGES: {}}
+        self.order = {}
+        self._counter = 0
+
+    def __len__(self):
+        return sum(len(rects) for rects in self.rects.values())
+
+    def getCellRange(self, rect: tuple) -> tuple:
+        """Return ``(first column, first row, last column, last row)`` of the cells covered by the rectangle"""
+        size = self.cell_size
+        return int(rect[0] // size), int(rect[1] // size), int(rect[2] // size), int(rect[3] // size)
+
+    def isLarge(self, cell_range: tuple) -> bool:
+        """Return ``True`` if the cell range is too big to be stored cell by cell"""
+        return (cell_range[2] - cell_range[0] + 1) * (cell_range[3] - cell_range[1] + 1) > SPATIAL_INDEX_MAX_CELLS
+
+    def insert(self, layer: str, item, rect: tuple):
+        """
+        Insert the item or move it to the new rectangle. Only the cells which changed are touched
+
+        :param layer: `INDEX_NODES`, `INDEX_SOCKETS` or `INDEX_EDGES`
+        :type layer: ``str``
+        :param item: `Node`, `Socket` or `Edge`
+        :param rect: ``(x1, y1, x2, y2)`` in `Scene` coordinates
+        :type rect: ``tuple``
+        """
+        cell_range = self.getCellRange(rect)
+        previous = self.rects[layer].get(item)
+        self.rects[layer][item] = (rect, cell_range)
+        if item not in self.order:
+            self.order[item] = self._counter
+            self._counter += 1
+
+        if previous is not None:
+            if previous[1] == cell_range: return
+            self.removeFromCells(layer, item, previous[1])
+        self.addToCells(layer, item, cell_range)
+
+    def addToCells(self, layer: str, item, cell_range: tuple):
+        """Put the item into the cells of the range"""
+        if self.isLarge(cell_range):
+            self.large_items[layer].add(item)
+            return
+        cells = self.cells[layer]
+        for column in range(cell_range[0], cell_range[2] + 1):
+            for row in range(cell_range[1], cell_range[3] + 1):
+                cells.setdefault((column, row), set()).add(item)
+
+    def removeFromCells(self, layer: str, item, cell_range: tuple):
+        """Take the item out of the cells of the range, empty cells are dropped"""
+        if self.isLarge(cell_range):
+            self.large_items[layer].discard(item)
+            return
+        cells = self.cells[layer]
+        for column in range(cell_range[0], cell_range[2] + 1):
+            for row in range(cell_range[1], cell_range[3] + 1):
+                cell = cells.get((column, row))
+                if cell is None: continue
+                cell.discard(item)
+                if not cell: del cells[(column, row)]
+
+    def remove(self, layer: str, item):
+        """Remove the item from the layer, items which are not indexed are ignored"""
+        previous = self.rects[layer].pop(item, None)
+        if previous is None: return
+        self.removeFromCells(layer, item, previous[1])
+        self.order.pop(item, None)
+
+    def getRect(self, layer: str, item) -> tuple:
+        """Return indexed rectangle of the item or ``None``"""
+        entry = self.rects[layer].get(item)
+        return entry[0] if entry is not None else None
+
+    def query(self, layer: str, rect: tuple) -> list:
+        """
+        Return items of the layer whose rectangle intersects the rectangle, the topmost first
+
+        :param layer: `INDEX_NODES`, `INDEX_SOCKETS` or `INDEX_EDGES`
+        :type layer: ``str``
+        :param rect: ``(x1, y1, x2, y2)`` in `Scene` coordinates
+        :type rect: ``tuple``
+        :return: found items
+        :rtype: ``list``
+        """
+        cell_range = self.getCellRange(rect)
+        candidates = set(self.large_items[layer])
+        if self.isLarge(cell_range):
+            # the area is bigger than the grid is dense, scan the items instead of the cells
+            candidates.update(self.rects[layer])
+        else:
+            cells = self.cells[layer]
+            for column in range(cell_range[0], cell_range[2] + 1):
+                for row in range(cell_range[1], cell_range[3] + 1):
+                    cell = cells.get((column, row))
+                    if cell: candidates.update(cell)
+
+        rects = self.rects[layer]
+        found = [item for item in candidates if rectsIntersect(rects[item][0], rect)]
+        found.sort(key=self.order.get, reverse=True)
+        return found
+
+    def queryPoint(self, layer: str, x: float, y: float, radius: float = 0) -> list:
+        """Return items of the layer whose rectangle is closer than `radius` to the point, the topmost first"""
+        return self.query(layer, (x - radius, y - radius, x + radius, y + radius))
+
+    def getNearest(self, layer: str, x: float, y: float, radius: float) -> 'item':
+        """
+        Return item of the layer whose rectangle center is nearest to the point within the square of `radius`
+
+        :return: found item or ``None``
+        """
+        nearest, nearest_distance = None, None
+        for item in self.queryPoint(layer, x, y, radius):
+            rect = self.rects[layer][item][0]
+            dx, dy = (rect[0] + rect[2]) / 2 - x, (rect[1] + rect[3]) / 2 - y
+            distance = dx * dx + dy * dy
+            if nearest is None or distance < nearest_distance: nearest, nearest_distance = item, distance
+        return nearest
+
+    def updateNode(self, node: 'Node'):
+        """Index the rectangle of the `Node` and the points of its `Sockets`. Called when the `Node` moves"""
+        grNode = node.grNode
+        if grNode is None: return
+        pos = grNode.pos()
+        x, y = pos.x(), pos.y()
+        self.insert(INDEX_NODES, node, (x, y, x + grNode.width, y + grNode.height))
+        for socket in node.inputs + node.outputs: self.updateSocket(socket, x, y)
+
+    def updateSocket(self, socket: 'Socket', node_x: float = None, node_y: float = None):
+        """Index the circle of the `Socket`, `node_x` and `node_y` is the position of its `Node` if known"""
+        grSocket = socket.grSocket
+        if grSocket is None: return
+        if node_x is None:
+            pos = socket.node.grNode.pos()
+            node_x, node_y = pos.x(), pos.y()
+        socket_x, socket_y = socket.getSocketPosition()
+        radius = grSocket.radius + grSocket.outline_width
+        x, y = node_x + socket_x, node_y + socket_y
+        self.insert(INDEX_SOCKETS, socket, (x - radius, y - radius, x + radius, y + radius))
+
+    def updateEdge(self, edge: 'Edge'):
+        """Index the bounding box of the `Graphics Edge`. Called when its source or destination changes"""
+        grEdge = edge.grEdge
+        if grEdge is None: return
+        rect = grEdge.boundingRect()
+        self.insert(INDEX_EDGES, edge, (rect.left(), rect.top(), rect.right(), rect.bottom()))
+
+    def removeNode(self, node: 'Node'):
+        """Remove the `Node` and its `Sockets`"""
+        self.remove(INDEX_NODES, node)
+        for socket in node.inputs + node.outputs: self.remove(INDEX_SOCKETS, socket)
+
+    def removeSocket(self, socket: 'Socket'):
+        """Remove the `Socket`"""
+        self.remove(INDEX_SOCKETS, socket)
+
+    def removeEdge(self, edge: 'Edge'):
+        """Remove the `Edge`"""
+        self.remove(INDEX_EDGES, edge)
+
+    def getStackingKey(self, node: 'Node') -> tuple:
+        """Return key ordering the `Nodes` like the ``QGraphicsScene`` stacks them, the topmost is the greatest"""
+        return node.grNode.zValue(), self.order.get(node, -1)
+
+    def getSocketAt(self, x: float, y: float) -> 'Socket':
+        """Return the `Socket` whose circle contains the point, of the topmost `Node` if they overlap, or ``None``"""
+        found, found_key = None, None
+        for socket in self.queryPoint(INDEX_SOCKETS, x, y):
+            rect = self.rects[INDEX_SOCKETS][socket][0]
+            radius = (rect[2] - rect[0]) / 2
+            dx, dy = (rect[0] + rect[2]) / 2 - x, (rect[1] + rect[3]) / 2 - y
+            if dx * dx + dy * dy > radius * radius: continue
+            key = self.getStackingKey(socket.node)
+            if found is None or key > found_key: found, found_key = socket, key
+        return found
+
+    def getItemAt(self, x: float, y: float) -> 'QGraphicsItem':
+        """
+        Return the graphics item under the `Scene` point like ``QGraphicsView.itemAt``: `Sockets` are above
+        their own `Node` but below the `Nodes` stacked on it, `Nodes` are above `Edges`. `Sockets` are hit-tested
+        by their circle, `Edges` by their shape, the dragged `Edge` is ignored
+
+        :return: `Graphics Socket`, `Graphics Node`, `Graphics Edge` or ``None``
+        :rtype: ``QGraphicsItem``
+        """
+        nodes = self.queryPoint(INDEX_NODES, x, y)
+        top_node = max(nodes, key=self.getStackingKey) if nodes else None
+
+        socket = self.getSocketAt(x, y)
+        if socket is not None and (top_node is None or
+                                   self.getStackingKey(socket.node) >= self.getStackingKey(top_node)):
+            return socket.grSocket
+        if top_node is not None: return top_node.grNode
+
+        for edge in self.queryPoint(INDEX_EDGES, x, y):
+            if edge.end_socket is not None and edge.grEdge.hitTest(x, y): return edge.grEdge
+        return None
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the streaming evaluation of the `Scene`. `Input Nodes` consume iterators (or async iterators)
+of records or chunks and every live `Node` becomes a generator stage pulling one item from each of its inputs.
+`Output Nodes` yield their results item by item, so the data set is never materialised. Stages advance in lockstep,
+which bounds the memory to a single item per stage, and nothing is read from the sources before the consumer asks
+for the next result (backpressure).
+
+Example:
+
+.. code-block:: python
+
+    for outputs in scene.streamer.stream({input_node: sensor_readings()}):
+        print(outputs)          # {output node id: value}
+
+    async for outputs in scene.streamer.astream({input_node: websocket_chunks()}):
+        ...
+"""
+import itertools
+from collections import deque
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import computeOperation, NODE_TITLE_INPUT, NODE_TITLE_OUTPUT
+try:
+    import numpy as np
+except ImportError:
+    # list chunks are passed to the operations as they are
+    np = None
+
+DEBUG = False
+
+
+def toChunk(item):
+    """Convert list chunk into NumPy array, so the operations work element-wise"""
+    return np.asarray(item) if np is not None and isinstance(item, (list, tuple)) else item
+
+
+def computeStage(title: str, input_stages: list) -> 'generator':
+    """
+    Generator stage of one `Node`. Pulls one item from each input stage and yields the computed value,
+    ``None`` if the item is invalid (i.e. division by zero), so one bad record doesn't stop the stream
+
+    :param title: title of the `Node` choosing the operation
+    :type title: ``str``
+    :param input_stages: iterators of the values of the `Nodes` connected to the inputs
+    :type input_stages: ``list``
+    """
+    for input_values in zip(*input_stages):
+        try:
+            yield computeOperation(title, list(input_values))
+        except (ValueError, TypeError, ArithmeticError):
+            yield None
+
+
+def feedStage(slot: deque) -> 'generator':
+    """Stage yielding the items put into the `slot` by :func:`AllSceneStreamFunctions.stream`"""
+    while True:
+        yield slot.popleft()
+
+
+class AllSceneStreamFunctions():
+    """Class contains all the code for evaluating the `Scene` over streams of records"""
+
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **output_nodes** - `Output Nodes` of the last built pipeline
+        """
+        self.scene = scene
+        self.output_nodes = []
+
+    def buildStages(self, sources: dict) -> list:
+        """
+        Chain the generator stages of the live `Nodes`. `Nodes` feeding several inputs are split by
+        ``itertools.tee``, whose buffer stays at one item because all stages advance together. `Nodes` are
+        streamed according to their title, `Nodes` in cycles yield ``None``
+
+        :param sources: ``dict`` of `Input Node` -> iterator of records or chunks. `Input Nodes` without source
+            repeat their value from the evaluator
+        :type sources: ``dict``
+        :return: stages of the `output_nodes`
+        :rtype: ``list``
+        """
+        evaluator = self.scene.evaluator
+        live = self.scene.compiler.optimizer.getLiveNodes()
+        order = [node for node in evaluator.getTopologicalOrder() if node in live]
+
+        # only live consumers pull from a stage, a dead one would let tee buffer the whole stream
+        consumers = {}
+        for node in order:
+            for input_node in evaluator.getInputNodes(node):
+                if input_node is not None: consumers[input_node] = consumers.get(input_node, 0) + 1
+
+        stages = {}
+        for node in order:
+            input_stages = [stages[input_node].pop() if input_node in stages else itertools.repeat(None)
+                            for input_node in evaluator.getInputNodes(node)]
+
+            if node.title == NODE_TITLE_INPUT:
+                stage = map(toChunk, sources[node]) if node in sources else \
+                    itertools.repeat(evaluator.input_values.get(node, 0))
+            else:
+                stage = computeStage(node.title, input_stages)
+
+            count = consumers.get(node, 0) + (1 if node.title == NODE_TITLE_OUTPUT else 0)
+            stages[node] = list(itertools.tee(stage, count)) if count > 1 else [stage]
+
+        self.output_nodes = [node for node in order if node.title == NODE_TITLE_OUTPUT]
+        self.output_nodes += [node for node in evaluator.cyclic_nodes if node.title == NODE_TITLE_OUTPUT]
+        return [stages[node].pop() if node in stages else itertools.repeat(None) for node in self.output_nodes]
+
+    def getSources(self, sources: dict) -> dict:
+        """Resolve `Input Nodes` given by their `id`"""
+        return {self.scene.evaluator.getInputNode(key): source for key, source in sources.items()}
+
+    def stream(self, sources: dict) -> 'generator':
+        """
+        Evaluate the `Scene` item by item until the shortest source is exhausted
+
+        :param sources: ``dict`` of `Input Node` (or its `id`) -> iterable of records or chunks
+        :type sources: ``dict``
+        :return: generator of ``dict`` of `Output Node` `id` -> value
+        :raises: ``ValueError`` if there is no source, the stream would never end
+        """
+        sources = {node: iter(source) for node, source in self.getSources(sources).items()}
+        slots, output_stages = self.buildPipeline(sources)
+        output_ids = [node.id for node in self.output_nodes]
+
+        while True:
+            try:
+                for node, source in sources.items(): slots[node].append(next(source))
+            except StopIteration:
+                return
+            yield {node_id: next(stage) for node_id, stage in zip(output_ids, output_stages)}
+
+    async def astream(self, sources: dict) -> 'async_generator':
+        """
+        Evaluate the `Scene` over async iterators (sync iterables are accepted as well). One item is awaited from
+        each source, pushed through the stages and yielded before the next item is read
+
+        :param sources: ``dict`` of `Input Node` (or its `id`) -> async iterable of records or chunks
+        :type sources: ``dict``
+        :return: async generator of ``dict`` of `Output Node` `id` -> value
+        :raises: ``ValueError`` if there is no source, the stream would never end
+        """
+        sources = {node: source.__aiter__() if hasattr(source, '__aiter__') else iter(source)
+                   for node, source in self.getSources(sources).items()}
+        slots, output_stages = self.buildPipeline(sources)
+        output_ids = [node.id for node in self.output_nodes]
+
+        while True:
+            try:
+                for node, source in sources.items():
+                    slots[node].append(await source.__anext__() if hasattr(source, '__anext__') else next(source))
+            except (StopIteration, StopAsyncIteration):
+                return
+            yield {node_id: next(stage) for node_id, stage in zip(output_ids, output_stages)}
+
+    def buildPipeline(self, sources: dict) -> (dict, list):
+        """
+        Build the stages fed by one-item slots. The sources are read by the caller, so the stream ends with
+        the shortest source even if no `Output` depends on it
+
+        :return: ``dict`` of `Input Node` -> slot (``deque``) and the stages of the `output_nodes`
+        :rtype: ``tuple``
+        """
+        if not sources: raise ValueError("Streaming needs at least one Input node with a source")
+        slots = {node: deque(maxlen=1) for node in sources}
+        return slots, self.buildStages({node: feedStage(slot) for node, slot in slots.items()})
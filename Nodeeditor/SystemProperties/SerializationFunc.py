@@ -2,9 +2,23 @@
 """
 A module containing Serializable "Interface". We pretend its an abstract class
 """
+import json, zlib
 from collections import OrderedDict
 
 
+def getSerializedDataHash(data: dict) -> int:
+    """
+    Return cheap content hash of the serialized data. Equal data produce equal hashes, so the hashes can be
+    compared to find out which items need to be deserialized again
+
+    :param data: serialized data of a `Node`, `Edge` or `Socket`
+    :type data: ``dict``
+    :return: CRC32 of the data encoded as JSON with sorted keys
+    :rtype: ``int``
+    """
+    return zlib.crc32(json.dumps(data, sort_keys=True, default=str).encode('utf-8'))
+
+
 class Serializable():
     def __init__(self):
         """
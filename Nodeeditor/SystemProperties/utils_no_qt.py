@@ -15,3 +15,17 @@ def dumpException(e=None):
 
 
 pp = PrettyPrinter(indent=4).pprint
+
+
+class HeadlessPoint():
+    """Minimal stand-in for ``QPointF`` used by the `Nodes` of a headless `Scene`"""
+
+    def __init__(self, x: float = 0.0, y: float = 0.0):
+        self.x_ = x
+        self.y_ = y
+
+    def x(self) -> float:
+        return self.x_
+
+    def y(self) -> float:
+        return self.y_
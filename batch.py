@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Headless command line runner evaluating graphs saved by :func:`~nodeeditor.SceneFunc.AllSceneFunctions.saveToFile`
+against input files, without a GUI. Graph files are processed in parallel on all CPU cores.
+
+Inputs are CSV files with a header of `Input Node` ids, or NPY files with one column per `Input Node` in the order
+of the `Scene`. Without ``--inputs`` each graph reads ``<graph>.csv`` or ``<graph>.npy`` next to it. Outputs are
+written next to the graph or into ``--output-dir`` as ``<graph>.out.csv`` (header of `Output Node` ids) or
+``<graph>.out.npy``. Graphs with the same name from different directories get their relative path in the name of
+the output file, so they don't overwrite each other in a shared ``--output-dir``.
+
+Example:
+
+.. code-block:: bash
+
+    python batch.py graphs/*.json --inputs data.csv --output-dir results --workers 8
+"""
+import os, sys, csv, json, glob, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import NODE_TITLE_INPUT
+try:
+    import numpy as np
+except ImportError:
+    # only CSV files can be read and written
+    np = None
+
+DEBUG = False
+
+#: number of graph files sent to a worker process at once
+BATCH_CHUNK_SIZE = 16
+
+
+def getInputNodes(scene: 'Scene') -> list:
+    """Return `Input Nodes` of the `Scene` in the order of the columns of NPY input files"""
+    return [node for node in scene.nodes if node.title == NODE_TITLE_INPUT]
+
+
+def loadInputs(filename: str, scene: 'Scene') -> dict:
+    """
+    Read the input file into columns of the `Input Nodes`
+
+    :param filename: CSV or NPY file
+    :type filename: ``str``
+    :param scene: loaded `Scene`
+    :type scene: :class:`~nodeeditor.SceneFunc.AllSceneFunctions`
+    :return: ``dict`` of `Input Node` -> column of values
+    :rtype: ``dict``
+    :raises: ``ValueError`` if a column doesn't belong to any `Input Node`
+    """
+    input_nodes = getInputNodes(scene)
+
+    if filename.endswith(".npy"):
+        if np is None: raise ValueError("NumPy is required for reading %s" % filename)
+        data = np.load(filename)
+        if data.ndim == 1: data = data.reshape(-1, 1)
+        if data.shape[1] > len(input_nodes):
+            raise ValueError("%s has %d columns, the graph has %d inputs" % (filename, data.shape[1], len(input_nodes)))
+        return {node: data[:, index] for index, node in enumerate(input_nodes[:data.shape[1]])}
+
+    with open(filename, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        rows = [[float(value) for value in row] for row in reader if row]
+
+    columns = {}
+    for index, node_id in enumerate(header):
+        node = scene.getNodeByID(int(node_id))
+        if node is None or node.title != NODE_TITLE_INPUT:
+            raise ValueError("%s: column '%s' is not an Input node of the graph" % (filename, node_id))
+        columns[node] = [row[index] for row in rows]
+    return columns
+
+
+def saveOutputs(filename: str, outputs: dict):
+    """
+    Write the output columns into CSV or NPY file. Invalid outputs are written as empty cells or NaN
+
+    :param filename: CSV or NPY file
+    :type filename: ``str``
+    :param outputs: ``dict`` of `Output Node` `id` -> column of values or ``None``
+    :type outputs: ``dict``
+    """
+    node_ids = sorted(outputs)
+    num_rows = max([len(outputs[node_id]) for node_id in node_ids if outputs[node_id] is not None] or [0])
+    columns = [outputs[node_id] if outputs[node_id] is not None else [None] * num_rows for node_id in node_ids]
+
+    if filename.endswith(".npy"):
+        if np is None: raise ValueError("NumPy is required for writing %s" % filename)
+        data = np.array([[np.nan if value is None else value for value in column] for column in columns], dtype=float)
+        np.save(filename, data.T.reshape(num_rows, len(columns)))
+        return
+
+    with open(filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(node_ids)
+        for row in range(num_rows):
+            writer.writerow(["" if column[row] is None else column[row] for column in columns])
+
+
+def getInputFilename(graph_filename: str, inputs: str = None) -> str:
+    """Return the input file of the graph, ``<graph>.csv`` or ``<graph>.npy`` next to it if `inputs` is not set"""
+    if inputs is not None: return inputs
+    stem = os.path.splitext(graph_filename)[0]
+    for extension in (".csv", ".npy"):
+        if os.path.exists(stem + extension): return stem + extension
+    return None
+
+
+def getOutputFilename(graph_filename: str, output_dir: str = None, output_format: str = "csv") -> str:
+    """Return ``<graph>.out.<format>`` in `output_dir`, next to the graph if `output_dir` is not set"""
+    stem = os.path.splitext(os.path.basename(graph_filename))[0]
+    return os.path.join(output_dir or os.path.dirname(graph_filename), "%s.out.%s" % (stem, output_format))
+
+
+def getOutputFilenames(graph_filenames: list, output_dir: str = None, output_format: str = "csv") -> list:
+    """
+    Return unique output file of every graph. Graphs whose outputs would collide in `output_dir` are named by their
+    path relative to the common directory of the graphs, i.e. ``a/g.json`` -> ``a__g.out.csv``
+
+    :return: output filenames in the order of `graph_filenames`
+    :rtype: ``list``
+    """
+    output_filenames = [getOutputFilename(filename, output_dir, output_format) for filename in graph_filenames]
+    keys = [os.path.normcase(os.path.abspath(filename)) for filename in output_filenames]
+    colliding = set(key for key in keys if keys.count(key) > 1)
+    if not colliding: return output_filenames
+
+    common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(filename)) for filename in graph_filenames])
+    used = set(key for key in keys if key not in colliding)
+    for index, filename in enumerate(graph_filenames):
+        if keys[index] not in colliding: continue
+        relative = os.path.splitext(os.path.relpath(os.path.abspath(filename), common_dir))[0]
+        name = relative.replace(os.sep, "__").replace("/", "__")
+        directory = output_dir or os.path.dirname(filename)
+        output_filename, number = os.path.join(directory, "%s.out.%s" % (name, output_format)), 1
+        while os.path.normcase(os.path.abspath(output_filename)) in used:
+            number += 1
+            output_filename = os.path.join(directory, "%s_%d.out.%s" % (name, number, output_format))
+        used.add(os.path.normcase(os.path.abspath(output_filename)))
+        output_filenames[index] = output_filename
+    return output_filenames
+
+
+def runGraph(graph_filename: str, inputs: str = None, output_dir: str = None, output_format: str = "csv",
+             output_filename: str = None) -> tuple:
+    """
+    Load one graph into a headless `Scene`, evaluate it over all input rows and write the outputs
+
+    :param graph_filename: ``.json`` file saved by the editor
+    :type graph_filename: ``str``
+    :param inputs: input file shared by all graphs or ``None`` for the file next to the graph
+    :type inputs: ``str``
+    :param output_dir: directory of the output files, the directory of the graph if ``None``
+    :type output_dir: ``str``
+    :param output_format: ``csv`` or ``npy``
+    :type output_format: ``str``
+    :param output_filename: output file, ``<graph>.out.<format>`` in `output_dir` if ``None``
+    :type output_filename: ``str``
+    :return: ``(graph_filename, output filename or None, error message or None)``
+    :rtype: ``tuple``
+    """
+    try:
+        scene = AllSceneFunctions(headless=True)
+        with open(graph_filename, "r") as file:
+            scene.deserialize(json.loads(file.read()))
+
+        input_filename = getInputFilename(graph_filename, inputs)
+        if output_filename is None: output_filename = getOutputFilename(graph_filename, output_dir, output_format)
+        if input_filename is not None and os.path.exists(output_filename) and \
+                os.path.samefile(input_filename, output_filename):
+            raise ValueError("output file %s would overwrite the input file" % output_filename)
+
+        if input_filename is not None:
+            outputs = scene.evaluator.evaluateBatch(loadInputs(input_filename, scene))
+        else:
+            # graph without inputs gives single row
+            outputs = {node_id: [value] for node_id, value in scene.evaluator.evaluate().items()}
+
+        saveOutputs(output_filename, outputs)
+        return graph_filename, output_filename, None
+
+    except Exception as e:
+        if DEBUG: print("BATCH: %s failed" % graph_filename, e)
+        return graph_filename, None, "%s: %s" % (e.__class__.__name__, e)
+
+
+def _runGraph(arguments: tuple) -> tuple:
+    return runGraph(*arguments)
+
+
+def getGraphFilenames(patterns: list) -> list:
+    """Expand directories and glob patterns (shells on Windows don't do it) into the list of ``.json`` files"""
+    filenames = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            filenames += sorted(glob.glob(os.path.join(pattern, "*.json")))
+        else:
+            filenames += sorted(glob.glob(pattern)) or [pattern]
+    return filenames
+
+
+def runBatch(graph_filenames: list, inputs: str = None, output_dir: str = None, output_format: str = "csv",
+             workers: int = None) -> list:
+    """
+    Run all graphs, in parallel on `workers` processes
+
+    :param workers: number of processes, ``None`` for all CPU cores, ``1`` runs in this process
+    :type workers: ``int``
+    :return: list of the :func:`runGraph` results in the order of `graph_filenames`
+    :rtype: ``list``
+    """
+    if output_dir is not None: os.makedirs(output_dir, exist_ok=True)
+    output_filenames = getOutputFilenames(graph_filenames, output_dir, output_format)
+    arguments = [(filename, inputs, output_dir, output_format, output_filename)
+                 for filename, output_filename in zip(graph_filenames, output_filenames)]
+    if workers == 1 or len(arguments) <= 1:
+        return [_runGraph(argument) for argument in arguments]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_runGraph, arguments, chunksize=BATCH_CHUNK_SIZE))
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate VisualScripting graphs without GUI")
+    parser.add_argument("graphs", nargs="+", help=".json graph files, directories or glob patterns")
+    parser.add_argument("-i", "--inputs", help="CSV/NPY input file used for all graphs "
+                                               "(default: <graph>.csv or <graph>.npy next to each graph)")
+    parser.add_argument("-o", "--output-dir", help="directory of the output files <graph>.out.csv or <graph>.out.npy "
+                                                   "(default: next to each graph)")
+    parser.add_argument("-f", "--format", choices=("csv", "npy"), default="csv", help="format of the output files")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of processes (default: CPU cores)")
+    args = parser.parse_args(argv)
+
+    results = runBatch(getGraphFilenames(args.graphs), args.inputs, args.output_dir, args.format, args.workers)
+
+    failed = [(filename, error) for filename, output_filename, error in results if error is not None]
+    for filename, error in failed: print("%s: %s" % (filename, error), file=sys.stderr)
+    print("%d graphs evaluated, %d failed" % (len(results) - len(failed), len(failed)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Local HTTP service evaluating graphs saved by :func:`~nodeeditor.SceneFunc.AllSceneFunctions.saveToFile`.
+Graph files are loaded and compiled once when the service starts, every worker keeps its own warm `Scenes`.
+Concurrent requests of the same graph with float inputs are batched into one vectorized call of the compiled
+function.
+
+Endpoints:
+
+- ``GET /graphs`` - loaded graphs with the ids of their `Input` and `Output Nodes`
+- ``POST /graphs/{name}/evaluate`` - JSON ``{"inputs": {"<input id>": value or list}}`` -> ``{"outputs": {...}}``
+- ``POST /graphs/{name}/evaluate.npy`` - NPY array with one column per `Input Node` -> NPY array with one column
+  per `Output Node` (sorted by id)
+- ``GET /stats`` - number of requests and batches and the graph work in microseconds
+
+Example:
+
+.. code-block:: bash
+
+    python service.py graphs/ --port 8000 --workers 4
+"""
+import os, io, sys, json, time, asyncio, argparse, threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import NODE_TITLE_OUTPUT
+from Nodeeditor.SystemProperties.SceneCompilerFunc import COMPILER_BACKEND_PYTHON, COMPILER_BACKEND_NUMBA
+from batch import getInputNodes, getGraphFilenames
+try:
+    import numpy as np
+except ImportError:
+    # requests are not batched and binary payloads are not available
+    np = None
+try:
+    from fastapi import FastAPI, HTTPException, Request, Response
+    from pydantic import BaseModel
+except ImportError:
+    # the graphs can still be evaluated by AllGraphServiceFunctions, just without HTTP
+    FastAPI = None
+
+DEBUG = False
+
+#: how long in seconds the first request of a batch waits for other requests of the same graph
+SERVICE_BATCH_WINDOW = 0.0005
+#: maximum number of requests evaluated in one batch
+SERVICE_MAX_BATCH = 256
+
+#: `Scenes` loaded in this process, ``dict`` of graph name -> `Scene`
+GRAPH_REGISTRY = {}
+#: locks of the graphs, the compiler, the memory planner and the evaluator of a `Scene` are used by one thread at once
+GRAPH_LOCKS = {}
+
+
+def getGraphName(filename: str) -> str:
+    """Return name of the graph used in the URLs, the file name without extension"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def loadGraph(filename: str, backend: str = COMPILER_BACKEND_PYTHON) -> 'Scene':
+    """
+    Load the graph into a headless `Scene` and compile it right away, so the first request is served warm
+
+    :param filename: ``.json`` file saved by the editor
+    :type filename: ``str``
+    :param backend: backend of the compiler
+    :type backend: ``str``
+    :return: loaded :class:`~nodeeditor.SceneFunc.AllSceneFunctions`
+    :raises: ``OSError``, ``ValueError`` or the error of the deserialization if the graph can't be loaded
+    """
+    scene = AllSceneFunctions(headless=True)
+    # not loadFromFile, it only prints the errors and the service would start with an empty graph
+    with open(filename, "r") as file:
+        scene.deserialize(json.loads(file.read()))
+    scene.filename = filename
+    scene.compiler.setBackend(backend)
+    scene.compiler.getCompiledFunction()
+    return scene
+
+
+def initWorker(graph_filenames: list, backend: str = COMPILER_BACKEND_PYTHON):
+    """Load all graphs into the `GRAPH_REGISTRY` of this process. Used as initializer of the worker processes"""
+    for filename in graph_filenames:
+        scene = loadGraph(filename, backend)
+        GRAPH_REGISTRY[getGraphName(filename)] = scene
+        GRAPH_LOCKS[getGraphName(filename)] = threading.Lock()
+
+
+def getBatchKey(input_values: dict) -> tuple:
+    """
+    Return key of the requests which can be evaluated in one vectorized call, ``None`` if the request has to be
+    evaluated alone. Only requests with float inputs are batched, float64 arithmetic of NumPy gives the same numbers
+    as Python floats. Ints could overflow int64 and would turn int results of the other requests into floats
+
+    :param input_values: ``dict`` of `Input Node` `id` -> value
+    :type input_values: ``dict``
+    :return: sorted ids of the inputs or ``None``
+    :rtype: ``tuple``
+    """
+    if np is None or not input_values or not all(type(value) is float for value in input_values.values()):
+        return None
+    return tuple(sorted(input_values))
+
+
+def isFinite(value) -> bool:
+    """Return ``False`` for non-finite float outputs"""
+    return not isinstance(value, float) or value - value == 0
+
+
+def evaluateGraph(name: str, requests: list) -> (list, float):
+    """
+    Evaluate the graph of this process for every request. Requests with float inputs of the same `Input Nodes` are
+    stacked into columns and evaluated by one vectorized call, the others one by one. Batched rows with non-finite
+    outputs are evaluated again alone, Python floats may raise where NumPy gives inf or nan. The threads of the pool
+    evaluating the same graph take turns, the compiled function shares its pooled buffers and statistics, batching
+    keeps the turns cheap
+
+    :param name: name of the graph
+    :type name: ``str``
+    :param requests: list of ``dict`` of `Input Node` `id` -> value
+    :type requests: ``list``
+    :return: list of ``dict`` of `Output Node` `id` -> value for every request and the graph work in microseconds
+    :rtype: ``tuple``
+    """
+    compiler = GRAPH_REGISTRY[name].compiler
+    start = time.perf_counter()
+
+    def evaluate(input_values: dict) -> dict:
+        if np is None: return compiler.evaluate(input_values)
+        input_values = {key: np.asarray(value) if isinstance(value, list) else value
+                        for key, value in input_values.items()}
+        # division by zero gives non-finite numbers, which are returned as None
+        with np.errstate(all='ignore'):
+            return compiler.evaluate(input_values)
+
+    results = [None] * len(requests)
+    batches = {}
+    for index, input_values in enumerate(requests):
+        key = getBatchKey(input_values) if len(requests) > 1 else None
+        batches.setdefault(key if key is not None else ('alone', index), []).append(index)
+
+    with GRAPH_LOCKS[name]:
+        for key, indexes in batches.items():
+            if len(indexes) == 1:
+                results[indexes[0]] = evaluate(requests[indexes[0]])
+                continue
+
+            columns = {node_id: np.array([requests[index][node_id] for index in indexes], dtype=float)
+                       for node_id in key}
+            outputs = evaluate(columns)
+            rows = [{} for index in indexes]
+            for node_id, value in outputs.items():
+                # rows are copied out as Python numbers, the arrays may be buffers reused by the next call
+                if isinstance(value, np.ndarray) and value.ndim > 0:
+                    column = np.broadcast_to(value, (len(rows),)).tolist()
+                else:
+                    column = [value.item() if hasattr(value, 'item') else value] * len(rows)
+                for row, row_value in zip(rows, column): row[node_id] = row_value
+            for index, row in zip(indexes, rows):
+                results[index] = row if all(isFinite(value) for value in row.values()) else evaluate(requests[index])
+
+    return results, (time.perf_counter() - start) * 1e6
+
+
+def toJSONValue(value):
+    """Convert the output value into JSON, non-finite numbers become ``None`` like invalid `Nodes`"""
+    if hasattr(value, 'tolist'): value = value.tolist()
+    if isinstance(value, list): return [toJSONValue(item) for item in value]
+    if isinstance(value, float) and (value != value or value in (float('inf'), float('-inf'))): return None
+    return value
+
+
+class AllGraphServiceFunctions():
+    """Class contains all the code serving the loaded graphs to concurrent requests"""
+
+    def __init__(self, graph_filenames: list, workers: int = None, use_processes: bool = False,
+                 backend: str = COMPILER_BACKEND_PYTHON, batch_window: float = SERVICE_BATCH_WINDOW,
+                 max_batch: int = SERVICE_MAX_BATCH):
+        """
+        :param graph_filenames: ``.json`` graph files
+        :type graph_filenames: ``list``
+        :param workers: number of workers, ``None`` lets ``concurrent.futures`` decide
+        :type workers: ``int``
+        :param use_processes: ``True`` for ``ProcessPoolExecutor``, ``False`` for ``ThreadPoolExecutor``
+        :type use_processes: ``bool``
+        :param backend: backend of the compilers
+        :type backend: ``str``
+        :param batch_window: seconds the first request of a batch waits for other requests, ``0`` disables batching
+        :type batch_window: ``float``
+        :param max_batch: maximum number of requests in a batch
+        :type max_batch: ``int``
+
+        :Instance Attributes:
+
+        - **graphs** - ``dict`` of graph name -> ``{'inputs': [ids], 'outputs': [ids]}``
+        - **executor** - pool evaluating the graphs, every process keeps its own `GRAPH_REGISTRY`
+        - **batch_window** - seconds the first request of a batch waits for other requests
+        - **max_batch** - maximum number of requests in a batch
+        - **pending** - ``dict`` of graph name -> list of ``(inputs, asyncio.Future)`` waiting for their batch
+        - **stats** - ``dict`` with 'requests', 'batches' and 'graph_us' (graph work in microseconds)
+        - **stats_lock** - lock of the `stats`, the service may be driven by event loops of several threads
+        """
+        initWorker(graph_filenames, backend)
+        self.graphs = {}
+        for name, scene in GRAPH_REGISTRY.items():
+            self.graphs[name] = {
+                'inputs': [node.id for node in getInputNodes(scene)],
+                'outputs': sorted(node.id for node in scene.nodes if node.title == NODE_TITLE_OUTPUT),
+            }
+
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=initWorker,
+                                                initargs=(graph_filenames, backend))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.pending = {}
+        self.stats = {'requests': 0, 'batches': 0, 'graph_us': 0.0}
+        self.stats_lock = threading.Lock()
+
+    def shutdown(self):
+        """Shut the pool down"""
+        self.executor.shutdown(wait=False)
+
+    def getStats(self) -> dict:
+        """
+        Return statistics of this service
+
+        :return: ``dict`` with 'requests', 'batches', 'graph_us' and 'graph_us_per_request'
+        :rtype: ``dict``
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['graph_us_per_request'] = stats['graph_us'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
+
+    async def run(self, name: str, requests: list) -> list:
+        """Evaluate the requests of the graph on the pool"""
+        loop = asyncio.get_running_loop()
+        results, microseconds = await loop.run_in_executor(self.executor, evaluateGraph, name, requests)
+        with self.stats_lock:
+            self.stats['requests'] += len(requests)
+            self.stats['batches'] += 1
+            self.stats['graph_us'] += microseconds
+        return results
+
+    async def evaluate(self, name: str, input_values: dict) -> dict:
+        """
+        Evaluate the graph for one request. Requests with float inputs wait `batch_window` for other requests of
+        the graph
+
+        :param name: name of the graph
+        :type name: ``str``
+        :param input_values: ``dict`` of `Input Node` `id` -> value
+        :type input_values: ``dict``
+        :return: ``dict`` of `Output Node` `id` -> value
+        :rtype: ``dict``
+        """
+        if self.batch_window <= 0 or getBatchKey(input_values) is None:
+            return (await self.run(name, [input_values]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self.pending.setdefault(name, [])
+        pending.append((input_values, future))
+        if len(pending) == 1:
+            loop.call_later(self.batch_window, self.flush, name)
+        elif len(pending) >= self.max_batch:
+            self.flush(name)
+        return await future
+
+    def flush(self, name: str):
+        """Send the waiting requests of the graph as one batch. Called on the running event loop"""
+        pending = self.pending.pop(name, [])
+        if not pending: return
+        if DEBUG: print("SERVICE: batch of %d requests for '%s'" % (len(pending), name))
+
+        async def runBatch():
+            try:
+                results = await self.run(name, [input_values for input_values, future in pending])
+                for (input_values, future), result in zip(pending, results):
+                    if not future.done(): future.set_result(result)
+            except Exception as e:
+                for input_values, future in pending:
+                    if not future.done(): future.set_exception(e)
+
+        asyncio.get_running_loop().create_task(runBatch())
+
+
+def createApp(service: AllGraphServiceFunctions) -> 'FastAPI':
+    """
+    Create the ``FastAPI`` application serving the graphs
+
+    :param service: service holding the loaded graphs
+    :type service: :class:`AllGraphServiceFunctions`
+    :rtype: ``FastAPI``
+    """
+    if FastAPI is None: raise ImportError("fastapi is required for the HTTP service")
+
+    class EvaluateRequest(BaseModel):
+        inputs: dict = {}
+
+    app = FastAPI(title="VisualScripting graph service")
+
+    def getInputValues(name: str, inputs: dict) -> dict:
+        if name not in service.graphs: raise HTTPException(status_code=404, detail="Unknown graph '%s'" % name)
+        try:
+            input_values = {int(node_id): value for node_id, value in inputs.items()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Input ids must be integers")
+        unknown = [node_id for node_id in input_values if node_id not in service.graphs[name]['inputs']]
+        if unknown: raise HTTPException(status_code=400, detail="Unknown inputs %s" % unknown)
+        return input_values
+
+    @app.get("/graphs")
+    async def getGraphs():
+        return service.graphs
+
+    @app.get("/stats")
+    async def getStats():
+        return service.getStats()
+
+    @app.post("/graphs/{name}/evaluate")
+    async def evaluate(name: str, request: EvaluateRequest):
+        outputs = await service.evaluate(name, getInputValues(name, request.inputs))
+        return {'outputs': {str(node_id): toJSONValue(value) for node_id, value in outputs.items()}}
+
+    @app.post("/graphs/{name}/evaluate.npy")
+    async def evaluateArray(name: str, request: Request):
+        if np is None: raise HTTPException(status_code=501, detail="NumPy is required for binary payloads")
+        try:
+            data = np.load(io.BytesIO(await request.body()), allow_pickle=False)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid NPY payload: %s" % e)
+        if data.ndim == 1: data = data.reshape(-1, 1)
+        input_ids = service.graphs.get(name, {}).get('inputs', [])
+        inputs = {node_id: data[:, index] for index, node_id in enumerate(input_ids[:data.shape[1]])}
+
+        outputs = await service.evaluate(name, getInputValues(name, inputs))
+        columns = [np.broadcast_to(np.nan if outputs[node_id] is None else outputs[node_id], (data.shape[0],))
+                   for node_id in service.graphs[name]['outputs']]
+        buffer = io.BytesIO()
+        np.save(buffer, np.stack(columns, axis=1) if columns else np.empty((data.shape[0], 0)))
+        return Response(content=buffer.getvalue(), media_type="application/octet-stream")
+
+    @app.on_event("shutdown")
+    def shutdown():
+        service.shutdown()
+
+    return app
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve VisualScripting graphs over HTTP")
+    parser.add_argument("graphs", nargs="+", help=".json graph files, directories or glob patterns")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of workers")
+    parser.add_argument("--processes", action="store_true", help="evaluate on processes instead of threads")
+    parser.add_argument("--numba", action="store_true", help="compile the graphs by numba when possible")
+    parser.add_argument("--batch-window", type=float, default=SERVICE_BATCH_WINDOW * 1e6,
+                        help="microseconds a request waits for a batch, 0 disables batching")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required for running the service", file=sys.stderr)
+        return 1
+
+    service = AllGraphServiceFunctions(getGraphFilenames(args.graphs), args.workers, args.processes,
+                                       COMPILER_BACKEND_NUMBA if args.numba else COMPILER_BACKEND_PYTHON,
+                                       args.batch_window / 1e6)
+    uvicorn.run(createApp(service), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
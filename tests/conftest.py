@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import os, sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """``QApplication`` of the graphics tests, drawing offscreen"""
+    QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield app
+
+
+def addNode(scene, title, input_nodes):
+    """
+    Add `Node` with at least one input, whose inputs are connected to the outputs of `input_nodes`.
+    ``None`` leaves the input without connection
+    """
+    node = AllNodeFunctions(scene, title, inputs=[0] * max(len(input_nodes), 1), outputs=[1])
+    for socket, input_node in zip(node.inputs, input_nodes):
+        if input_node is not None: AllEdgeFunctions(scene, input_node.outputs[0], socket)
+    return node
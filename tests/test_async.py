@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import gc, time, asyncio, warnings
+
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+DELAY = 0.2
+
+
+class SleepyNode(AllNodeFunctions):
+    async def eval(self):
+        await asyncio.sleep(DELAY)
+        return 2.0
+
+
+def createScene():
+    """Return `Scene` computing ``Sleepy + Sleepy`` and its `Output Node`"""
+    scene = AllSceneFunctions(headless=True)
+    first, second = SleepyNode(scene, "Sleepy", inputs=[], outputs=[1]), SleepyNode(scene, "Sleepy", inputs=[], outputs=[1])
+    addition = AllNodeFunctions(scene, "Addition", inputs=[0, 0], outputs=[1])
+    output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(scene, first.outputs[0], addition.inputs[0])
+    AllEdgeFunctions(scene, second.outputs[0], addition.inputs[1])
+    AllEdgeFunctions(scene, addition.outputs[0], output.inputs[0])
+    return scene, output
+
+
+@pytest.fixture
+def scene():
+    scene, output = createScene()
+    scene.scheduler.setExecutor(max_workers=2)
+    yield scene
+    scene.scheduler.shutdown()
+
+
+def test_scheduler_runs_async_nodes_concurrently(scene):
+    output = [node for node in scene.nodes if node.title == "Output"][0]
+    start = time.perf_counter()
+    assert scene.scheduler.evaluate() == {output.id: 4.0}
+    assert time.perf_counter() - start < 1.8 * DELAY
+
+
+def test_scheduler_start_does_not_block(scene):
+    output = [node for node in scene.nodes if node.title == "Output"][0]
+    start = time.perf_counter()
+    assert scene.scheduler.start()
+    assert time.perf_counter() - start < DELAY / 2
+    assert scene.scheduler.is_running
+
+    # the editor steps the loop and applies the results by its timers
+    while scene.scheduler.is_running:
+        scene.async_evaluator.processEvents()
+        scene.scheduler.processResults()
+        time.sleep(0.005)
+    assert scene.evaluator.getOutputValues() == {output.id: 4.0}
+
+
+def test_blocking_evaluation_inside_running_loop_fails_clearly():
+    scene, output = createScene()
+
+    async def evaluate():
+        with pytest.raises(RuntimeError, match="evaluateAsync"):
+            scene.evaluator.evaluate()
+        return await scene.async_evaluator.evaluateAsync()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        assert asyncio.run(evaluate()) == {output.id: 4.0}
+        gc.collect()
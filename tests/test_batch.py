@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os, csv
+
+import batch
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+def saveGraph(directory, name="graph", factor=2.0):
+    """Save ``Input * factor -> Output`` graph with its input file next to it, return graph filename"""
+    os.makedirs(directory, exist_ok=True)
+    scene = AllSceneFunctions(headless=True)
+    node_input = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_factor = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_multiply = AllNodeFunctions(scene, "Multiplication", inputs=[0, 0], outputs=[1])
+    node_output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(scene, node_input.outputs[0], node_multiply.inputs[0])
+    AllEdgeFunctions(scene, node_factor.outputs[0], node_multiply.inputs[1])
+    AllEdgeFunctions(scene, node_multiply.outputs[0], node_output.inputs[0])
+
+    graph_filename = os.path.join(str(directory), name + ".json")
+    scene.saveToFile(graph_filename)
+    with open(os.path.join(str(directory), name + ".csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([node_input.id, node_factor.id])
+        writer.writerows([[1, factor], [2, factor]])
+    return graph_filename
+
+
+def readOutputs(filename):
+    with open(filename, newline="") as file:
+        rows = list(csv.reader(file))
+    return [[float(value) for value in row] for row in rows[1:]]
+
+
+def test_default_output_keeps_input(tmp_path):
+    graph_filename = saveGraph(tmp_path)
+    input_filename = str(tmp_path / "graph.csv")
+    with open(input_filename) as file: input_data = file.read()
+
+    filename, output_filename, error = batch.runGraph(graph_filename)
+
+    assert error is None
+    assert output_filename == str(tmp_path / "graph.out.csv")
+    assert readOutputs(output_filename) == [[2.0], [4.0]]
+    with open(input_filename) as file: assert file.read() == input_data
+
+
+def test_output_over_input_is_refused(tmp_path):
+    graph_filename = saveGraph(tmp_path)
+    input_filename = str(tmp_path / "graph.csv")
+    with open(input_filename) as file: input_data = file.read()
+
+    filename, output_filename, error = batch.runGraph(graph_filename, output_filename=input_filename)
+
+    assert output_filename is None and "overwrite" in error
+    with open(input_filename) as file: assert file.read() == input_data
+
+
+def test_same_names_in_shared_output_dir(tmp_path):
+    graph_filenames = [saveGraph(tmp_path / "first", factor=2.0), saveGraph(tmp_path / "second", factor=3.0),
+                       saveGraph(tmp_path / "second", name="other", factor=4.0)]
+    output_dir = str(tmp_path / "results")
+
+    results = batch.runBatch(graph_filenames, output_dir=output_dir, workers=1)
+
+    assert [error for filename, output_filename, error in results] == [None, None, None]
+    output_filenames = [output_filename for filename, output_filename, error in results]
+    assert len(set(output_filenames)) == 3
+    assert os.path.basename(output_filenames[2]) == "other.out.csv"
+    assert [readOutputs(filename) for filename in output_filenames] == [[[2.0], [4.0]], [[3.0], [6.0]], [[4.0], [8.0]]]
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import random
+
+import numpy as np
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneCompilerFunc import COMPILER_BACKEND_PYTHON, COMPILER_BACKEND_NUMBA, numba
+from conftest import addNode
+
+OPERATIONS = ("Addition", "Subtraction", "Multiplication", "Division")
+SCALARS = (0, 1, 2, -3, 0.5, 2.5, 0.0)
+
+
+def createRandomGraph(rng):
+    """Return `Scene` with random operations and `Output Nodes` with up to three inputs, and its `Input Nodes`"""
+    scene = AllSceneFunctions(headless=True)
+    input_nodes = [addNode(scene, "Input", []) for index in range(rng.randint(1, 3))]
+    nodes = list(input_nodes)
+    for index in range(rng.randint(1, 8)):
+        title = rng.choice(OPERATIONS + ("Output",))
+        num_inputs = rng.randint(1, 3) if title == "Output" else 2
+        nodes.append(addNode(scene, title, [rng.choice(nodes) if rng.random() < 0.85 else None
+                                            for input_index in range(num_inputs)]))
+    for index in range(rng.randint(1, 3)):
+        addNode(scene, "Output", [rng.choice(nodes) if rng.random() < 0.8 else None
+                                  for input_index in range(rng.randint(1, 3))])
+    return scene, input_nodes
+
+
+def getRandomValue(rng, use_arrays):
+    if use_arrays and rng.random() < 0.5:
+        return np.array([rng.choice(SCALARS) for index in range(4)], dtype=rng.choice((np.float64, np.int64)))
+    return rng.choice(SCALARS)
+
+
+def assertSameOutputs(compiled, evaluated):
+    assert compiled.keys() == evaluated.keys()
+    for node_id, value in evaluated.items():
+        if value is None or compiled[node_id] is None:
+            assert compiled[node_id] is None and value is None, node_id
+            continue
+        assert np.asarray(compiled[node_id]).dtype == np.asarray(value).dtype, node_id
+        np.testing.assert_array_equal(compiled[node_id], value)
+
+
+def checkEquivalence(scene, input_nodes, rng, use_arrays, constants=True):
+    values = {node: getRandomValue(rng, use_arrays) for node in input_nodes}
+    optimizer = scene.compiler.optimizer
+    for node in input_nodes:
+        if constants and rng.random() < 0.3: optimizer.setConstantInput(node, values[node])
+        else: optimizer.removeConstantInput(node)
+        scene.evaluator.setInputValue(node, values[node])
+
+    arguments = {node: value for node, value in values.items() if node not in optimizer.constant_inputs}
+    assertSameOutputs(scene.compiler.evaluate(arguments), scene.evaluator.evaluate())
+
+
+def test_output_selects_first_valid_input_when_running():
+    scene = AllSceneFunctions(headless=True)
+    first, second = addNode(scene, "Input", []), addNode(scene, "Input", [])
+    division = addNode(scene, "Division", [first, second])
+    output = addNode(scene, "Output", [division, second])
+
+    for arguments, expected in (({first: 1.0, second: 0}, 0), ({first: 1.0, second: 4.0}, 0.25)):
+        for node, value in arguments.items(): scene.evaluator.setInputValue(node, value)
+        assert scene.evaluator.evaluate() == {output.id: expected}
+        assert scene.compiler.evaluate(arguments) == {output.id: expected}
+
+
+@pytest.mark.parametrize("use_arrays", (False, True))
+def test_compiler_matches_evaluator(use_arrays):
+    rng = random.Random(use_arrays)
+    for graph in range(150):
+        scene, input_nodes = createRandomGraph(rng)
+        for run in range(3): checkEquivalence(scene, input_nodes, rng, use_arrays)
+
+
+def test_compiler_matches_evaluator_without_planner():
+    rng = random.Random(2)
+    for graph in range(50):
+        scene, input_nodes = createRandomGraph(rng)
+        scene.compiler.planner.enabled = False
+        for run in range(3): checkEquivalence(scene, input_nodes, rng, True)
+
+
+@pytest.mark.skipif(numba is None, reason="numba is not installed")
+def test_numba_kernel_matches_evaluator():
+    rng = random.Random(3)
+    for graph in range(30):
+        scene, input_nodes = createRandomGraph(rng)
+        scene.compiler.setBackend(COMPILER_BACKEND_NUMBA)
+        for run in range(3): checkEquivalence(scene, input_nodes, rng, False, constants=False)
+        scene.compiler.setBackend(COMPILER_BACKEND_PYTHON)
+        checkEquivalence(scene, input_nodes, rng, False)
+
+
+def test_swapped_inputs_are_not_merged():
+    scene = AllSceneFunctions(headless=True)
+    first, second = addNode(scene, "Input", []), addNode(scene, "Input", [])
+    outputs = [addNode(scene, "Output", [addNode(scene, "Addition", input_nodes)])
+               for input_nodes in ([first, second], [second, first])]
+
+    for first_value, second_value in (("a", "b"), ([1], [2]), ((1,), (2,)), (1, 2)):
+        expected = {outputs[0].id: first_value + second_value, outputs[1].id: second_value + first_value}
+        assert scene.compiler.evaluate({first: first_value, second: second_value}) == expected
+    assert scene.compiler.optimizer.stats['merged'] == 0
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node import NodeFunc
+from conftest import addNode
+
+
+def createChain(length):
+    """``Input * Input * ... -> Output`` with `length` multiplications, return the scene and its `Input Node`"""
+    scene = AllSceneFunctions(headless=True)
+    node_input = node = addNode(scene, "Input", [])
+    for index in range(length): node = addNode(scene, "Multiplication", [node, node_input])
+    addNode(scene, "Output", [node])
+    return scene, node_input
+
+
+def getBestTime(function, repeats=5):
+    times = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_array_evaluation_is_not_slowed_down():
+    length = 5
+    scene, node_input = createChain(length)
+    column = np.linspace(0.5, 1.5, 2000000)
+
+    def evaluateGraph():
+        return scene.evaluator.evaluateBatch({node_input: column})
+
+    def evaluateNumPy():
+        value = column
+        for index in range(length): value = np.multiply(value, column)
+        return value
+
+    output, = evaluateGraph().values()
+    np.testing.assert_allclose(output, evaluateNumPy())
+    # arrays are neither looked up nor stored, their content is never hashed
+    assert scene.evaluator.cache.getStats() == {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+    # hashing the inputs of every node made the evaluation several times slower than the operations
+    assert getBestTime(evaluateGraph) < 2 * getBestTime(evaluateNumPy) + 0.01
+
+
+def test_scalar_values_are_still_memoized():
+    scene, node_input = createChain(3)
+
+    for value in (3, 2, 3):
+        scene.evaluator.setInputValue(node_input, value)
+        assert list(scene.evaluator.evaluate().values()) == [value ** 4]
+
+    assert scene.evaluator.cache.getStats()['hits'] == len(scene.nodes)
+
+
+def test_content_hash_is_computed_once(monkeypatch):
+    scene, node_input = createChain(1)
+    calls = []
+    getSerializedDataHash = NodeFunc.getSerializedDataHash
+    monkeypatch.setattr(NodeFunc, "getSerializedDataHash", lambda data: calls.append(data) or getSerializedDataHash(data))
+
+    for value in range(5):
+        scene.evaluator.setInputValue(node_input, value)
+        scene.evaluator.evaluate()
+    assert len(calls) == len(scene.nodes)
+
+    node_input.markContentChanged()
+    node_input.deserialize(node_input.serialize(), {})
+    scene.evaluator.evaluate()
+    assert len(calls) == len(scene.nodes) + 1
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneHistoryFunc import HISTORY_STAMP_STRUCTURE, HISTORY_STAMP_SELECTION
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+def test_selection_stamp_with_history_limit_of_one():
+    scene = AllSceneFunctions(headless=True)
+    scene.history.history_limit = 1
+    AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.history.storeInitialHistoryStamp()
+
+    scene.history.storeSelectionHistory("Selection changed")
+    scene.history.storeSelectionHistory("Selection changed")
+
+    assert len(scene.history.history_stack) == 1
+    assert scene.history.history_stack[0]['kind'] == HISTORY_STAMP_STRUCTURE
+    assert not scene.history.canUndo()
+
+
+def test_selection_stamp_refers_to_structure():
+    scene = AllSceneFunctions(headless=True)
+    AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.history.storeInitialHistoryStamp()
+
+    scene.history.storeSelectionHistory("Selection changed")
+
+    first, second = scene.history.history_stack[0], scene.history.history_stack[1]
+    assert second['kind'] == HISTORY_STAMP_SELECTION and second['structure'] == first['structure']
+
+
+def getState(scene):
+    """Return serialized `Scene` with `Nodes` and `Edges` sorted by id, restored items are appended to the lists"""
+    data = scene.serialize()
+    data['nodes'] = sorted(data['nodes'], key=lambda node_data: node_data['id'])
+    data['edges'] = sorted(data['edges'], key=lambda edge_data: edge_data['id'])
+    return data
+
+
+def buildHistory(scene):
+    """Store a stamp after every change of the `Scene`, return the serialized `Scene` at every step"""
+    snapshots = []
+    node_input = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.history.storeInitialHistoryStamp()
+    snapshots.append(getState(scene))
+
+    node_output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    scene.history.storeHistory("Node created")
+    snapshots.append(getState(scene))
+
+    edge = AllEdgeFunctions(scene, node_input.outputs[0], node_output.inputs[0])
+    scene.history.storeHistory("Edge created")
+    snapshots.append(getState(scene))
+
+    node_output.setPos(120, 40)
+    scene.history.storeHistory("Node moved")
+    snapshots.append(getState(scene))
+
+    edge.remove()
+    node_input.remove()
+    scene.history.storeHistory("Node deleted")
+    snapshots.append(getState(scene))
+    return snapshots
+
+
+def test_undo_redo_restores_every_step():
+    scene = AllSceneFunctions(headless=True)
+    snapshots = buildHistory(scene)
+
+    for step in range(len(snapshots) - 2, -1, -1):
+        scene.history.undo()
+        assert getState(scene) == snapshots[step]
+    assert not scene.history.canUndo()
+
+    for step in range(1, len(snapshots)):
+        scene.history.redo()
+        assert getState(scene) == snapshots[step]
+    assert not scene.history.canRedo()
+
+
+def test_stamps_hold_only_changed_items():
+    scene = AllSceneFunctions(headless=True)
+    buildHistory(scene)
+
+    moved = scene.history.history_stack[3]
+    assert len(moved['nodes']) == 1 and moved['edges'] == []
+    before, after = moved['nodes'][0]
+    assert (after['pos_x'], after['pos_y']) == (120, 40) and before['id'] == after['id']
+
+    deleted = scene.history.history_stack[4]
+    assert [change[1] for change in deleted['nodes']] == [None]
+    assert [change[1] for change in deleted['edges']] == [None]
+
+
+def test_new_stamp_drops_redo_steps():
+    scene = AllSceneFunctions(headless=True)
+    snapshots = buildHistory(scene)
+    scene.history.undo()
+    scene.history.undo()
+
+    AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.history.storeHistory("Node created")
+
+    assert len(scene.history.history_stack) == len(snapshots) - 1
+    assert not scene.history.canRedo()
+    scene.history.undo()
+    assert getState(scene) == snapshots[2]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import json
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneHistoryStackFunc import AllSceneHistoryStackFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+
+
+def makeStamp(number, size=200):
+    return {'desc': "Stamp %d" % number, 'payload': "x" * size}
+
+
+def test_older_stamps_are_compressed_and_readable():
+    stack = AllSceneHistoryStackFunctions(uncompressed_stamps=2)
+    stamps = [makeStamp(number) for number in range(6)]
+    for stamp in stamps: assert stack.append(stamp) == 0
+
+    assert [isinstance(stamp, bytes) for stamp in stack.stamps] == [True] * 4 + [False] * 2
+    assert list(stack) == stamps
+    stats = stack.getStats()
+    assert stats['stamps'] == 6
+    assert stats['raw_bytes'] == sum(len(json.dumps(stamp).encode('utf-8')) for stamp in stamps)
+    assert stats['compressed_bytes'] < stats['raw_bytes']
+
+
+def test_oldest_stamps_are_evicted_over_budget():
+    stack = AllSceneHistoryStackFunctions(byte_budget=1000, uncompressed_stamps=100)
+    evicted = sum(stack.append(makeStamp(number)) for number in range(10))
+
+    assert stack.getStats()['compressed_bytes'] <= 1000
+    assert len(stack) == 10 - evicted and evicted > 0
+    assert stack[len(stack) - 1] == makeStamp(9)
+    assert stack[0] == makeStamp(evicted)
+
+
+def test_newest_stamp_is_kept_over_budget():
+    stack = AllSceneHistoryStackFunctions(byte_budget=10)
+    stack.append(makeStamp(0))
+    assert stack.append(makeStamp(1)) == 1
+    assert list(stack) == [makeStamp(1)]
+
+
+def test_undo_stops_at_evicted_stamps():
+    scene = AllSceneFunctions(headless=True)
+    scene.history.storeInitialHistoryStamp()
+    for number in range(8):
+        AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+        scene.history.storeHistory("Node created")
+    sizes = scene.history.history_stack.stored_sizes
+    scene.history.setHistoryBudget(sum(sizes[-3:]))
+
+    AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.history.storeHistory("Node created")
+
+    stamps = len(scene.history.history_stack)
+    assert stamps < 10 and scene.history.history_current_step == stamps - 1
+    for undo in range(stamps - 1):
+        assert scene.history.canUndo()
+        scene.history.undo()
+    assert not scene.history.canUndo()
+    assert len(scene.nodes) == 9 - (stamps - 1)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+@pytest.fixture
+def scene(qapp):
+    return AllSceneFunctions()
+
+
+def getFreeInputs(nodes):
+    """Return input `Sockets` which can take another `Edge`, single-edge inputs only when they are empty"""
+    return [socket for node in nodes for socket in node.inputs if socket.is_multi_edges or not socket.hasAnyEdge()]
+
+
+@pytest.mark.parametrize("seed", (0, 1, 2))
+def test_random_changes_leave_no_stale_items(scene, seed):
+    rng = random.Random(seed)
+
+    def createNode():
+        node = AllNodeFunctions(scene, "Stress", inputs=[1, 1], outputs=[1])
+        node.setPos(rng.uniform(-2000, 2000), rng.uniform(-2000, 2000))
+        return node
+
+    nodes = [createNode() for index in range(20)]
+    for iteration in range(1500):
+        action = rng.random()
+        edges = list(scene.edges)
+        free_inputs = getFreeInputs(nodes)
+        if action < 0.3 and free_inputs:
+            end_socket = rng.choice(free_inputs)
+            start = rng.choice([node for node in nodes if node is not end_socket.node])
+            AllEdgeFunctions(scene, start.outputs[0], end_socket)
+        elif action < 0.5 and edges and free_inputs:
+            # move the end of an edge to another input
+            edge = rng.choice(edges)
+            edge.reconnect(edge.end_socket, rng.choice(free_inputs))
+            edge.updatePositions()
+        elif action < 0.7 and edges:
+            rng.choice(edges).remove()
+        elif action < 0.9:
+            node = rng.choice(nodes)
+            node.setPos(rng.uniform(-2000, 2000), rng.uniform(-2000, 2000))
+            node.updateConnectedEdges()
+        else:
+            node = rng.choice(nodes)
+            nodes.remove(node)
+            node.remove()
+            nodes.append(createNode())
+
+        assert all(len(socket.edges) <= 1 for node in nodes for socket in node.inputs if not socket.is_multi_edges)
+        # the index is rebuilt lazily, look into it now and then like painting and hover would
+        if iteration % 50 == 0: assert scene.grScene.findStaleItems() == []
+
+    assert scene.grScene.findStaleItems() == []
+    for node in nodes: node.remove()
+    assert scene.grScene.findStaleItems() == []
+    assert scene.grScene.items() == []
+
+
+def test_socket_radius_updates_index(scene):
+    node = AllNodeFunctions(scene, "Stress", inputs=[1], outputs=[1])
+    socket = node.inputs[0]
+    rect = socket.grSocket.sceneBoundingRect()
+    socket.grSocket.setRadius(20)
+
+    assert socket.grSocket.sceneBoundingRect().width() > rect.width()
+    assert socket.grSocket in scene.grScene.items(socket.grSocket.sceneBoundingRect())
+    assert scene.grScene.findStaleItems() == []
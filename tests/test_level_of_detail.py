@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+@pytest.fixture
+def painted(qapp, monkeypatch):
+    """Count the painted titles, contents and socket circles"""
+    QtWidgets, QtGui = pytest.importorskip("PyQt5.QtWidgets"), pytest.importorskip("PyQt5.QtGui")
+    counts = {'titles': 0, 'contents': 0, 'sockets': 0}
+
+    def countCalls(cls, name, key):
+        method = getattr(cls, name)
+        def counted(*args):
+            counts[key] += 1
+            return method(*args)
+        monkeypatch.setattr(cls, name, counted)
+
+    countCalls(QtWidgets.QGraphicsTextItem, "paint", 'titles')
+    countCalls(QtWidgets.QGraphicsProxyWidget, "paint", 'contents')
+    countCalls(QtGui.QPainter, "drawEllipse", 'sockets')
+    return counts
+
+
+def createView(scene):
+    from Nodeeditor.SystemProperties.GraphicalView import DrawGraphicalView
+    view = DrawGraphicalView(scene.grScene)
+    view.resize(800, 600)
+    view.centerOn(200, 120)
+    return view
+
+
+def render(view, counts):
+    """Render the `View` offscreen and return what was painted"""
+    QtGui = pytest.importorskip("PyQt5.QtGui")
+    for key in counts: counts[key] = 0
+    image = QtGui.QImage(view.viewport().size(), QtGui.QImage.Format_ARGB32)
+    painter = QtGui.QPainter(image)
+    view.render(painter)
+    painter.end()
+    return dict(counts)
+
+
+def test_zoomed_out_view_skips_details(painted):
+    scene = AllSceneFunctions()
+    first = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+    second = AllNodeFunctions(scene, "Output", inputs=[1], outputs=[1])
+    second.setPos(300, 0)
+    AllEdgeFunctions(scene, first.outputs[0], second.inputs[0])
+
+    near, far = createView(scene), createView(scene)
+    far.scale(0.25, 0.25)
+
+    assert render(near, painted) == {'titles': 2, 'contents': 2, 'sockets': 4}
+    assert render(far, painted) == {'titles': 0, 'contents': 0, 'sockets': 0}
+    # the views don't share the zoom, a transform set without the wheel is followed as well
+    assert render(near, painted)['titles'] == 2
+    far.resetTransform()
+    assert render(far, painted)['titles'] == 2
+    near.fitInView(-4000, -4000, 8000, 8000)
+    assert render(near, painted) == {'titles': 0, 'contents': 0, 'sockets': 0}
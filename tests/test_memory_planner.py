@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneEvaluationFunc import getUfuncResultLayout, NODE_UFUNCS
+from conftest import addNode
+
+
+def createChain(length=8):
+    """Return `Scene` computing ``((a + b) * b + b) * b ...`` and its inputs and outputs"""
+    scene = AllSceneFunctions(headless=True)
+    first, second = addNode(scene, "Input", []), addNode(scene, "Input", [])
+    node = first
+    for index in range(length): node = addNode(scene, ("Addition", "Multiplication")[index % 2], [node, second])
+    outputs = [addNode(scene, "Output", [node]), addNode(scene, "Output", [addNode(scene, "Subtraction", [node, first])])]
+    return scene, (first, second), outputs
+
+
+OPERANDS = [np.ones(3, np.float32), np.ones(3, np.int8), np.ones(3, np.uint8), np.ones((2, 1), np.int64),
+            2.0, 2, 200, -1, 1j, True, np.float64(2.0), np.int8(3), np.array(5, np.int16)]
+
+
+@pytest.mark.parametrize("title", sorted(NODE_UFUNCS))
+def test_result_layout_matches_operation(title):
+    for first_value in OPERANDS:
+        for second_value in OPERANDS:
+            if not any(isinstance(value, np.ndarray) and value.ndim for value in (first_value, second_value)):
+                continue
+            try:
+                with np.errstate(all='ignore'):
+                    value = NODE_UFUNCS[title](first_value, second_value)
+            except OverflowError:
+                with pytest.raises(OverflowError): getUfuncResultLayout(title, first_value, second_value)
+                continue
+            assert getUfuncResultLayout(title, first_value, second_value) == (value.shape, value.dtype)
+
+
+@pytest.mark.parametrize("first_value, second_value", [
+    (np.ones(4, np.float32), 2.0), (np.ones(4, np.float32), np.float64(2.0)), (np.arange(4, dtype=np.int8), 100),
+    (np.arange(4, dtype=np.int8), 200), (np.arange(4), 3), (np.ones(4, np.uint8), -1),
+])
+def test_planner_matches_evaluator(first_value, second_value):
+    scene, inputs, outputs = createChain()
+    for node, value in zip(inputs, (first_value, second_value)): scene.evaluator.setInputValue(node, value)
+    expected = scene.evaluator.evaluate()
+
+    results = scene.compiler.evaluate(dict(zip(inputs, (first_value, second_value))))
+    for node in outputs:
+        if expected[node.id] is None:
+            assert results[node.id] is None
+            continue
+        assert results[node.id].dtype == expected[node.id].dtype
+        np.testing.assert_array_equal(results[node.id], expected[node.id])
+
+
+def test_planner_stats():
+    scene, inputs, outputs = createChain(length=12)
+    frame, factor = np.ones((256, 256), np.float32), np.float32(0.5)
+    arguments = {inputs[0]: frame, inputs[1]: factor}
+    planner = scene.compiler.planner
+
+    scene.compiler.evaluate(arguments)
+    stats = planner.getStats()
+    assert stats['steps'] > stats['slots']
+    # the chain needs the input, two intermediates and the two outputs at most, all of one frame size
+    assert stats['peak_bytes'] <= 5 * frame.nbytes < stats['naive_bytes']
+    assert planner.estimate([frame, factor]) == {'peak_bytes': stats['peak_bytes'],
+                                                 'naive_bytes': stats['naive_bytes']}
+
+    scene.compiler.evaluate(arguments)
+    stats = planner.getStats()
+    assert stats['allocated'] == 0 and stats['reused'] > 0
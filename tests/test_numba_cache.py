@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import os, sys, stat
+
+import pytest
+
+from Nodeeditor.SystemProperties import SceneCompilerFunc
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneCompilerFunc import COMPILER_BACKEND_NUMBA, COMPILED_FUNCTION_NAME
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+pytestmark = [pytest.mark.skipif(SceneCompilerFunc.numba is None, reason="numba is not installed"),
+              pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = str(tmp_path / "kernels")
+    monkeypatch.setattr(SceneCompilerFunc, "NUMBA_CACHE_DIR", directory)
+    yield directory
+    for name in [name for name in sys.modules if name.startswith(COMPILED_FUNCTION_NAME + "_")]: del sys.modules[name]
+
+
+def compileScene(factor):
+    """Compile ``Input * factor`` by numba, return the compiler and its input `Node`"""
+    scene = AllSceneFunctions(headless=True)
+    node_input, node_factor = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1]), \
+        AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_multiply = AllNodeFunctions(scene, "Multiplication", inputs=[0, 0], outputs=[1])
+    node_output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(scene, node_input.outputs[0], node_multiply.inputs[0])
+    AllEdgeFunctions(scene, node_factor.outputs[0], node_multiply.inputs[1])
+    AllEdgeFunctions(scene, node_multiply.outputs[0], node_output.inputs[0])
+    scene.compiler.optimizer.setConstantInput(node_factor, factor)
+    scene.compiler.setBackend(COMPILER_BACKEND_NUMBA)
+    scene.compiler.compile()
+    return scene.compiler, node_input
+
+
+def getKernelFilename(directory, compiler):
+    return os.path.join(directory, "%s_%s.py" % (COMPILED_FUNCTION_NAME, compiler.kernel_hash))
+
+
+def test_cache_dir_is_private(cache_dir):
+    compiler, node_input = compileScene(3.0)
+    assert list(compiler.evaluate({node_input: 2.0}).values()) == [6.0]
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    assert os.path.exists(getKernelFilename(cache_dir, compiler))
+
+
+def test_modified_kernel_file_is_not_executed(cache_dir):
+    compiler, node_input = compileScene(3.0)
+    filename = getKernelFilename(cache_dir, compiler)
+    with open(filename) as file: kernel_source = file.read()
+    del sys.modules["%s_%s" % (COMPILED_FUNCTION_NAME, compiler.kernel_hash)]
+
+    with open(filename, "w") as file:
+        file.write("import builtins\nbuiltins.kernel_injected = True\n"
+                   "def %s(i0=0):\n    return (-1,)\n" % COMPILED_FUNCTION_NAME)
+    compiler, node_input = compileScene(3.0)
+
+    assert list(compiler.evaluate({node_input: 2.0}).values()) == [6.0]
+    assert not hasattr(__import__("builtins"), "kernel_injected")
+    with open(filename) as file: assert file.read() == kernel_source
+
+
+def test_shared_cache_dir_is_not_used(cache_dir):
+    os.makedirs(cache_dir)
+    os.chmod(cache_dir, 0o777)
+
+    compiler, node_input = compileScene(5.0)
+
+    assert list(compiler.evaluate({node_input: 2.0}).values()) == [10.0]
+    assert os.listdir(cache_dir) == []
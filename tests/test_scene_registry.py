@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Nodeeditor.SystemProperties import SerializationFunc
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions, SceneItemList
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+def addNodesWithSameID(scene):
+    first = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    second = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    scene.reindexNode(second, first.id)
+    return first, second
+
+
+def test_live_entry_is_never_overwritten():
+    scene = AllSceneFunctions(headless=True)
+    first, second = addNodesWithSameID(scene)
+    assert scene.getNodeByID(first.id) is first
+
+    second.remove()
+
+    assert scene.nodes == [first]
+    assert scene.getNodeByID(first.id) is first and scene.shadowed_nodes == {}
+
+
+def test_removed_node_hands_its_id_over():
+    scene = AllSceneFunctions(headless=True)
+    first, second = addNodesWithSameID(scene)
+
+    first.remove()
+
+    assert scene.nodes == [second]
+    assert scene.getNodeByID(second.id) is second and scene.shadowed_nodes == {}
+
+
+def test_new_items_getting_restored_ids(monkeypatch):
+    """``id()`` of a new object can be the `id` restored into a live one, here every new object gets the same"""
+    source = AllSceneFunctions(headless=True)
+    node_input = AllNodeFunctions(source, "Input", inputs=[0], outputs=[1])
+    node_output = AllNodeFunctions(source, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(source, node_input.outputs[0], node_output.inputs[0])
+    AllEdgeFunctions(source, node_input.outputs[0], node_output.inputs[0])
+    data = source.serialize()
+
+    scene = AllSceneFunctions(headless=True)
+    monkeypatch.setattr(SerializationFunc, "id", lambda item: node_input.id, raising=False)
+    scene.deserialize(data)
+    monkeypatch.undo()
+
+    assert scene.serialize() == data
+    for node_data in data['nodes']:
+        node = scene.getNodeByID(node_data['id'])
+        assert node is not None and node.title == node_data['title']
+        for socket_data in node_data['inputs'] + node_data['outputs']:
+            assert scene.getSocketByID(socket_data['id']).node is node
+    for edge_data in data['edges']:
+        assert scene.getEdgeByID(edge_data['id']) is not None
+    assert scene.shadowed_nodes == scene.shadowed_edges == scene.shadowed_sockets == {}
+
+
+def test_item_list_keeps_order():
+    items = SceneItemList(range(5))
+    items.remove(2)
+    items.append(7)
+
+    assert items == [0, 1, 3, 4, 7] and len(items) == 5
+    assert items[0] == 0 and items[-1] == 7 and items[2] == 3
+    assert 2 not in items and 7 in items
+    with pytest.raises(ValueError):
+        items.remove(2)
+
+
+def test_registries_follow_deserialization():
+    scene = AllSceneFunctions(headless=True)
+    node_input = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(scene, node_input.outputs[0], node_output.inputs[0])
+    data = scene.serialize()
+    sockets = node_input.inputs + node_input.outputs + node_output.inputs + node_output.outputs
+
+    scene.deserialize(data)
+
+    assert [node.id for node in scene.nodes] == [node_data['id'] for node_data in data['nodes']]
+    for node in scene.nodes: assert scene.getNodeByID(node.id) is node
+    for edge in scene.edges: assert scene.getEdgeByID(edge.id) is edge
+    for node in scene.nodes:
+        for socket in node.inputs + node.outputs:
+            assert scene.getSocketByID(socket.id) is socket
+            assert socket in sockets
+
+    for node in list(scene.nodes): node.remove()
+    assert scene.nodes_by_id == {} and scene.edges_by_id == {} and scene.sockets_by_id == {}
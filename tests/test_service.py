@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import os, sys, json, asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import service
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+def saveGraph(directory, name="graph"):
+    """Save ``(a + b) * a -> Output`` graph, return graph filename and ids of the inputs and of the output"""
+    scene = AllSceneFunctions(headless=True)
+    node_a = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_b = AllNodeFunctions(scene, "Input", inputs=[0], outputs=[1])
+    node_add = AllNodeFunctions(scene, "Addition", inputs=[0, 0], outputs=[1])
+    node_multiply = AllNodeFunctions(scene, "Multiplication", inputs=[0, 0], outputs=[1])
+    node_output = AllNodeFunctions(scene, "Output", inputs=[0], outputs=[1])
+    AllEdgeFunctions(scene, node_a.outputs[0], node_add.inputs[0])
+    AllEdgeFunctions(scene, node_b.outputs[0], node_add.inputs[1])
+    AllEdgeFunctions(scene, node_add.outputs[0], node_multiply.inputs[0])
+    AllEdgeFunctions(scene, node_a.outputs[0], node_multiply.inputs[1])
+    AllEdgeFunctions(scene, node_multiply.outputs[0], node_output.inputs[0])
+
+    graph_filename = os.path.join(str(directory), name + ".json")
+    scene.saveToFile(graph_filename)
+    return graph_filename, node_a.id, node_b.id, node_output.id
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph_filename, a, b, output = saveGraph(tmp_path)
+    service.initWorker([graph_filename])
+    yield service.getGraphName(graph_filename), a, b, output
+    service.GRAPH_REGISTRY.clear()
+    service.GRAPH_LOCKS.clear()
+
+
+def test_concurrent_threads_on_same_graph(graph):
+    name, a, b, output = graph
+
+    def work(seed):
+        rng = np.random.default_rng(seed)
+        for _ in range(50):
+            x, y = rng.random(64), rng.random(64)
+            [result], microseconds = service.evaluateGraph(name, [{a: x, b: y}])
+            np.testing.assert_allclose(result[output], (x + y) * x)
+
+            requests = [{a: float(value), b: float(seed)} for value in rng.random(8)]
+            results, microseconds = service.evaluateGraph(name, requests)
+            for request, result in zip(requests, results):
+                assert result[output] == pytest.approx((request[a] + request[b]) * request[a])
+        return seed
+
+    # switch threads often, so they interleave inside the compiled function
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert sorted(executor.map(work, range(16))) == list(range(16))
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_service_batches_concurrent_requests(graph):
+    name, a, b, output = graph
+
+    async def main(graph_service):
+        return await asyncio.gather(*[graph_service.evaluate(name, {a: float(value), b: 1.0}) for value in range(40)])
+
+    graph_service = service.AllGraphServiceFunctions([], workers=4, batch_window=0.01)
+    try:
+        results = asyncio.run(main(graph_service))
+    finally:
+        graph_service.shutdown()
+
+    assert [result[output] for result in results] == [(value + 1.0) * value for value in range(40)]
+    stats = graph_service.getStats()
+    assert stats['requests'] == 40 and stats['batches'] < 40
+
+
+def test_batched_results_do_not_depend_on_neighbours(graph):
+    name, a, b, output = graph
+    requests = [{a: 2 ** 40, b: 0}, {a: 3, b: 0}, {a: 2.5, b: 0.0}, {a: 3.0, b: 1.0}, {a: 1e200, b: 0.0},
+                {a: True, b: 1}, {a: 1.5}, {a: 0.5, b: 0.5}]
+    alone = [service.evaluateGraph(name, [input_values])[0][0][output] for input_values in requests]
+    assert alone[:3] == [2 ** 80, 9, 6.25] and type(alone[1]) is int
+
+    async def main(graph_service):
+        return await asyncio.gather(*[graph_service.evaluate(name, input_values) for input_values in requests])
+
+    graph_service = service.AllGraphServiceFunctions([], workers=4, batch_window=0.01)
+    try:
+        for results in (service.evaluateGraph(name, requests)[0], asyncio.run(main(graph_service))):
+            values = [result[output] for result in results]
+            assert values == alone
+            assert [type(value) for value in values] == [type(value) for value in alone]
+    finally:
+        graph_service.shutdown()
+
+
+def test_corrupt_graph_raises(tmp_path):
+    filename = str(tmp_path / "corrupt.json")
+    with open(filename, "w") as file: file.write('{"id": 1, "nodes": [')
+    with pytest.raises(json.JSONDecodeError):
+        service.loadGraph(filename)
+
+    with open(filename, "w") as file: json.dump({"nodes": [{"id": 1}], "edges": []}, file)
+    with pytest.raises(Exception):
+        service.loadGraph(filename)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneSharedMemoryFunc import SharedArrayHandle
+from conftest import addNode
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="shared memory blocks are not listed")
+
+MIN_BYTES = 4096
+
+
+def getLinkedBlocks():
+    return set(name for name in os.listdir("/dev/shm") if name.startswith("psm_"))
+
+
+@pytest.fixture
+def scene():
+    scene = AllSceneFunctions(headless=True)
+    scene.scheduler.setExecutor(max_workers=2, use_processes=True, shared_memory=True)
+    scene.scheduler.transport.min_bytes = MIN_BYTES
+    yield scene
+    scene.scheduler.shutdown()
+
+
+def test_blocks_are_unlinked_after_last_consumer(scene):
+    linked = getLinkedBlocks()
+    first, second = addNode(scene, "Input", []), addNode(scene, "Input", [])
+    product = addNode(scene, "Multiplication", [first, second])
+    total = addNode(scene, "Addition", [product, product])
+    difference = addNode(scene, "Subtraction", [total, second])
+    outputs = [addNode(scene, "Output", [total]), addNode(scene, "Output", [difference])]
+
+    for run in range(3):
+        values = np.arange(1024.0) + run, np.full(1024, 2.0)
+        scene.evaluator.setInputValue(first, values[0])
+        scene.evaluator.setInputValue(second, values[1])
+        results = scene.scheduler.evaluate()
+
+        np.testing.assert_array_equal(results[outputs[0].id], values[0] * values[1] * 2)
+        np.testing.assert_array_equal(results[outputs[1].id], values[0] * values[1] * 2 - values[1])
+        assert scene.scheduler.transport.refcounts == {}
+        assert getLinkedBlocks() - linked == set()
+
+
+def test_cache_never_returns_shared_handle(scene):
+    first, second = addNode(scene, "Input", []), addNode(scene, "Input", [])
+    product = addNode(scene, "Multiplication", [first, second])
+    output = addNode(scene, "Output", [product])
+    # small inputs, their product is passed in shared memory
+    column, row = np.arange(32.0).reshape(32, 1), np.arange(32.0).reshape(1, 32)
+
+    for run in range(3):
+        scene.evaluator.setInputValue(first, column)
+        scene.evaluator.setInputValue(second, row)
+        value = scene.scheduler.evaluate()[output.id]
+        assert not isinstance(value, SharedArrayHandle)
+        np.testing.assert_array_equal(value, column * row)
+    # arrays are never memoized, neither the handles nor the mapped values
+    assert len(scene.evaluator.cache) == 0
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from Nodeeditor.SystemProperties.SceneSpatialIndexFunc import AllSceneSpatialIndexFunctions, rectsIntersect, \
+    INDEX_NODES, INDEX_SOCKETS, INDEX_EDGES
+from Nodeeditor.Node.NodeFunc import AllNodeFunctions
+from Nodeeditor.Edge.EdgeFunc import AllEdgeFunctions
+
+
+def randomRect(rng, max_size):
+    x, y = rng.uniform(-5000, 5000), rng.uniform(-5000, 5000)
+    return x, y, x + rng.uniform(0, max_size), y + rng.uniform(0, max_size)
+
+
+@pytest.mark.parametrize("seed", (0, 1, 2))
+def test_queries_match_linear_scan(seed):
+    rng = random.Random(seed)
+    index = AllSceneSpatialIndexFunctions(None, cell_size=64)
+    rects = {}
+    for iteration in range(3000):
+        action = rng.random()
+        if action < 0.5 or not rects:
+            # some items cover more than SPATIAL_INDEX_MAX_CELLS cells
+            item = rng.randrange(400)
+            rects[item] = randomRect(rng, 3000 if rng.random() < 0.05 else 200)
+            index.insert(INDEX_EDGES, item, rects[item])
+        elif action < 0.7:
+            item = rng.choice(list(rects))
+            del rects[item]
+            index.remove(INDEX_EDGES, item)
+        else:
+            rect = randomRect(rng, 5000 if rng.random() < 0.1 else 300)
+            expected = [item for item in rects if rectsIntersect(rects[item], rect)]
+            expected.sort(key=index.order.get, reverse=True)
+            assert index.query(INDEX_EDGES, rect) == expected
+
+    assert len(index) == len(rects)
+    for item in list(rects): index.remove(INDEX_EDGES, item)
+    assert index.cells[INDEX_EDGES] == {} and index.large_items[INDEX_EDGES] == set() and index.order == {}
+
+
+def test_nearest_item():
+    index = AllSceneSpatialIndexFunctions(None)
+    index.insert(INDEX_SOCKETS, 'far', (90, 90, 110, 110))
+    index.insert(INDEX_SOCKETS, 'near', (10, 10, 30, 30))
+
+    assert index.getNearest(INDEX_SOCKETS, 25, 25, 20) == 'near'
+    assert index.getNearest(INDEX_SOCKETS, 80, 80, 20) == 'far'
+    assert index.getNearest(INDEX_SOCKETS, 500, 500, 20) is None
+
+
+def getSceneRect(item):
+    rect = item.sceneBoundingRect()
+    return rect.left(), rect.top(), rect.right(), rect.bottom()
+
+
+def assertRectsClose(first, second):
+    assert first == pytest.approx(second, abs=1e-6)
+
+
+def test_index_follows_scene(qapp):
+    scene = AllSceneFunctions()
+    rng = random.Random(0)
+    nodes = [AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1]) for index in range(10)]
+    for first, second in zip(nodes, nodes[1:]): AllEdgeFunctions(scene, first.outputs[0], second.inputs[0])
+
+    for iteration in range(3):
+        for node in nodes: node.setPos(rng.uniform(-2000, 2000), rng.uniform(-2000, 2000))
+        for edge in scene.edges: edge.updatePositions()
+
+        index = scene.spatial_index
+        for node in nodes:
+            assertRectsClose(index.getRect(INDEX_NODES, node), getSceneRect(node.grNode))
+            for socket in node.inputs + node.outputs:
+                assertRectsClose(index.getRect(INDEX_SOCKETS, socket), getSceneRect(socket.grSocket))
+        for edge in scene.edges:
+            assertRectsClose(index.getRect(INDEX_EDGES, edge), getSceneRect(edge.grEdge))
+
+    removed = nodes.pop(3)
+    removed.remove()
+    assert scene.spatial_index.getRect(INDEX_NODES, removed) is None
+    for socket in removed.inputs + removed.outputs:
+        assert scene.spatial_index.getRect(INDEX_SOCKETS, socket) is None
+    assert len(scene.spatial_index) == len(nodes) * 3 + len(scene.edges)
+
+
+def test_item_at_socket_and_node(qapp):
+    scene = AllSceneFunctions()
+    node = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+    node.setPos(100, 100)
+
+    socket = node.outputs[0]
+    x, y = socket.getSocketPosition()
+    assert scene.spatial_index.getItemAt(100 + x, 100 + y) is socket.grSocket
+    assert scene.spatial_index.getItemAt(100 + node.grNode.width / 2, 100 + node.grNode.height / 2) is node.grNode
+    assert scene.spatial_index.getItemAt(-1000, -1000) is None
+
+
+def test_socket_under_other_node_is_hidden(qapp):
+    scene = AllSceneFunctions()
+    lower = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+    upper = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+    lower.setPos(100, 100)
+    upper.setPos(200, 100)
+
+    socket = lower.outputs[0]
+    x, y = socket.getSocketPosition()
+    assert upper.grNode.sceneBoundingRect().contains(100 + x, 100 + y)
+    assert scene.spatial_index.getItemAt(100 + x, 100 + y) is upper.grNode
+
+    lower.grNode.setZValue(1)
+    assert scene.spatial_index.getItemAt(100 + x, 100 + y) is socket.grSocket
+
+
+def test_socket_is_hit_by_its_circle(qapp):
+    scene = AllSceneFunctions()
+    node = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+
+    socket = node.outputs[0]
+    x, y = socket.getSocketPosition()
+    radius = socket.grSocket.radius + socket.grSocket.outline_width
+    # the corner of the bounding square, outside of the circle and of the Node
+    assert scene.spatial_index.getItemAt(x + 0.9 * radius, y - 0.9 * radius) is None
+    assert scene.spatial_index.getItemAt(x + 0.6 * radius, y - 0.6 * radius) is socket.grSocket
+
+
+def test_click_on_content_finds_its_widget(qapp):
+    QtCore, QtGui = pytest.importorskip("PyQt5.QtCore"), pytest.importorskip("PyQt5.QtGui")
+    from Nodeeditor.SystemProperties.GraphicalView import DrawGraphicalView
+    scene = AllSceneFunctions()
+    node = AllNodeFunctions(scene, "Input", inputs=[1], outputs=[1])
+    view = DrawGraphicalView(scene.grScene)
+    view.resize(800, 600)
+
+    def getItemAtClick(scene_x, scene_y):
+        pos = view.mapFromScene(QtCore.QPointF(scene_x, scene_y))
+        event = QtGui.QMouseEvent(QtCore.QEvent.MouseButtonPress, QtCore.QPointF(pos), QtCore.Qt.LeftButton,
+                                  QtCore.Qt.LeftButton, QtCore.Qt.NoModifier)
+        return view.getItemAtClick(event), view.itemAt(pos)
+
+    center = node.grNode.grContent.sceneBoundingRect().center()
+    item, qt_item = getItemAtClick(center.x(), center.y())
+    assert item is qt_item and item is node.grNode.grContent
+    # the title is not content, the index answers
+    item, qt_item = getItemAtClick(node.grNode.width / 2, node.grNode.title_height / 2)
+    assert item is node.grNode
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import asyncio, itertools, tracemalloc
+
+from Nodeeditor.SystemProperties.SceneFunc import AllSceneFunctions
+from conftest import addNode
+
+
+def createScene():
+    """``x * x -> Output`` and ``x / y -> Output``, `x` feeds three inputs"""
+    scene = AllSceneFunctions(headless=True)
+    node_x = addNode(scene, "Input", [])
+    node_y = addNode(scene, "Input", [])
+    node_square = addNode(scene, "Output", [addNode(scene, "Multiplication", [node_x, node_x])])
+    node_ratio = addNode(scene, "Output", [addNode(scene, "Division", [node_x, node_y])])
+    return scene, node_x, node_y, node_square, node_ratio
+
+
+class CountingSource():
+    """Endless source counting how many records were read"""
+
+    def __init__(self, values):
+        self.values = iter(values)
+        self.reads = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.reads += 1
+        return next(self.values)
+
+
+def test_sources_are_read_only_on_demand():
+    scene, node_x, node_y, node_square, node_ratio = createScene()
+    source_x, source_y = CountingSource(itertools.count(1)), CountingSource(itertools.repeat(2))
+
+    stream = scene.streamer.stream({node_x: source_x, node_y.id: source_y})
+    assert source_x.reads == 0
+
+    for index, outputs in enumerate(itertools.islice(stream, 1000)):
+        assert outputs == {node_square.id: (index + 1) ** 2, node_ratio.id: (index + 1) / 2}
+        assert source_x.reads == source_y.reads == index + 1
+
+
+def test_memory_stays_bounded():
+    scene, node_x, node_y, node_square, node_ratio = createScene()
+
+    # x is split to three inputs, the tee buffers must not grow with the stream
+    stream = scene.streamer.stream({node_x: itertools.count(1), node_y: itertools.repeat(1)})
+    for outputs in itertools.islice(stream, 1000): pass
+    tracemalloc.start()
+    try:
+        for outputs in itertools.islice(stream, 50000): pass
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 256 * 1024
+
+
+def test_invalid_record_does_not_stop_stream():
+    scene, node_x, node_y, node_square, node_ratio = createScene()
+
+    results = list(scene.streamer.stream({node_x: [1, 2, 3], node_y: [1, 0, 2]}))
+
+    assert [outputs[node_ratio.id] for outputs in results] == [1.0, None, 1.5]
+    assert [outputs[node_square.id] for outputs in results] == [1, 4, 9]
+
+
+def test_async_stream_awaits_one_item_at_a_time():
+    scene, node_x, node_y, node_square, node_ratio = createScene()
+    reads = []
+
+    async def source():
+        for value in itertools.count(1):
+            reads.append(value)
+            await asyncio.sleep(0)
+            yield value
+
+    async def main():
+        results = []
+        async for outputs in scene.streamer.astream({node_x: source(), node_y: itertools.repeat(4)}):
+            results.append(outputs[node_ratio.id])
+            assert len(reads) == len(results)
+            if len(results) == 5: break
+        return results
+
+    assert asyncio.run(main()) == [0.25, 0.5, 0.75, 1.0, 1.25]